@@ -0,0 +1,206 @@
+import struct
+
+import numpy as np
+
+# Payload of an AUDIO message sent to the clients:
+#   header: codec (uint8), channels (uint8), sequence (uint16), sample offset (uint64),
+#           sample rate (uint32), count (uint16)
+#   body:   count frames of interleaved samples, big endian int16 for CODEC_PCM16 or one
+#           G.711 mu-law byte per sample for CODEC_MULAW
+# Every frame carries the offset of its first sample since the capture started, so a client
+# can put frames that arrive late or out of order in place and fill gaps with silence. The
+# sequence counts frames per client stream, a jump in it means frames were dropped.
+AUDIO_HEADER_FORMAT = "!BBHQIH"
+AUDIO_HEADER_SIZE = struct.calcsize(AUDIO_HEADER_FORMAT)
+
+CODEC_PCM16 = 0
+CODEC_MULAW = 1
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 32635
+
+
+def _mulaw_encode_table():
+    """
+    Builds the G.711 mu-law code of every int16 value, indexed by the value as uint16.
+    """
+    samples = np.arange(0x10000, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), _MULAW_CLIP) + _MULAW_BIAS
+    exponent = np.floor(np.log2(magnitude >> 7)).astype(np.int32)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def _mulaw_decode_table():
+    """
+    Builds the int16 value of every G.711 mu-law code.
+    """
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _MULAW_BIAS) << exponent) - _MULAW_BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_ENCODE_TABLE = _mulaw_encode_table()
+MULAW_DECODE_TABLE = _mulaw_decode_table()
+
+
+def to_int16(samples) -> np.ndarray:
+    """
+    Convert samples to int16.
+
+    Args:
+        samples: numpy array of int16 samples, or float samples in [-1, 1].
+
+    Returns:
+        np.ndarray: The int16 samples, the array itself if it already is int16.
+    """
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(np.rint(samples * 32768.0), -32768, 32767).astype(np.int16)
+
+
+class AudioStreamEncoder:
+    """
+    Cuts a stream of audio into small AUDIO frames for the clients.
+
+    One encoder keeps the state of one client stream. Samples that do not fill a frame are
+    kept for the next call, unless the next chunk does not continue them (the mic skipped
+    silence or lost samples), then they are sent as a short frame first.
+
+    Methods:
+        __init__ : Initializes the encoder
+        encode : Encodes a chunk of audio into frames
+    """
+
+    def __init__(self, frame_duration=0.02, codec=CODEC_MULAW):
+        """
+        Initialize the encoder.
+
+        Args:
+            frame_duration (float): Length of a frame in seconds.
+            codec (int): CODEC_MULAW or CODEC_PCM16.
+        """
+        if codec not in (CODEC_PCM16, CODEC_MULAW):
+            raise ValueError(f"Unknown audio codec: {codec}")
+        self.frame_duration = frame_duration
+        self.codec = codec
+        self.sequence = 0
+        self.pending = None
+        self.pending_offset = 0
+        self.sample_rate = None
+
+    def _frame(self, offset, samples, sample_rate) -> bytes:
+        """
+        Encode one frame.
+
+        Args:
+            offset (int): Sample offset of the first frame.
+            samples: int16 array of shape (count, channels).
+            sample_rate (int): Sample rate of the audio.
+
+        Returns:
+            bytes: The AUDIO payload.
+        """
+        if self.codec == CODEC_MULAW:
+            body = MULAW_ENCODE_TABLE[samples.reshape(-1).view(np.uint16)].tobytes()
+        else:
+            body = samples.astype(">i2").tobytes()
+        header = struct.pack(AUDIO_HEADER_FORMAT, self.codec, samples.shape[1],
+                             self.sequence & 0xFFFF, offset, sample_rate, len(samples))
+        self.sequence += 1
+        return header + body
+
+    def encode(self, offset, samples, sample_rate, channels=1) -> list:
+        """
+        Encode a chunk of audio into frames.
+
+        Args:
+            offset (int): Sample offset of the first frame of the chunk.
+            samples: int16 samples, or float samples in [-1, 1], interleaved.
+            sample_rate (int): Sample rate of the audio.
+            channels (int): Number of channels.
+
+        Returns:
+            list: The AUDIO payloads of the complete frames.
+        """
+        samples = to_int16(samples).reshape(-1, channels)
+        payloads = []
+        if self.pending is not None:
+            continues = (
+                offset == self.pending_offset + len(self.pending)
+                and sample_rate == self.sample_rate
+                and channels == self.pending.shape[1]
+            )
+            if continues:
+                samples = np.concatenate((self.pending, samples))
+                offset = self.pending_offset
+            else:
+                payloads.append(self._frame(self.pending_offset, self.pending, self.sample_rate))
+        self.pending = None
+        self.sample_rate = sample_rate
+
+        frame_length = max(int(sample_rate * self.frame_duration), 1)
+        complete = len(samples) - len(samples) % frame_length
+        for start in range(0, complete, frame_length):
+            payloads.append(self._frame(offset + start, samples[start:start + frame_length],
+                                        sample_rate))
+        if complete < len(samples):
+            self.pending = samples[complete:]
+            self.pending_offset = offset + complete
+        return payloads
+
+
+class AudioStreamDecoder:
+    """
+    Decodes AUDIO payloads, the reference for client implementations.
+
+    Attributes:
+        lost (int): Number of frames missing from the sequence so far.
+
+    Methods:
+        __init__ : Initializes the decoder
+        decode : Decodes a payload
+    """
+
+    def __init__(self):
+        """
+        Initialize the decoder.
+        """
+        self.sequence = None
+        self.lost = 0
+
+    def decode(self, payload) -> tuple:
+        """
+        Decode a payload.
+
+        Args:
+            payload: The AUDIO payload.
+
+        Returns:
+            tuple: (sample offset, sample rate, int16 array of shape (count, channels)).
+
+        Raises:
+            ValueError: If the payload uses an unknown codec.
+        """
+        codec, channels, sequence, offset, sample_rate, count = struct.unpack_from(
+            AUDIO_HEADER_FORMAT, payload
+        )
+        body = payload[AUDIO_HEADER_SIZE:]
+        if codec == CODEC_MULAW:
+            samples = MULAW_DECODE_TABLE[np.frombuffer(body, dtype=np.uint8, count=count * channels)]
+        elif codec == CODEC_PCM16:
+            samples = np.frombuffer(body, dtype=">i2", count=count * channels).astype(np.int16)
+        else:
+            raise ValueError(f"Unknown audio codec: {codec}")
+
+        step = 1 if self.sequence is None else (sequence - self.sequence) & 0xFFFF
+        # A step above half the range is a late frame, it is still decoded but does not
+        # move the sequence back
+        if step < 0x8000:
+            self.lost += max(step - 1, 0)
+            self.sequence = sequence
+        return offset, sample_rate, samples.reshape(count, channels)
@@ -0,0 +1,127 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Payload of a LIDAR_DATA message sent to the clients:
+#   header: flags (uint8), sequence (uint16), count (uint16), resolution in mm (uint16)
+#   body:   count big endian uint16 values, zlib compressed if FLAG_COMPRESSED is set
+# A keyframe holds the quantized distances themselves. Other frames hold the difference
+# to the previous scan modulo 2^16, which is mostly zeros and compresses very well.
+# Distances are quantized as round(distance / resolution), 0 means no return.
+LIDAR_DATA_HEADER_FORMAT = "!BHHH"
+LIDAR_DATA_HEADER_SIZE = struct.calcsize(LIDAR_DATA_HEADER_FORMAT)
+
+FLAG_KEYFRAME = 0x01
+FLAG_COMPRESSED = 0x02
+
+
+class LidarScanEncoder:
+    """
+    Encodes lidar scans as compact binary polar arrays for the clients.
+
+    One encoder keeps the state of one client stream, the first scan it encodes is
+    always a keyframe.
+
+    Methods:
+        __init__ : Initializes the encoder
+        encode : Encodes a scan
+    """
+
+    def __init__(self, resolution=10, compress=True, keyframe_interval=50):
+        """
+        Initialize the encoder.
+
+        Args:
+            resolution (int): Quantization step in millimeters.
+            compress (bool): Whether to zlib compress the body.
+            keyframe_interval (int): Number of scans between keyframes.
+        """
+        if not 1 <= resolution <= 0xFFFF:
+            raise ValueError("resolution must be between 1 and 65535 mm")
+        self.resolution = resolution
+        self.compress = compress
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self.previous = None
+
+    def encode(self, distances) -> bytes:
+        """
+        Encode a scan.
+
+        Args:
+            distances: Sequence of distances in millimeters.
+
+        Returns:
+            bytes: The LIDAR_DATA payload.
+        """
+        quantized = np.rint(np.asarray(distances, dtype=np.float64) / self.resolution)
+        quantized = np.clip(quantized, 0, 0xFFFF).astype(np.uint16)
+
+        keyframe = (
+            self.previous is None
+            or len(self.previous) != len(quantized)
+            or self.sequence % self.keyframe_interval == 0
+        )
+        # uint16 arithmetic wraps around, which the decoder undoes with the same wrap
+        values = quantized if keyframe else quantized - self.previous
+        body = values.astype(">u2").tobytes()
+
+        flags = FLAG_KEYFRAME if keyframe else 0
+        if self.compress:
+            body = zlib.compress(body, 6)
+            flags |= FLAG_COMPRESSED
+
+        header = struct.pack(LIDAR_DATA_HEADER_FORMAT, flags, self.sequence & 0xFFFF,
+                             len(quantized), self.resolution)
+        self.previous = quantized
+        self.sequence += 1
+        return header + body
+
+
+class LidarScanDecoder:
+    """
+    Decodes LIDAR_DATA payloads, the reference for client implementations.
+
+    Methods:
+        __init__ : Initializes the decoder
+        decode : Decodes a payload
+    """
+
+    def __init__(self):
+        """
+        Initialize the decoder.
+        """
+        self.previous = None
+        self.sequence = None
+
+    def decode(self, payload) -> np.ndarray:
+        """
+        Decode a payload.
+
+        Args:
+            payload: The LIDAR_DATA payload.
+
+        Returns:
+            np.ndarray: The distances in millimeters as uint32.
+
+        Raises:
+            ValueError: If a delta frame arrives without the frame before it.
+        """
+        flags, sequence, count, resolution = struct.unpack_from(LIDAR_DATA_HEADER_FORMAT, payload)
+        body = payload[LIDAR_DATA_HEADER_SIZE:]
+        if flags & FLAG_COMPRESSED:
+            body = zlib.decompress(body)
+        values = np.frombuffer(body, dtype=">u2", count=count).astype(np.uint16)
+
+        if flags & FLAG_KEYFRAME:
+            quantized = values
+        else:
+            expected = None if self.sequence is None else (self.sequence + 1) & 0xFFFF
+            if self.previous is None or sequence != expected:
+                raise ValueError(f"Delta frame {sequence} does not follow frame {self.sequence}")
+            quantized = self.previous + values
+
+        self.previous = quantized
+        self.sequence = sequence
+        return quantized.astype(np.uint32) * resolution
@@ -6,8 +6,9 @@ import subprocess
 from cv_bridge import CvBridge
 import rclpy
 from rclpy.node import Node
+from rclpy.time import Time
 from std_msgs.msg import String
-from sensor_msgs.msg import Image
+from sensor_msgs.msg import CompressedImage, Image
 from aida_interfaces.srv import SetState
 from aida_interfaces.msg import Joystick
 import socket
@@ -20,7 +21,11 @@ import json
 
 import serial
 
-# from lidar_data.msg import LiDAR
+from lidar_data.msg import CollisionState, LidarData
+from audio_data.msg import AudioData
+
+from aida_api.audio_codec import CODEC_MULAW, AudioStreamEncoder, to_int16
+from aida_api.lidar_codec import LidarScanEncoder
 
 # Socket Constants
 HEADER_FORMAT = "!HI"
@@ -31,9 +36,15 @@ VIDEO_STREAM_ID = 0
 # ROS2 Constants
 # VIDEO_TOPIC = "image"
 VIDEO_TOPIC = "/video_analysis/result"
-LIDAR_TOPIC = "lidar/image"
+LIDAR_TOPIC = "lidar/image/compressed"
+MAP_TOPIC = "lidar/map"
+COLLISION_TOPIC = "lidar/collision"
+LIDAR_SCAN_TOPIC = "lidar/filtered"
 STT_TOPIC = "stt/stt_result"
+STT_PARTIAL_TOPIC = "stt/partial"
+STT_COMMAND_TOPIC = "stt/command"
 JOYSTICK_TOPIC = "joystick/pos"
+AUDIO_TOPIC = "mic/mic_stream"  # Every chunk of the mic in stream mode, not only speech
 
 CAMERA_CONTROL_SERVICE = "video/camera/SetState"
 MIC_CONTROL_SERVICE = "mic/SetState"
@@ -44,6 +55,14 @@ LIDAR_STREAM_FREQUENCY = 1
 
 VIDEO_COMPRESSION_QUALITY = 50
 
+LIDAR_DATA_RESOLUTION = 10  # Quantization of the raw lidar stream in millimeters
+LIDAR_DATA_COMPRESSION = True
+
+AUDIO_FRAME_DURATION = 0.02  # Length of an AUDIO frame in seconds
+AUDIO_CODEC = CODEC_MULAW
+AUDIO_QUEUE_SIZE = 25  # Mic chunks buffered per client before the oldest are dropped
+STT_QUEUE_SIZE = 20  # Transcriptions buffered per client before the oldest are dropped
+
 # Message Type Enums 
 class MessageType(IntEnum):
     CAMERA = 1
@@ -64,6 +83,12 @@ class MessageType(IntEnum):
     JOYSTICK_MOVE = 14
     SEQUENCE = 15
 
+    REQ_MAP = 16
+    MAP_FRAME = 17
+
+    STT_PARTIAL = 18
+    STT_FINAL = 19
+
 
 
 
@@ -141,13 +166,27 @@ class InterfaceNode(Node):
 
         self.serial_lock = threading.Lock()
         self.last_sent_command = None
+        self.front_blocked = False
+        self.back_blocked = False
+        self.veto_latency = None
 
 
         self.bridge = CvBridge()
         self.video_frame = None
         self.stt_result = ""
         self.video_frame_lock = threading.Lock()
+        self.lidar_frame = None
         self.lidar_frame_lock = threading.Lock()
+        self.map_frame = None
+        self.map_frame_lock = threading.Lock()
+        self.lidar_scan = None
+        self.lidar_scan_count = 0
+        self.lidar_scan_condition = threading.Condition()
+        self.lidar_data_events = {}
+        self.audio_events = {}
+        self.audio_queues = {}
+        self.stt_events = {}
+        self.stt_queues = {}
         self.stt_result_lock = threading.Lock()
         self.host = host
         self.port = port
@@ -155,6 +194,9 @@ class InterfaceNode(Node):
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.socket.bind((self.host, self.port))
         self.client_list = []
+        # One lock per client socket, so the messages of the stream threads never interleave
+        self.send_locks = {}
+        self.send_locks_lock = threading.Lock()
 
         self.init_clients()
         self.init_pubs()
@@ -271,14 +313,108 @@ class InterfaceNode(Node):
         """
         Callback function for lidar image messages.
 
+        The lidar image is already encoded, so the bytes are kept as they are and
+        forwarded to the clients without decoding.
+
         Args:
-            msg: The lidar image message.
+            msg: The compressed lidar image message.
         """
         self.lidar_frame_lock.acquire()
-        cv_image = self.bridge.imgmsg_to_cv2(msg, "bgr8")
-        self.lidar_frame = cv_image
+        self.lidar_frame = bytes(msg.data)
         self.lidar_frame_lock.release()
 
+    def lidar_scan_callback(self, msg) -> None:
+        """
+        Callback function for lidar scan messages.
+
+        Stores the latest scan and wakes up the raw lidar streams.
+
+        Args:
+            msg: The lidar data message.
+        """
+        with self.lidar_scan_condition:
+            self.lidar_scan = np.array(msg.data, dtype=np.int32)
+            self.lidar_scan_count += 1
+            self.lidar_scan_condition.notify_all()
+
+    def map_callback(self, msg) -> None:
+        """
+        Callback function for occupancy grid messages.
+
+        The grid is already PNG encoded, so the bytes are kept as they are.
+
+        Args:
+            msg: The compressed occupancy grid message.
+        """
+        with self.map_frame_lock:
+            self.map_frame = bytes(msg.data)
+
+    def collision_callback(self, msg) -> None:
+        """
+        Callback function for collision guard messages.
+
+        Stores which directions are blocked. If the robot is currently driving towards an
+        obstacle it is stopped right away, and the time from the arrival of the lidar packet
+        that detected the obstacle to the stop is logged as the veto latency.
+
+        Args:
+            msg: The collision state message.
+        """
+        with self.serial_lock:
+            self.front_blocked = msg.front_blocked
+            self.back_blocked = msg.back_blocked
+            heading_into_obstacle = (
+                (self.last_sent_command == 'f' and msg.front_blocked)
+                or (self.last_sent_command == 'b' and msg.back_blocked)
+            )
+        if not heading_into_obstacle:
+            return
+
+        self.send_serial_command('s')
+        arrival = Time.from_msg(msg.header.stamp)
+        self.veto_latency = (self.get_clock().now() - arrival).nanoseconds / 1e9
+        self.get_logger().warn(
+            f"Collision guard| Stopped the robot {self.veto_latency * 1000:.1f} ms after the obstacle was detected."
+        )
+
+    def audio_callback(self, msg) -> None:
+        """
+        Callback function for mic audio messages.
+
+        Converts the chunk to int16 once and hands it to the audio stream of every client.
+        A client that cannot keep up loses its oldest chunks, so it never delays the others.
+
+        Args:
+            msg: The audio data message.
+        """
+        if not self.audio_queues:
+            return
+        if msg.sample_format == AudioData.FORMAT_INT16:
+            samples = np.frombuffer(bytes(msg.data), dtype="<i2")
+        else:
+            samples = to_int16(np.frombuffer(bytes(msg.data), dtype="<f4"))
+        chunk = (msg.sample_offset, samples, msg.sample_rate, msg.channels)
+        for audio_queue in list(self.audio_queues.values()):
+            self.put_latest(audio_queue, chunk)
+
+    @staticmethod
+    def put_latest(client_queue, item) -> None:
+        """
+        Put an item in the bounded queue of a client stream, dropping the oldest item if it is full.
+
+        Args:
+            client_queue: The queue of the client.
+            item: The item to send.
+        """
+        try:
+            client_queue.put_nowait(item)
+        except queue.Full:
+            try:
+                client_queue.get_nowait()
+            except queue.Empty:
+                pass
+            client_queue.put_nowait(item)
+
     def stt_callback(self, msg) -> None:
         """
         Callback function for STT messages.
@@ -290,6 +426,36 @@ class InterfaceNode(Node):
         self.stt_result_lock.acquire()
         self.stt_result = msg.data
         self.stt_result_lock.release()
+        for stt_queue in list(self.stt_queues.values()):
+            self.put_latest(stt_queue, (MessageType.STT_FINAL, msg.data))
+
+    def stt_partial_callback(self, msg) -> None:
+        """
+        Callback function for partial STT messages.
+
+        Forwards the text of the utterance so far to the clients that subscribed to the
+        transcription stream.
+
+        Args:
+            msg: The partial STT message.
+        """
+        for stt_queue in list(self.stt_queues.values()):
+            self.put_latest(stt_queue, (MessageType.STT_PARTIAL, msg.data))
+
+    def stt_command_callback(self, msg) -> None:
+        """
+        Callback function for voice commands recognized by the STT node.
+
+        A spoken stop halts the robot right away and aborts a running sequence, the other
+        commands are only logged.
+
+        Args:
+            msg: The command message.
+        """
+        self.get_logger().info(f"Received voice command: {msg.data}")
+        if msg.data == "stop":
+            self.sequence_stop_event.set()
+            self.send_serial_command('s')
 
     def destroy_node(self):
         """
@@ -319,17 +485,35 @@ class InterfaceNode(Node):
         """
         Initialize the subscribers.
 
-        This method initializes the subscribers for video, lidar and speech-to-text (STT) messages.
+        This method initializes the subscribers for video, lidar images, lidar scans, map, collision, speech-to-text (STT), voice command and mic audio messages.
         """
         self.video_sub = self.create_subscription(
             Image, VIDEO_TOPIC, self.video_callback, 10
         )
         self.lidar_sub = self.create_subscription(
-            Image, LIDAR_TOPIC, self.lidar_callback, 10
+            CompressedImage, LIDAR_TOPIC, self.lidar_callback, 10
+        )
+        self.lidar_scan_sub = self.create_subscription(
+            LidarData, LIDAR_SCAN_TOPIC, self.lidar_scan_callback, 10
+        )
+        self.map_sub = self.create_subscription(
+            CompressedImage, MAP_TOPIC, self.map_callback, 1
+        )
+        self.collision_sub = self.create_subscription(
+            CollisionState, COLLISION_TOPIC, self.collision_callback, 10
         )
         self.stt_sub = self.create_subscription(
             String, STT_TOPIC, self.stt_callback, 10
         )
+        self.stt_partial_sub = self.create_subscription(
+            String, STT_PARTIAL_TOPIC, self.stt_partial_callback, 10
+        )
+        self.stt_command_sub = self.create_subscription(
+            String, STT_COMMAND_TOPIC, self.stt_command_callback, 10
+        )
+        self.audio_sub = self.create_subscription(
+            AudioData, AUDIO_TOPIC, self.audio_callback, 10
+        )
 
     def init_queues(self):
         """
@@ -380,6 +564,12 @@ class InterfaceNode(Node):
 
         if hasattr(self, "server_event") and self.server_event != None:
             self.server_event.set()
+        for stop_event in list(self.lidar_data_events.values()):
+            stop_event.set()
+        for stop_event in list(self.audio_events.values()):
+            stop_event.set()
+        for stop_event in list(self.stt_events.values()):
+            stop_event.set()
         for client in self.client_list:
             client.shutdown(socket.SHUT_RDWR)
             client.close()
@@ -442,6 +632,16 @@ class InterfaceNode(Node):
             self.get_logger().error(f"Server: Error: {e}")
 
     def map_joystick_to_command(self, x, y):
+        """
+        Map a joystick position to a motor command.
+
+        Args:
+            x: The horizontal joystick position in [-1, 1].
+            y: The vertical joystick position in [-1, 1], negative is forward.
+
+        Returns:
+            str: The motor command, 'f', 'b', 'l', 'r' or 's'.
+        """
         DEAD_ZONE = 0.2
         command = 's'  # default stop
 
@@ -456,14 +656,7 @@ class InterfaceNode(Node):
         elif x > 0.5:
             command = 'r'  # Rotate right
 
-        try:
-            if self.arduino_serial and self.arduino_serial.is_open:
-                self.arduino_serial.write(command.encode())
-                self.get_logger().info(f"Sent command '{command}' to Arduino.")
-            else:
-                self.get_logger().warn("Arduino serial not available.")
-        except Exception as e:
-            self.get_logger().error(f"Failed to write to Arduino: {e}")
+        return command
 
 
 
@@ -501,6 +694,13 @@ class InterfaceNode(Node):
                 self.get_logger().info(f"Server| Connection to [{addr}] was interrupted.")
                 self.client_list.remove(client)
                 break
+        # The stream threads of the client remove their entries once they have stopped
+        for events in (self.lidar_data_events, self.audio_events, self.stt_events):
+            stop_event = events.get(client)
+            if stop_event is not None:
+                stop_event.set()
+        with self.send_locks_lock:
+            self.send_locks.pop(client, None)
 
     def handle_message(self, client, message_type, data):
         """
@@ -525,15 +725,24 @@ class InterfaceNode(Node):
             instr = struct.unpack(msg_formats.get(MessageType.MIC), data)[0]
             self.handle_mic(instr)
         elif message_type == MessageType.STT:
-            self.handle_stt(data)
+            instr = struct.unpack(msg_formats.get(MessageType.STT), data)[0]
+            self.handle_stt(client, instr)
         elif message_type == MessageType.LIDAR:
             self.handle_lidar(data)
+        elif message_type == MessageType.LIDAR_DATA:
+            instr = struct.unpack(msg_formats.get(MessageType.LIDAR_DATA), data)[0]
+            self.handle_lidar_data(client, instr)
+        elif message_type == MessageType.AUDIO:
+            instr = struct.unpack(msg_formats.get(MessageType.AUDIO), data)[0]
+            self.handle_audio(client, instr)
         elif message_type == MessageType.REQ_VIDEO_FEED:
             self.handle_req_video_feed(client)
         elif message_type == MessageType.REQ_LIDAR_FEED:
             self.handle_req_lidar_feed(client)
         elif message_type == MessageType.REQ_STT:
             self.handle_req_stt(client)
+        elif message_type == MessageType.REQ_MAP:
+            self.handle_req_map(client)
         elif message_type == MessageType.TEXT:
             self.handle_text(data)
         elif message_type == MessageType.JOYSTICK_MOVE:
@@ -593,14 +802,95 @@ class InterfaceNode(Node):
         else:
             self.get_logger().info("Unknown mic instruction:", data)
 
-    def handle_stt(self, data):
-        # Implement logic to handle STT message
-        pass
+    def handle_stt(self, client, data):
+        """
+        Handle transcription stream instructions.
+
+        Starts or stops a thread that pushes the transcriptions to the client as they
+        arrive, STT_PARTIAL messages with the text of the utterance so far and STT_FINAL
+        messages with the final text, both UTF-8.
+        Args:
+            client: The client socket.
+            data: The STT instruction.
+        """
+        if data == Instruction.ON:
+            if client in self.stt_events:
+                return
+            stop_event = threading.Event()
+            self.stt_events[client] = stop_event
+            self.stt_queues[client] = queue.Queue(maxsize=STT_QUEUE_SIZE)
+            self.get_logger().info("Server| Sending transcriptions to client.")
+            thread = threading.Thread(
+                target=self.send_stt_stream, args=(client, stop_event), name="stt_stream"
+            )
+            thread.start()
+        elif data == Instruction.OFF:
+            stop_event = self.stt_events.get(client)
+            if stop_event is not None:
+                stop_event.set()
+        else:
+            self.get_logger().info(f"Unknown STT instruction: {data}")
 
     def handle_lidar(self, data):
         # Implement logic to handle lidar message
         pass
 
+    def handle_lidar_data(self, client, data):
+        """
+        Handle raw lidar stream instructions.
+
+        Starts or stops a thread that sends every lidar scan to the client as a
+        LIDAR_DATA message, see lidar_codec for the payload format.
+        Args:
+            client: The client socket.
+            data: The lidar data instruction.
+        """
+        if data == Instruction.ON:
+            if client in self.lidar_data_events:
+                return
+            stop_event = threading.Event()
+            self.lidar_data_events[client] = stop_event
+            self.get_logger().info("Server| Sending raw lidar stream to client.")
+            thread = threading.Thread(
+                target=self.send_lidar_data_stream, args=(client, stop_event), name="lidar_data_stream"
+            )
+            thread.start()
+        elif data == Instruction.OFF:
+            stop_event = self.lidar_data_events.get(client)
+            if stop_event is not None:
+                stop_event.set()
+        else:
+            self.get_logger().info(f"Unknown lidar data instruction: {data}")
+
+    def handle_audio(self, client, data):
+        """
+        Handle audio stream instructions.
+
+        Starts or stops a thread that sends the mic audio to the client as AUDIO
+        messages, see audio_codec for the payload format. The audio comes from the
+        mic_stream topic, which the mic node publishes in capture_mode stream.
+        Args:
+            client: The client socket.
+            data: The audio instruction.
+        """
+        if data == Instruction.ON:
+            if client in self.audio_events:
+                return
+            stop_event = threading.Event()
+            self.audio_events[client] = stop_event
+            self.audio_queues[client] = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+            self.get_logger().info("Server| Sending audio stream to client.")
+            thread = threading.Thread(
+                target=self.send_audio_stream, args=(client, stop_event), name="audio_stream"
+            )
+            thread.start()
+        elif data == Instruction.OFF:
+            stop_event = self.audio_events.get(client)
+            if stop_event is not None:
+                stop_event.set()
+        else:
+            self.get_logger().info(f"Unknown audio instruction: {data}")
+
     def handle_req_video_feed(self, client):
         """
         Handle requests for video feed.
@@ -642,8 +932,22 @@ class InterfaceNode(Node):
         stt_res = stt_res.encode("utf-8")
 
         # Send STT response
-        client.sendall(struct.pack(HEADER_FORMAT, MessageType.TEXT, len(stt_res)))
-        client.sendall(stt_res)
+        self.send_encoded_frame(client, stt_res, MessageType.TEXT)
+
+    def handle_req_map(self, client):
+        """
+        Handle requests for the occupancy grid.
+
+        Send the latest occupancy grid to the client as a PNG image.
+        The payload is empty if no grid has been received yet.
+        Args:
+            client: The client socket.
+        """
+        with self.map_frame_lock:
+            map_bytes = self.map_frame if self.map_frame is not None else b""
+        self.get_logger().info(f"Server| Sending map of {len(map_bytes)} bytes to client.")
+
+        self.send_encoded_frame(client, map_bytes, MessageType.MAP_FRAME)
 
     def handle_text(self, text):
         """
@@ -676,8 +980,29 @@ class InterfaceNode(Node):
         self.send_serial_command(command)
 
 
+    def gate_command(self, command: str) -> str:
+        """
+        Veto movement commands towards an obstacle reported by the collision guard.
+
+        Args:
+            command: The motor command.
+
+        Returns:
+            str: 's' if the command would drive into an obstacle, otherwise the command.
+        """
+        if (command == 'f' and self.front_blocked) or (command == 'b' and self.back_blocked):
+            self.get_logger().warn(f"Collision guard| Vetoed command '{command}', obstacle ahead.")
+            return 's'
+        return command
+
     def send_serial_command(self, command: str):
+        """
+        Send a motor command to the Arduino, unless it was the last command sent.
+
+        Commands that would drive into an obstacle are replaced by a stop.
+        """
         with self.serial_lock:
+            command = self.gate_command(command)
             if command == self.last_sent_command:
                 return  # Skip duplicate
             try:
@@ -773,14 +1098,11 @@ class InterfaceNode(Node):
             if self.sequence_stop_event.is_set():
                 self.get_logger().info("Sequence| Stop received. Aborting sequence.")
                 self.sequence_stop_event.clear()
-                id = (100).to_bytes(2, "big")
                 payload_dict = {
                     "type": "stop",
                 }
                 payload = json.dumps(payload_dict).encode("utf-8")
-                length = len(payload).to_bytes(4, "big")
-                message = id + length + payload
-                client.sendall(message)
+                self.send_encoded_frame(client, payload, 100)
                 timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
                 self.get_logger().info(f"Stop ACK sent from ROS at [{timestamp}]")
                 return
@@ -788,14 +1110,11 @@ class InterfaceNode(Node):
             if self.sequence_pause_event.is_set():
                 self.get_logger().info("Sequence| Sequence execution paused")
                 self.sequence_pause_event.clear()
-                id = (101).to_bytes(2, "big")
                 payload_dict = {
                     "type": "pause",
                 }
                 payload = json.dumps(payload_dict).encode("utf-8")
-                length = len(payload).to_bytes(4, "big")
-                message = id + length + payload
-                client.sendall(message)
+                self.send_encoded_frame(client, payload, 101)
                 timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
                 self.get_logger().info(f"Pause ACK sent from ROS at [{timestamp}]")
                 return
@@ -864,15 +1183,12 @@ class InterfaceNode(Node):
         self.get_logger().info("Sequence| Sequence done")
 
     def ack(self, client, next):
-        id = (99).to_bytes(2, "big")
         payload_dict = {
             "type": "ack",
             "next_index": next
         }
         payload = json.dumps(payload_dict).encode("utf-8")
-        length = len(payload).to_bytes(4, "big")
-        message = id + length + payload
-        client.sendall(message)
+        self.send_encoded_frame(client, payload, 99)
         timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         self.get_logger().info(f"Acknowledgement sent from ROS at [{timestamp}] with next index: END")
 
@@ -907,20 +1223,98 @@ class InterfaceNode(Node):
         Args:
             conn: The client socket.
         """
-        if not isinstance(self.lidar_frame, np.ndarray):
+        if self.lidar_frame is None:
             self.get_logger().info("Server| No lidar feed available.")
 
         while True:  # Lidar streaming loop
             time.sleep(1 / LIDAR_STREAM_FREQUENCY)
             self.lidar_frame_lock.acquire()
-            frame = self.lidar_frame
+            frame_bytes = self.lidar_frame
             self.lidar_frame_lock.release()
+            if frame_bytes is None:
+                continue
             try:
-                self.send_frame(client, frame, MessageType.LIDAR_FRAME)
+                self.send_encoded_frame(client, frame_bytes, MessageType.LIDAR_FRAME)
             except ConnectionError:
                 self.get_logger().info(f"Server| LiDAR feed connection was interrupted.")
                 break
 
+    def send_lidar_data_stream(self, client, stop_event):
+        """
+        Send every new lidar scan to a client as a compact binary polar array.
+
+        The scans are quantized, delta encoded against the previous scan of this client
+        and compressed, see lidar_codec for the format.
+        Args:
+            client: The client socket.
+            stop_event: Event that stops the stream when set.
+        """
+        encoder = LidarScanEncoder(resolution=LIDAR_DATA_RESOLUTION, compress=LIDAR_DATA_COMPRESSION)
+        sent_count = 0
+        try:
+            while not stop_event.is_set():
+                with self.lidar_scan_condition:
+                    self.lidar_scan_condition.wait_for(
+                        lambda: self.lidar_scan_count != sent_count or stop_event.is_set(), timeout=1.0
+                    )
+                    if self.lidar_scan_count == sent_count:
+                        continue
+                    scan = self.lidar_scan
+                    sent_count = self.lidar_scan_count
+                self.send_encoded_frame(client, encoder.encode(scan), MessageType.LIDAR_DATA)
+        except (ConnectionError, OSError):
+            self.get_logger().info("Server| Raw lidar stream connection was interrupted.")
+        finally:
+            self.lidar_data_events.pop(client, None)
+
+    def send_audio_stream(self, client, stop_event):
+        """
+        Send the mic audio to a client in small frames.
+
+        Every frame carries a sequence number and the offset of its first sample, so the
+        client can reorder late frames and fill gaps, see audio_codec for the format.
+        Args:
+            client: The client socket.
+            stop_event: Event that stops the stream when set.
+        """
+        encoder = AudioStreamEncoder(frame_duration=AUDIO_FRAME_DURATION, codec=AUDIO_CODEC)
+        audio_queue = self.audio_queues[client]
+        try:
+            while not stop_event.is_set():
+                try:
+                    offset, samples, sample_rate, channels = audio_queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                for payload in encoder.encode(offset, samples, sample_rate, channels):
+                    self.send_encoded_frame(client, payload, MessageType.AUDIO)
+        except (ConnectionError, OSError):
+            self.get_logger().info("Server| Audio stream connection was interrupted.")
+        finally:
+            self.audio_queues.pop(client, None)
+            self.audio_events.pop(client, None)
+
+    def send_stt_stream(self, client, stop_event):
+        """
+        Push the partial and final transcriptions to a client.
+
+        Args:
+            client: The client socket.
+            stop_event: Event that stops the stream when set.
+        """
+        stt_queue = self.stt_queues[client]
+        try:
+            while not stop_event.is_set():
+                try:
+                    message_type, text = stt_queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                self.send_encoded_frame(client, text.encode("utf-8"), message_type)
+        except (ConnectionError, OSError):
+            self.get_logger().info("Server| Transcription stream connection was interrupted.")
+        finally:
+            self.stt_queues.pop(client, None)
+            self.stt_events.pop(client, None)
+
     def send_frame(self, client, frame, frame_type):
         """
         Send a video frame to a client.
@@ -932,12 +1326,25 @@ class InterfaceNode(Node):
         """
 
         frame_bytes = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, VIDEO_COMPRESSION_QUALITY])[1].tobytes()  # Encode as JPEG
-        # Send video frame header
-        client.sendall(
-            struct.pack(HEADER_FORMAT, frame_type, len(frame_bytes))
-        )
-        # Send video frame data
-        client.sendall(frame_bytes)
+        self.send_encoded_frame(client, frame_bytes, frame_type)
+
+    def send_encoded_frame(self, client, frame_bytes, frame_type):
+        """
+        Send an already encoded frame to a client.
+
+        Every message to a client goes through here. The header and the payload are sent
+        with one sendall while holding the send lock of the client, so the video, lidar,
+        audio, transcription and sequence threads cannot interleave their messages.
+        Args:
+            client: The client socket.
+            frame_bytes: The encoded frame.
+            frame_type: The message type of the frame.
+        """
+        message = struct.pack(HEADER_FORMAT, frame_type, len(frame_bytes)) + bytes(frame_bytes)
+        with self.send_locks_lock:
+            send_lock = self.send_locks.setdefault(client, threading.Lock())
+        with send_lock:
+            client.sendall(message)
 
 
 def main(args=None):
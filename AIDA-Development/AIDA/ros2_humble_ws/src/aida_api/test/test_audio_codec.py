@@ -0,0 +1,88 @@
+from aida_api.audio_codec import (
+    AUDIO_HEADER_FORMAT, AUDIO_HEADER_SIZE, CODEC_MULAW, CODEC_PCM16,
+    MULAW_DECODE_TABLE, MULAW_ENCODE_TABLE, AudioStreamDecoder, AudioStreamEncoder
+)
+import numpy as np
+import struct
+
+
+def tone(count, offset=0, sample_rate=16000):
+    t = (np.arange(count) + offset) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+
+
+def test_mulaw_tables_match_g711():
+    # Reference values of the G.711 mu-law code
+    assert MULAW_ENCODE_TABLE[0] == 0xFF
+    assert MULAW_ENCODE_TABLE[np.uint16(32767)] == 0x80
+    assert MULAW_ENCODE_TABLE[np.int16(-32768).view(np.uint16)] == 0x00
+    assert MULAW_DECODE_TABLE[0xFF] == 0
+    assert MULAW_DECODE_TABLE[0x80] == 32124
+    assert MULAW_DECODE_TABLE[0x00] == -32124
+
+
+def test_mulaw_round_trip_error():
+    samples = np.arange(-32768, 32768, dtype=np.int32).astype(np.int16)
+    decoded = MULAW_DECODE_TABLE[MULAW_ENCODE_TABLE[samples.view(np.uint16)]].astype(np.int32)
+
+    # mu-law keeps the error relative to the amplitude
+    error = np.abs(decoded - samples)
+    assert np.all(error <= np.maximum(np.abs(samples.astype(np.int32)) // 16, 8) + 1)
+
+
+def test_frames_are_split_and_carried_over():
+    encoder = AudioStreamEncoder(frame_duration=0.02, codec=CODEC_PCM16)
+
+    first = encoder.encode(0, tone(500), 16000)
+    second = encoder.encode(500, tone(500, 500), 16000)
+
+    # 320 samples per frame, 1000 samples make three frames and 40 samples wait
+    headers = [struct.unpack_from(AUDIO_HEADER_FORMAT, p) for p in first + second]
+    assert [h[2] for h in headers] == [0, 1, 2]
+    assert [h[3] for h in headers] == [0, 320, 640]
+    assert all(h[5] == 320 for h in headers)
+    assert len(first[0]) == AUDIO_HEADER_SIZE + 2 * 320
+
+
+def test_gap_flushes_short_frame():
+    encoder = AudioStreamEncoder(codec=CODEC_PCM16)
+    encoder.encode(0, tone(100), 16000)
+
+    payloads = encoder.encode(16000, tone(320, 16000), 16000)
+
+    headers = [struct.unpack_from(AUDIO_HEADER_FORMAT, p) for p in payloads]
+    assert [(h[3], h[5]) for h in headers] == [(0, 100), (16000, 320)]
+
+
+def test_round_trip_stereo_mulaw():
+    encoder = AudioStreamEncoder(codec=CODEC_MULAW)
+    decoder = AudioStreamDecoder()
+    samples = np.stack((tone(640), tone(640, 7)), axis=1)
+
+    payloads = encoder.encode(320, samples.reshape(-1), 16000, channels=2)
+    offset, sample_rate, decoded = decoder.decode(payloads[1])
+
+    assert offset == 640 and sample_rate == 16000
+    assert decoded.shape == (320, 2)
+    assert np.max(np.abs(decoded.astype(np.int32) - samples[320:])) < 1100
+
+
+def test_float_input_is_converted():
+    encoder = AudioStreamEncoder(codec=CODEC_PCM16)
+    decoder = AudioStreamDecoder()
+
+    payload = encoder.encode(0, np.full(320, 0.5, dtype=np.float32), 16000)[0]
+
+    assert np.all(decoder.decode(payload)[2] == 16384)
+
+
+def test_decoder_counts_lost_frames():
+    encoder = AudioStreamEncoder(codec=CODEC_PCM16)
+    decoder = AudioStreamDecoder()
+    payloads = encoder.encode(0, tone(320 * 5), 16000)
+
+    for payload in (payloads[0], payloads[3], payloads[2], payloads[4]):
+        decoder.decode(payload)
+
+    assert decoder.lost == 2
+    assert decoder.sequence == 4
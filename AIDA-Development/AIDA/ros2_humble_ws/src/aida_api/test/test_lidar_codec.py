@@ -0,0 +1,70 @@
+from aida_api.lidar_codec import (
+    FLAG_COMPRESSED, FLAG_KEYFRAME, LIDAR_DATA_HEADER_FORMAT,
+    LidarScanDecoder, LidarScanEncoder
+)
+import numpy as np
+import pytest
+import struct
+
+
+def scan(seed):
+    rng = np.random.default_rng(seed)
+    distances = rng.integers(200, 8000, 360)
+    distances[rng.random(360) < 0.1] = 0
+    return distances
+
+
+def test_first_frame_is_keyframe():
+    encoder = LidarScanEncoder()
+    payload = encoder.encode(scan(0))
+    flags, sequence, count, resolution = struct.unpack_from(LIDAR_DATA_HEADER_FORMAT, payload)
+
+    assert flags & FLAG_KEYFRAME
+    assert flags & FLAG_COMPRESSED
+    assert sequence == 0
+    assert count == 360
+    assert resolution == 10
+
+
+def test_round_trip_with_deltas():
+    encoder = LidarScanEncoder(resolution=10, keyframe_interval=5)
+    decoder = LidarScanDecoder()
+    previous = scan(0)
+
+    for seed in range(12):
+        distances = previous.copy()
+        # Consecutive scans only differ in a few points
+        distances[seed * 10:seed * 10 + 5] = scan(seed + 100)[:5]
+        decoded = decoder.decode(encoder.encode(distances))
+        assert np.all(np.abs(decoded.astype(np.int64) - distances) <= 5)
+        previous = distances
+
+
+def test_delta_frames_are_small():
+    encoder = LidarScanEncoder()
+    distances = scan(1)
+    encoder.encode(distances)
+    distances[10] += 100
+
+    payload = encoder.encode(distances)
+
+    assert not struct.unpack_from(LIDAR_DATA_HEADER_FORMAT, payload)[0] & FLAG_KEYFRAME
+    assert len(payload) < 100
+
+
+def test_uncompressed_payload():
+    encoder = LidarScanEncoder(resolution=1, compress=False)
+    distances = scan(2)
+    payload = encoder.encode(distances)
+
+    assert len(payload) == struct.calcsize(LIDAR_DATA_HEADER_FORMAT) + 2 * 360
+    assert np.array_equal(LidarScanDecoder().decode(payload), distances)
+
+
+def test_decoder_rejects_missing_keyframe():
+    encoder = LidarScanEncoder()
+    encoder.encode(scan(3))
+    delta = encoder.encode(scan(4))
+
+    with pytest.raises(ValueError):
+        LidarScanDecoder().decode(delta)
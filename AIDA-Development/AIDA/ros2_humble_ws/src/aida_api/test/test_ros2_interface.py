@@ -1,7 +1,13 @@
 import pytest
-from aida_api.ros2_interface import InterfaceNode
-from sensor_msgs.msg import Image
+from aida_api.ros2_interface import InterfaceNode, MessageType
+from sensor_msgs.msg import CompressedImage, Image
 from std_msgs.msg import String
+from lidar_data.msg import LidarData
+from audio_data.msg import AudioData
+import numpy as np
+import queue
+import struct
+import threading
 import rclpy
 import cv2
 from cv_bridge import CvBridge
@@ -45,6 +51,49 @@ def test_video_callback(interface_node):
     
 
 
+def test_lidar_callback(interface_node):
+    # Create a mock CompressedImage message
+    msg = CompressedImage()
+    msg.format = "jpeg"
+    msg.data = b"\xff\xd8\xff\xe0"
+    interface_node.lidar_callback(msg)
+
+    # Assert that the encoded image is forwarded as it is
+    assert interface_node.lidar_frame == b"\xff\xd8\xff\xe0"
+
+
+def test_lidar_scan_callback(interface_node):
+    # Create a mock LidarData message
+    msg = LidarData()
+    msg.data = [1000] * 360
+    msg.length = 360
+    interface_node.lidar_scan_callback(msg)
+
+    # Assert that the scan is stored for the raw lidar streams
+    assert interface_node.lidar_scan_count == 1
+    assert len(interface_node.lidar_scan) == 360
+
+
+def test_audio_callback(interface_node):
+    # Create a mock AudioData message
+    msg = AudioData()
+    msg.sample_format = AudioData.FORMAT_INT16
+    msg.data = np.arange(1600, dtype="<i2").tobytes()
+    msg.sample_rate = 16000
+    msg.channels = 1
+    msg.samples = 1600
+    msg.sample_offset = 3200
+    interface_node.audio_queues["client"] = queue.Queue(maxsize=1)
+    interface_node.audio_callback(msg)
+    interface_node.audio_callback(msg)
+
+    # Assert that a full client queue keeps only the newest chunk
+    offset, samples, sample_rate, channels = interface_node.audio_queues["client"].get()
+    assert interface_node.audio_queues["client"].empty()
+    assert offset == 3200 and sample_rate == 16000 and channels == 1
+    assert np.array_equal(samples, np.arange(1600))
+
+
 def test_stt_callback(interface_node):
     # Create a mock String message
     msg = String()
@@ -57,6 +106,75 @@ def test_stt_callback(interface_node):
     assert interface_node.stt_queue.qsize() == 1
     assert interface_node.stt_queue.get() == msg.data
 
+def test_stt_partial_callback(interface_node):
+    # Create a mock String message
+    msg = String()
+    msg.data = "Hello, Wor"
+    interface_node.stt_queues["client"] = queue.Queue()
+    interface_node.stt_partial_callback(msg)
+
+    # Assert that the partial result is forwarded to the subscribed client
+    assert interface_node.stt_queues["client"].get_nowait() == (MessageType.STT_PARTIAL, "Hello, Wor")
+
+def test_stt_command_callback(interface_node):
+    # Create a mock String message
+    msg = String()
+    msg.data = "stop"
+    interface_node.sequence_stop_event.clear()
+    interface_node.stt_command_callback(msg)
+
+    # Assert that a spoken stop aborts the running sequence
+    assert interface_node.sequence_stop_event.is_set()
+
+def test_send_encoded_frame(interface_node):
+    class Client:
+        def __init__(self):
+            self.sent = []
+
+        def sendall(self, data):
+            self.sent.append(data)
+
+    client = Client()
+    threads = [threading.Thread(target=interface_node.send_encoded_frame,
+                                args=(client, bytes([index]) * 100, MessageType.AUDIO))
+               for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert that every message goes out whole, header and payload in one call
+    assert len(client.sent) == 8
+    for message in client.sent:
+        assert struct.unpack("!HI", message[:6]) == (MessageType.AUDIO, 100)
+        assert message[6:] == message[6:7] * 100
+
+def test_map_callback(interface_node):
+    # Create a mock CompressedImage message
+    msg = CompressedImage()
+    msg.format = "mono8; png compressed"
+    msg.data = b"\x89PNG"
+    interface_node.map_callback(msg)
+
+    # Assert that the encoded map is kept as it is
+    assert interface_node.map_frame == b"\x89PNG"
+
+def test_map_joystick_to_command(interface_node):
+    assert interface_node.map_joystick_to_command(0.0, 0.0) == 's'
+    assert interface_node.map_joystick_to_command(0.0, -1.0) == 'f'
+    assert interface_node.map_joystick_to_command(0.0, 1.0) == 'b'
+    assert interface_node.map_joystick_to_command(-1.0, 0.0) == 'l'
+    assert interface_node.map_joystick_to_command(1.0, 0.0) == 'r'
+
+def test_gate_command(interface_node):
+    interface_node.front_blocked = True
+    interface_node.back_blocked = False
+
+    # Driving into the obstacle is vetoed, everything else passes
+    assert interface_node.gate_command('f') == 's'
+    assert interface_node.gate_command('b') == 'b'
+    assert interface_node.gate_command('l') == 'l'
+
 # def test_destroy_node(interface_node):
 #     pass
 
@@ -73,6 +191,11 @@ def test_init_subs(interface_node):
     interface_node.init_subs()
     assert interface_node.video_sub is not None
     assert interface_node.stt_sub is not None
+    assert interface_node.map_sub is not None
+    assert interface_node.collision_sub is not None
+    assert interface_node.lidar_scan_sub is not None
+    assert interface_node.audio_sub is not None
+    assert interface_node.stt_command_sub is not None
     
 
 def test_init_queues(interface_node):
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import sys
+import urllib.request
+
+from aida_models.registry import LOCK_NAME, MANIFEST_PATH, ModelError, ModelRegistry, sha256_file
+
+# URL parts that follow the latest upstream upload, a checksum pinned for them breaks on the next one
+MOVING_REVISIONS = ("/resolve/main/", "/latest/")
+
+
+def download(url, path):
+    """
+    Downloads a file, through a temporary file so an interrupted download leaves nothing
+
+    Args:
+        url: URL of the file
+        path: Path to store it at
+
+    Returns:
+        None
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".part")
+    with urllib.request.urlopen(url) as response, open(temporary, "wb") as file:
+        while True:
+            chunk = response.read(1 << 20)
+            if not chunk:
+                break
+            file.write(chunk)
+    os.replace(temporary, path)
+
+
+def fetch(registry, names):
+    """
+    Downloads the missing and corrupt files of the assets and records their checksums
+
+    A file is checked against the checksum pinned in the manifest, or else against the one
+    recorded in the lock file, and downloaded again when it does not match. Files with no
+    known checksum yet are recorded in the lock file so later runs can verify them.
+
+    Args:
+        registry: ModelRegistry of the model directory
+        names: Names of the assets to fetch
+
+    Returns:
+        Dictionary of file to SHA-256 of the fetched files
+    """
+    lock_path = registry.directory / LOCK_NAME
+    lock = registry._lock()
+    fetched = {}
+    for name in names:
+        if name not in registry.manifest:
+            raise ModelError(f"Unknown model {name}, expected one of {registry.names()}")
+        for relative, info in registry.manifest[name]["files"].items():
+            path = registry.directory / relative
+            expected = info.get("sha256") or lock.get(relative, "")
+            if path.is_file() and expected and sha256_file(path) != expected:
+                print(f"Checksum mismatch for {path}, downloading it again")
+                path.unlink()
+            if not path.is_file():
+                print(f"Downloading {info['url']}")
+                download(info["url"], path)
+            actual = sha256_file(path)
+            if expected and actual != expected:
+                hint = "" if info.get("sha256") else (
+                    f", remove it from {lock_path} if the upstream file changed")
+                raise ModelError(f"Checksum mismatch for {path}: expected {expected}, "
+                                 f"got {actual}{hint}")
+            if not info.get("sha256"):
+                print(f"Not pinned in the manifest: {relative} {actual}")
+            lock[relative] = actual
+            fetched[relative] = actual
+    registry.directory.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as file:
+        json.dump(lock, file, indent=2, sort_keys=True)
+    return fetched
+
+
+def is_moving_url(url):
+    """
+    Tells whether a URL follows the latest upstream upload instead of a fixed revision
+
+    Args:
+        url: URL of a file in the manifest
+
+    Returns:
+        True for a branch or latest URL, False for a commit hash or version
+    """
+    return any(part in url for part in MOVING_REVISIONS)
+
+
+def pin(manifest_path, checksums):
+    """
+    Writes checksums into a manifest, for the files it does not pin yet
+
+    Files whose URL does not name a fixed revision are skipped, their checksum would be
+    refused once upstream uploads a new version.
+
+    Args:
+        manifest_path: Path of the manifest
+        checksums: Dictionary of file to SHA-256
+
+    Returns:
+        Number of files pinned
+    """
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    pinned = 0
+    for entry in manifest.values():
+        for relative, info in entry["files"].items():
+            if not info.get("sha256") and relative in checksums:
+                if is_moving_url(info["url"]):
+                    print(f"Not pinning {relative}, point its URL at a fixed revision first: {info['url']}")
+                    continue
+                info["sha256"] = checksums[relative]
+                pinned += 1
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+        file.write("\n")
+    return pinned
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Downloads the model assets of AIDA")
+    parser.add_argument("names", nargs="*", help="Assets to fetch, all if none are given")
+    parser.add_argument("--dir", help="Model directory, the installed one by default")
+    parser.add_argument("--pin", metavar="MANIFEST", nargs="?", const=str(MANIFEST_PATH),
+                        help="Write the checksums of unpinned files into a manifest, "
+                             "aida_models/manifest.json of the sources to commit them")
+    options = parser.parse_args(args)
+
+    registry = ModelRegistry(options.dir)
+    try:
+        fetched = fetch(registry, options.names or registry.names())
+        if options.pin:
+            print(f"Pinned {pin(options.pin, fetched)} files in {options.pin}")
+    except (ModelError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Models stored in {registry.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+
+# Assets the nodes use, with where to fetch them from and their pinned checksums
+MANIFEST_PATH = Path(__file__).with_name("manifest.json")
+# Checksums recorded by fetch_models for files the manifest does not pin yet
+LOCK_NAME = "models.lock.json"
+# Overrides the model directory, e.g. for a cache outside the install space
+ENV_MODEL_DIR = "AIDA_MODEL_DIR"
+
+
+class ModelError(RuntimeError):
+    """
+    Raised when a model asset is unknown, missing or does not match its checksum
+    """
+
+
+def model_dir():
+    """
+    Finds the directory the model assets are stored in
+
+    In order: the AIDA_MODEL_DIR environment variable, the models directory in the share
+    directory of the installed aida_models package, then the models directory next to the
+    package sources.
+
+    Args:
+        None
+
+    Returns:
+        Path of the directory, it may not exist
+    """
+    if os.environ.get(ENV_MODEL_DIR):
+        return Path(os.environ[ENV_MODEL_DIR])
+    try:
+        from ament_index_python.packages import get_package_share_directory
+        return Path(get_package_share_directory("aida_models")) / "models"
+    except (ImportError, LookupError):
+        return Path(__file__).resolve().parent.parent / "models"
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Reads a manifest
+
+    Args:
+        path: Path of the manifest
+
+    Returns:
+        Dictionary of asset name to {"path": ..., "files": {file: {"url": ..., "sha256": ...}}}
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+def sha256_file(path):
+    """
+    Computes the SHA-256 of a file, memory mapped so large models are not read into memory
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        The hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return digest.hexdigest()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            digest.update(mapped)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Resolves model assets to files in the model directory.
+
+    Nothing is downloaded at run time: the assets are fetched once at install time by
+    fetch_models, and a node that asks for a missing or corrupt asset gets a ModelError
+    telling what is wrong, instead of a download attempt or a crash deep in the library.
+
+    Files are checked against the SHA-256 pinned in the manifest, or, while the manifest
+    does not pin one, against the checksum fetch_models recorded in the lock file of the
+    model directory. A file is only hashed again when its size or modification time
+    changed since it was verified.
+
+    Attributes:
+        directory: Path of the model directory
+        manifest: Dictionary of the assets
+
+    Methods:
+        __init__ : Initializes the registry
+        names : Names of the known assets
+        resolve : Path of a verified asset
+        verify_file : Checks one file against its checksum
+    """
+
+    def __init__(self, directory=None, manifest=None):
+        """
+        Initializes the ModelRegistry
+
+        Args:
+            directory: Model directory, None uses model_dir()
+            manifest: Manifest dictionary, None loads the installed manifest
+
+        Returns:
+            None
+        """
+        self.directory = Path(directory) if directory is not None else model_dir()
+        self.manifest = manifest if manifest is not None else load_manifest()
+        self.verified = set()
+
+    def names(self):
+        """
+        Names of the known assets
+
+        Args:
+            None
+
+        Returns:
+            Sorted list of names
+        """
+        return sorted(self.manifest)
+
+    def _lock(self):
+        """
+        Reads the lock file of the model directory
+
+        Args:
+            None
+
+        Returns:
+            Dictionary of file to SHA-256, empty without a lock file
+        """
+        try:
+            with open(self.directory / LOCK_NAME) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def verify_file(self, relative, expected=""):
+        """
+        Checks one file against its checksum
+
+        Args:
+            relative: Path of the file relative to the model directory
+            expected: Pinned SHA-256, empty looks it up in the lock file
+
+        Returns:
+            None
+
+        Raises:
+            ModelError when the file is missing, has no known checksum or does not match
+        """
+        path = self.directory / relative
+        if not path.is_file():
+            raise ModelError(f"Model file {path} is missing, run fetch_models to download it "
+                             f"or set {ENV_MODEL_DIR} to the directory holding the models")
+        status = path.stat()
+        key = (path, status.st_size, status.st_mtime_ns)
+        if key in self.verified:
+            return
+        expected = expected or self._lock().get(relative, "")
+        if not expected:
+            raise ModelError(f"No checksum known for {path}, run fetch_models to record it")
+        actual = sha256_file(path)
+        if actual != expected:
+            raise ModelError(f"Checksum mismatch for {path}: expected {expected}, got "
+                             f"{actual}. Run fetch_models to download it again")
+        self.verified.add(key)
+
+    def resolve(self, name, verify=True):
+        """
+        Path of a verified asset
+
+        Args:
+            name: Name of the asset in the manifest
+            verify: Whether to check the checksums of its files
+
+        Returns:
+            Path of the asset, a file or a directory
+
+        Raises:
+            ModelError when the asset is unknown, missing or corrupt
+        """
+        if name not in self.manifest:
+            raise ModelError(f"Unknown model {name}, expected one of {self.names()}")
+        entry = self.manifest[name]
+        for relative, info in entry["files"].items():
+            if verify:
+                self.verify_file(relative, info.get("sha256", ""))
+            elif not (self.directory / relative).is_file():
+                raise ModelError(f"Model file {self.directory / relative} is missing, run "
+                                 "fetch_models to download it")
+        return self.directory / entry["path"]
+
+
+# Registries of resolve_model per model directory, so every file is hashed once per process
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def resolve_model(name, verify=True):
+    """
+    Path of a verified asset in the default model directory
+
+    The registry is kept between calls, so a model that is resolved again (a node start
+    after a model switch, another model of the pool) is not hashed again.
+
+    Args:
+        name: Name of the asset in the manifest
+        verify: Whether to check the checksums of its files
+
+    Returns:
+        Path of the asset
+    """
+    directory = model_dir()
+    with _registries_lock:
+        registry = _registries.get(directory)
+        if registry is None:
+            registry = _registries[directory] = ModelRegistry(directory)
+    return registry.resolve(name, verify)
@@ -0,0 +1,27 @@
+from setuptools import find_packages, setup
+
+package_name = 'aida_models'
+
+setup(
+    name=package_name,
+    version='0.0.0',
+    packages=find_packages(exclude=['test']),
+    package_data={package_name: ['manifest.json']},
+    data_files=[
+        ('share/ament_index/resource_index/packages',
+            ['resource/' + package_name]),
+        ('share/' + package_name, ['package.xml']),
+    ],
+    install_requires=['setuptools'],
+    zip_safe=True,
+    maintainer='albin',
+    maintainer_email='18600349+thulavall@users.noreply.github.com',
+    description='Registry of the model assets (Whisper, MediaPipe) used by the AIDA nodes',
+    license='TODO: License declaration',
+    tests_require=['pytest'],
+    entry_points={
+        'console_scripts': [
+            'fetch_models = aida_models.fetch_models:main',
+        ],
+    },
+)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from aida_models.fetch_models import fetch, pin
+from aida_models.registry import LOCK_NAME, ModelError, ModelRegistry
+import pytest
+
+
+def manifest(source, sha256=""):
+    return {"task": {"path": "mediapipe/task.task",
+                     "files": {"mediapipe/task.task": {"url": source.as_uri(), "sha256": sha256}}}}
+
+
+def test_corrupt_file_is_downloaded_again(tmp_path):
+    """
+    Tests that a file that no longer matches its lock entry is replaced, not accepted.
+    """
+    source = tmp_path / "source.task"
+    source.write_bytes(b"task")
+    registry = ModelRegistry(tmp_path / "models", manifest(source))
+    fetch(registry, ["task"])
+    path = tmp_path / "models/mediapipe/task.task"
+    path.write_bytes(b"corrupt")
+
+    fetch(registry, ["task"])
+
+    assert path.read_bytes() == b"task"
+    lock = json.loads((tmp_path / "models" / LOCK_NAME).read_text())
+    assert lock["mediapipe/task.task"] == hashlib.sha256(b"task").hexdigest()
+
+
+def test_pinned_mismatch_fails(tmp_path):
+    """
+    Tests that a download that does not match the pinned checksum is refused.
+    """
+    source = tmp_path / "source.task"
+    source.write_bytes(b"other")
+    registry = ModelRegistry(tmp_path / "models", manifest(source, hashlib.sha256(b"task").hexdigest()))
+
+    with pytest.raises(ModelError, match="Checksum mismatch"):
+        fetch(registry, ["task"])
+
+
+def test_pin_writes_missing_checksums(tmp_path):
+    """
+    Tests that pin only fills in the checksums the manifest does not have yet.
+    """
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({
+        "a": {"path": "a", "files": {"a": {"url": "", "sha256": ""}}},
+        "b": {"path": "b", "files": {"b": {"url": "", "sha256": "kept"}}},
+    }))
+
+    assert pin(path, {"a": "new", "b": "new"}) == 1
+    written = json.loads(path.read_text())
+    assert written["a"]["files"]["a"]["sha256"] == "new"
+    assert written["b"]["files"]["b"]["sha256"] == "kept"
+
+
+def test_pin_skips_moving_urls(tmp_path):
+    """
+    Tests that pin leaves the files of branch and latest URLs unpinned.
+    """
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({
+        "a": {"path": "a", "files": {"a": {"url": "https://huggingface.co/x/resolve/main/a", "sha256": ""}}},
+        "b": {"path": "b", "files": {"b": {"url": "https://huggingface.co/x/resolve/0123abc/b", "sha256": ""}}},
+    }))
+
+    assert pin(path, {"a": "new", "b": "new"}) == 1
+    written = json.loads(path.read_text())
+    assert written["a"]["files"]["a"]["sha256"] == ""
+    assert written["b"]["files"]["b"]["sha256"] == "new"
@@ -0,0 +1,95 @@
+import hashlib
+import json
+
+from aida_models.registry import LOCK_NAME, ModelError, ModelRegistry, model_dir, sha256_file
+import pytest
+
+MANIFEST = {
+    "whisper-test": {
+        "path": "whisper/test",
+        "files": {
+            "whisper/test/model.bin": {"url": "", "sha256": hashlib.sha256(b"weights").hexdigest()},
+        },
+    },
+    "task": {
+        "path": "mediapipe/task.task",
+        "files": {"mediapipe/task.task": {"url": "", "sha256": ""}},
+    },
+}
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def test_resolve_verified_asset(tmp_path):
+    """
+    Tests that an asset with a matching pinned checksum resolves to its path.
+    """
+    write(tmp_path / "whisper/test/model.bin", b"weights")
+    registry = ModelRegistry(tmp_path, MANIFEST)
+
+    assert registry.resolve("whisper-test") == tmp_path / "whisper/test"
+
+
+def test_missing_and_unknown_assets_fail(tmp_path):
+    """
+    Tests that a missing file and an unknown name raise a ModelError.
+    """
+    registry = ModelRegistry(tmp_path, MANIFEST)
+
+    with pytest.raises(ModelError, match="missing"):
+        registry.resolve("whisper-test")
+    with pytest.raises(ModelError, match="Unknown model"):
+        registry.resolve("whisper-huge")
+
+
+def test_checksum_mismatch_fails(tmp_path):
+    """
+    Tests that a corrupt file is rejected, and accepted without verification.
+    """
+    write(tmp_path / "whisper/test/model.bin", b"truncated")
+    registry = ModelRegistry(tmp_path, MANIFEST)
+
+    with pytest.raises(ModelError, match="Checksum mismatch"):
+        registry.resolve("whisper-test")
+    assert registry.resolve("whisper-test", verify=False) == tmp_path / "whisper/test"
+
+
+def test_unpinned_asset_uses_lock(tmp_path):
+    """
+    Tests that a file without a pinned checksum is checked against the lock file.
+    """
+    write(tmp_path / "mediapipe/task.task", b"task")
+    registry = ModelRegistry(tmp_path, MANIFEST)
+    with pytest.raises(ModelError, match="No checksum"):
+        registry.resolve("task")
+
+    (tmp_path / LOCK_NAME).write_text(json.dumps({"mediapipe/task.task": sha256_file(
+        tmp_path / "mediapipe/task.task")}))
+    assert registry.resolve("task") == tmp_path / "mediapipe/task.task"
+
+
+def test_model_dir_from_environment(tmp_path, monkeypatch):
+    """
+    Tests that AIDA_MODEL_DIR overrides the model directory, and empty files hash.
+    """
+    monkeypatch.setenv("AIDA_MODEL_DIR", str(tmp_path))
+    write(tmp_path / "empty", b"")
+
+    assert model_dir() == tmp_path
+    assert sha256_file(tmp_path / "empty") == hashlib.sha256(b"").hexdigest()
+
+
+def test_replaced_file_is_verified_again(tmp_path):
+    """
+    Tests that a verified file is hashed again once it changed on disk.
+    """
+    write(tmp_path / "whisper/test/model.bin", b"weights")
+    registry = ModelRegistry(tmp_path, MANIFEST)
+    registry.resolve("whisper-test")
+
+    write(tmp_path / "whisper/test/model.bin", b"corrupted")
+    with pytest.raises(ModelError, match="Checksum mismatch"):
+        registry.resolve("whisper-test")
@@ -9,6 +9,12 @@ from rclpy.node import Node
 from audio_data.msg import AudioData 
 from aida_interfaces.srv import SetState
 
+from audio.pcm import to_float32, to_int16
+from audio.resampler import StreamingResampler, resample
+from audio.ring_buffer import AudioRingBuffer
+from audio.shared_ring import SharedAudioRing
+from audio.voice_activity import SpeechSegmenter, VoiceActivityDetector
+
 
 class AudioTransmitterNode(Node):
     """
@@ -17,6 +23,32 @@ class AudioTransmitterNode(Node):
     This node initializes a publisher to publish audio data and captures audio from the microphone.
     It provides methods to start and stop the capture and publisher workers.
 
+    Two capture modes are supported (parameter capture_mode):
+        window: records blocking windows of duration seconds, one message per window
+        stream: an InputStream callback fills a ring buffer, and chunks of chunk_duration
+            seconds are published as they fill, with continuous sample offsets
+
+    With voice activity detection (parameter vad), windows without speech are not published,
+    and a stream is published as mono speech segments instead of chunks. A segment starts
+    vad_pre_roll seconds before the detected onset, taken from the ring buffer. In stream
+    mode every chunk is also published on stream_topic (mic_stream, empty disables it),
+    with or without vad, for listeners that want the live sound rather than speech.
+
+    Audio is captured and published as int16 by default (parameter sample_format), which is
+    half the size of float32.
+
+    The device is opened at its native rate (parameter capture_rate, 0 asks the device for its
+    default rate), since many USB mics only support 44.1 or 48 kHz and a forced rate is either
+    rejected or converted by the driver at unknown quality. The audio is resampled to
+    sample_rate with a StreamingResampler before it is published, so voice activity detection
+    and the messages use sample_rate.
+
+    Besides the published messages, every captured block is written to a shared memory ring
+    (parameter shared_memory_name, empty disables it) at the capture rate. Local consumers
+    attach to it with SharedAudioRing.attach, read the latest audio directly, without DDS
+    serialization, and resample it to the rate they need with their own StreamingResampler.
+    The messages are still published, so consumers on other hosts keep working.
+
     Attributes: 
 
     Methods: 
@@ -24,8 +56,15 @@ class AudioTransmitterNode(Node):
         destroy_node : Destroys the ros node when finished
         initialize_publisher : Initializes the publisher, called in init
         initialize_capture_queue : Initializes the capture queue for use when saving mic data
+        initialize_capture_rate : Determines the rate the device is opened at
+        initialize_shared_ring : Creates the shared memory ring for local consumers
         stop_workers : Stops the publisher and capture queue
         record_audio : records the audio from mic
+        record_window : records the audio from mic in blocking windows
+        stream_audio : records the audio from mic as a continuous stream of chunks
+        _audio_callback : Writes the frames of the InputStream to the ring buffer
+        _create_detector : Creates the voice activity detector from the parameters
+        _mono_history : Returns earlier resampled audio as mono
         _to_msg : Converts the nparray to an audio message to be published to topic
         publish_audio : Publishes the audio message to the topic
     """
@@ -39,14 +78,30 @@ class AudioTransmitterNode(Node):
         super().__init__('ros2_mic_node', namespace='mic')
 
         self.declare_parameter("audio_topic", "mic_audio")
+        self.declare_parameter("stream_topic", "mic_stream")
         self.declare_parameter("sample_rate", 16000)
+        self.declare_parameter("capture_rate", 0)
         self.declare_parameter("channels", 1)
         self.declare_parameter("duration", 5.0)
         self.declare_parameter("capture_once", True)
+        self.declare_parameter("capture_mode", "window")
+        self.declare_parameter("sample_format", "int16")
+        self.declare_parameter("shared_memory_name", "aida_mic")
+        self.declare_parameter("chunk_duration", 0.1)
+        self.declare_parameter("ring_duration", 5.0)
+        self.declare_parameter("vad", True)
+        self.declare_parameter("vad_energy_margin_db", 10.0)
+        self.declare_parameter("vad_flatness_threshold", 0.3)
+        self.declare_parameter("vad_hangover", 0.3)
+        self.declare_parameter("vad_pre_roll", 0.3)
+        self.declare_parameter("vad_min_speech", 0.1)
+        self.declare_parameter("vad_max_segment", 10.0)
 
         self.init_services()
         self.initialize_publisher()
         self.initialize_capture_queue()
+        self.initialize_capture_rate()
+        self.initialize_shared_ring()
 
     def destroy_node(self):
         """
@@ -60,6 +115,9 @@ class AudioTransmitterNode(Node):
         Returns:
             None
         """
+        if self.shared_ring is not None:
+            self.shared_ring.close()
+            self.shared_ring = None
         super().destroy_node()
 
 
@@ -89,8 +147,18 @@ class AudioTransmitterNode(Node):
             None
         """
         self.publisher = self.create_publisher(AudioData, self.get_parameter('audio_topic').get_parameter_value().string_value, 10)
+        stream_topic = self.get_parameter('stream_topic').get_parameter_value().string_value
+        self.stream_publisher = self.create_publisher(AudioData, stream_topic, 10) if stream_topic else None
         self.frame_num = 0
 
+        sample_format = self.get_parameter('sample_format').get_parameter_value().string_value
+        if sample_format not in ("int16", "float32"):
+            self.get_logger().warn(f"MIC node: Unknown sample format {sample_format}, using int16")
+            sample_format = "int16"
+        self.sample_format = AudioData.FORMAT_INT16 if sample_format == "int16" else AudioData.FORMAT_FLOAT32
+        # Capture in the published format, so the samples are sent without a conversion
+        self.capture_dtype = np.int16 if self.sample_format == AudioData.FORMAT_INT16 else np.float32
+
     def initialize_capture_queue(self):
         """
         This method initializes the capture queue and sets the lock for the queue.
@@ -105,6 +173,57 @@ class AudioTransmitterNode(Node):
 
         self.capture_queue = queue.Queue()
 
+    def initialize_capture_rate(self):
+        """
+        Determines the rate the device is opened at.
+
+        Uses the capture_rate parameter, or the default rate of the input device if it is 0.
+        If the device cannot be queried, audio is captured at sample_rate.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        sample_rate = self.get_parameter('sample_rate').get_parameter_value().integer_value
+        self.capture_rate = self.get_parameter('capture_rate').get_parameter_value().integer_value
+        if self.capture_rate <= 0:
+            try:
+                self.capture_rate = int(sd.query_devices(kind='input')['default_samplerate'])
+            except (sd.PortAudioError, ValueError) as e:
+                self.get_logger().warn(f"MIC node: Could not query the input device, capturing at {sample_rate} - {e}")
+                self.capture_rate = sample_rate
+        if self.capture_rate != sample_rate:
+            self.get_logger().info(f"MIC node: Capturing at {self.capture_rate} Hz, resampling to {sample_rate} Hz")
+
+    def initialize_shared_ring(self):
+        """
+        Creates the shared memory ring for local consumers.
+
+        The ring holds ring_duration seconds of audio in the capture format and at the capture
+        rate. If it cannot be created, the node only publishes messages.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.shared_ring = None
+        name = self.get_parameter('shared_memory_name').get_parameter_value().string_value
+        if not name:
+            return
+        ring_duration = self.get_parameter('ring_duration').get_parameter_value().double_value
+        try:
+            self.shared_ring = SharedAudioRing.create(
+                name, int(self.capture_rate * ring_duration),
+                channels=self.get_parameter('channels').get_parameter_value().integer_value,
+                sample_rate=self.capture_rate, dtype=self.capture_dtype)
+            self.get_logger().info(f"MIC node: Sharing audio in shared memory {name}")
+        except OSError as e:
+            self.get_logger().warn(f"MIC node: Could not create shared memory {name}, only publishing - {e}")
+
     def start_workers(self) -> None:
         """
         Starts the capture and publisher workers.
@@ -131,8 +250,9 @@ class AudioTransmitterNode(Node):
         """
         Stops the capture and publisher workers.
 
-        This method sets the capture and publisher events to signal the workers to stop.
-        It also waits for the workers to finish using the `join()` method.
+        This method stops the capturer first, so the segment it flushes on stopping is
+        still queued, and then lets the publisher drain the capture queue. Nothing is left
+        behind to be published when the workers start again.
 
         Args:
             None
@@ -142,12 +262,12 @@ class AudioTransmitterNode(Node):
         """
         if hasattr(self, 'capture_event') and self.capture_event != None:
             self.capture_event.set()
+        if hasattr(self, 'capturer_thread') and self.capturer_thread.is_alive():
+            self.capturer_thread.join()
         if hasattr(self, 'publisher_event') and self.publisher_event != None:
             self.publisher_event.set()
         if hasattr(self, 'publisher_thread') and self.publisher_thread.is_alive():
             self.publisher_thread.join()
-        if hasattr(self, 'capturer_thread') and self.capturer_thread.is_alive():
-            self.capturer_thread.join()
         
     def set_recording(self, request: SetState.Request, response: SetState.Response) -> SetState.Response:
         """
@@ -179,7 +299,29 @@ class AudioTransmitterNode(Node):
         """
         Records audio from the microphone.
 
-        This method continuously captures audio data from the microphone and puts it into the capture queue.
+        This method continuously captures audio data from the microphone and puts it into the capture queue,
+        in the configured capture mode.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        capture_mode = self.get_parameter('capture_mode').get_parameter_value().string_value
+        if capture_mode == "stream":
+            self.stream_audio()
+        elif capture_mode == "window":
+            self.record_window()
+        else:
+            self.get_logger().error(f"MIC node: Unknown capture mode {capture_mode}")
+
+    def record_window(self):
+        """
+        Records audio from the microphone in blocking windows.
+
+        Each window of duration seconds becomes one message, resampled to sample_rate. Nothing is captured
+        while a message is built.
 
         Args:
             None
@@ -190,38 +332,185 @@ class AudioTransmitterNode(Node):
         sample_rate = self.get_parameter('sample_rate').get_parameter_value().integer_value
         channels = self.get_parameter('channels').get_parameter_value().integer_value
         duration = self.get_parameter('duration').get_parameter_value().double_value
+        detector = self._create_detector(sample_rate)
         self.get_logger().info("MIC node: Recording audio with sample rate: " + str(sample_rate) + ", channels: " + str(channels) + ", duration: " + str(duration))
         while not self.capture_event.is_set():
             self.get_logger().info("MIC node: Starting the recording")
-            audio_data = sd.rec(int(sample_rate * duration), samplerate=sample_rate, channels=channels, dtype=np.float32)
+            audio_data = sd.rec(int(self.capture_rate * duration), samplerate=self.capture_rate, channels=channels, dtype=self.capture_dtype)
             sd.wait()
             self.get_logger().info("MIC node: Pausing the recording")
-            msg = self._to_msg(audio_data, sample_rate, channels)            
-            self.frame_num += 1
-            self.capture_queue.put(msg)
+            if self.shared_ring is not None:
+                self.shared_ring.write(audio_data)
+            if self.capture_rate != sample_rate:
+                audio_data = resample(audio_data, self.capture_rate, sample_rate, channels)
+            if detector is not None and not detector.is_speech(to_float32(audio_data).mean(axis=1)).any():
+                self.get_logger().info("MIC node: No speech in the recording, not publishing it")
+            else:
+                msg = self._to_msg(audio_data, sample_rate, channels)
+                self.frame_num += 1
+                self.capture_queue.put((self.publisher, msg))
             if self.get_parameter('capture_once').get_parameter_value().bool_value:
                 self.get_logger().info("MIC node: Capture once is activated, stopping the recording")
                 self.capture_event.set()
 
-    def _to_msg(self, data, sample_rate, channels):
+    def stream_audio(self):
+        """
+        Records audio from the microphone as a continuous stream of chunks.
+
+        The InputStream callback writes into a ring buffer, and this method cuts it into chunks of
+        chunk_duration seconds, resamples them to sample_rate and puts them into the capture queue.
+        No audio is lost between chunks, and a chunk is published as soon as it is full. The sample
+        offsets of the messages count samples at sample_rate.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        sample_rate = self.get_parameter('sample_rate').get_parameter_value().integer_value
+        channels = self.get_parameter('channels').get_parameter_value().integer_value
+        chunk_duration = self.get_parameter('chunk_duration').get_parameter_value().double_value
+        ring_duration = self.get_parameter('ring_duration').get_parameter_value().double_value
+        chunk_frames = max(int(self.capture_rate * chunk_duration), 1)
+
+        self.ring_buffer = AudioRingBuffer(max(int(self.capture_rate * ring_duration), chunk_frames), channels,
+                                           dtype=self.capture_dtype)
+        self.input_overflows = 0
+        resampler = StreamingResampler(self.capture_rate, sample_rate, channels)
+        # Resampled audio for the pre-roll of speech segments. After lost input the offsets of the
+        # resampled stream jump, history_shift maps them to positions in this buffer.
+        self.history_buffer = AudioRingBuffer(max(int(sample_rate * ring_duration), 1), channels)
+        self.history_shift = 0
+        next_offset = 0
+        detector = self._create_detector(sample_rate)
+        segmenter = None
+        if detector is not None:
+            segmenter = SpeechSegmenter(
+                detector, self._mono_history,
+                pre_roll=self.get_parameter('vad_pre_roll').get_parameter_value().double_value,
+                hangover=self.get_parameter('vad_hangover').get_parameter_value().double_value,
+                min_speech=self.get_parameter('vad_min_speech').get_parameter_value().double_value,
+                max_segment=self.get_parameter('vad_max_segment').get_parameter_value().double_value,
+                sample_rate=sample_rate)
+        self.get_logger().info(f"MIC node: Streaming audio with sample rate: {sample_rate}, channels: {channels}, "
+                               f"chunks of {chunk_frames} samples at {self.capture_rate} Hz")
+
+        with sd.InputStream(samplerate=self.capture_rate, channels=channels, dtype=self.capture_dtype,
+                            blocksize=chunk_frames, callback=self._audio_callback):
+            while not self.capture_event.is_set():
+                chunk = self.ring_buffer.read(chunk_frames)
+                if chunk is None:
+                    # Wake up a few times per chunk, a missed wakeup only delays the chunk a little
+                    self.capture_event.wait(chunk_duration / 4)
+                    continue
+                input_offset, audio_data = chunk
+                if input_offset != next_offset:
+                    resampler.reset(input_offset)
+                    self.history_shift = resampler.output_position - self.history_buffer.write_position
+                next_offset = input_offset + len(audio_data)
+                sample_offset = resampler.output_position
+                audio_data = resampler.process(audio_data)
+                self.history_buffer.write(audio_data)
+                msg = self._to_msg(audio_data, sample_rate, channels, sample_offset)
+                if self.stream_publisher is not None:
+                    # Every chunk, also with vad, for listeners that want the live sound
+                    self.capture_queue.put((self.stream_publisher, msg))
+                if segmenter is None:
+                    self.capture_queue.put((self.publisher, msg))
+                    self.frame_num += 1
+                    continue
+                for segment_offset, segment in segmenter.feed(sample_offset, to_float32(audio_data).mean(axis=1)):
+                    self.capture_queue.put((self.publisher, self._to_msg(segment, sample_rate, 1, segment_offset)))
+                    self.frame_num += 1
+
+        if segmenter is not None:
+            for segment_offset, segment in segmenter.flush():
+                self.capture_queue.put((self.publisher, self._to_msg(segment, sample_rate, 1, segment_offset)))
+                self.frame_num += 1
+
+        self.get_logger().info(f"MIC node: Stream stopped, {self.ring_buffer.overruns} ring buffer overruns, "
+                               f"{self.input_overflows} input overflows")
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        """
+        Writes the frames of the InputStream to the ring buffer and the shared memory ring.
+
+        Runs in the audio thread of sounddevice, so it only copies the frames and never waits.
+
+        Args:
+            indata: numpy array (frames, channels) of audio data
+            frames: number of frames
+            time_info: timestamps of the buffer
+            status: CallbackFlags of the stream
+
+        Returns:
+            None
+        """
+        if status.input_overflow:
+            self.input_overflows += 1
+        self.ring_buffer.write(indata)
+        if self.shared_ring is not None:
+            self.shared_ring.write(indata)
+
+    def _create_detector(self, sample_rate):
+        """
+        Creates the voice activity detector from the parameters.
+
+        Args:
+            sample_rate: sample rate of the audio
+
+        Returns:
+            VoiceActivityDetector, or None if voice activity detection is disabled
+        """
+        if not self.get_parameter('vad').get_parameter_value().bool_value:
+            return None
+        return VoiceActivityDetector(
+            sample_rate=sample_rate,
+            energy_margin_db=self.get_parameter('vad_energy_margin_db').get_parameter_value().double_value,
+            flatness_threshold=self.get_parameter('vad_flatness_threshold').get_parameter_value().double_value)
+
+    def _mono_history(self, offset, count):
+        """
+        Returns earlier resampled audio as mono.
+
+        Args:
+            offset: offset of the first sample wanted
+            count: number of samples wanted
+
+        Returns:
+            Tuple of (offset of the first sample returned, numpy array of mono samples)
+        """
+        offset, frames = self.history_buffer.peek(offset - self.history_shift, count)
+        return offset + self.history_shift, frames.mean(axis=1)
+
+    def _to_msg(self, data, sample_rate, channels, sample_offset=0):
         """
         Converts audio data to a ROS2 message.
 
         This method converts the audio data, sample rate, channels, and duration into a ROS2 message format.
+        The samples are sent in the sample format of the node, converted if needed.
 
         Args:
-            data: numpy array of audio data
+            data: numpy array of audio data, int16 or float in [-1, 1]
             sample_rate: sample rate of the audio data
             channels: number of channels in the audio data
+            sample_offset: offset of the first sample since the capture started
 
         Returns:
             Message of AudioData type
         """
         msg = AudioData()
+        if self.sample_format == AudioData.FORMAT_INT16:
+            data = to_int16(data)
+        else:
+            data = to_float32(data)
         msg.data = data.tobytes()
+        msg.sample_format = self.sample_format
         msg.sample_rate = sample_rate
         msg.channels = channels
         msg.samples = len(data)
+        msg.sample_offset = sample_offset
         msg.header.frame_id = str(self.frame_num)
         return msg
 
@@ -229,7 +518,9 @@ class AudioTransmitterNode(Node):
         """
         Publishes audio data.
 
-        This method continuously publishes audio data from the capture queue.
+        This method continuously publishes audio data from the capture queue, which holds
+        (publisher, message) pairs. Once stopped, it publishes what is still queued and
+        returns.
 
         Args:
             None
@@ -238,18 +529,17 @@ class AudioTransmitterNode(Node):
             None
         """
         while True:
-            if self.publisher_event.is_set():
-                break
+            # The capturer has stopped when the event is set, so an empty queue stays empty
+            stopping = self.publisher_event.is_set()
             try:
-                msg = self.capture_queue.get(block=True, timeout=2)
+                publisher, msg = self.capture_queue.get(block=not stopping, timeout=2)
             except queue.Empty:
-                msg = None
-            if self.publisher_event.is_set():
-                break
-            if msg != None:
-                self.get_logger().info('MIC node: Publishing message to topic')
-                print("Publishing a message \n")
-                self.publisher.publish(msg)
+                if stopping:
+                    break
+                continue
+            # Streamed chunks arrive several times a second, so only log at debug level
+            self.get_logger().debug('MIC node: Publishing message to topic')
+            publisher.publish(msg)
 
 
 def main(args=None):
@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import wave
+
+import numpy as np
+
+from audio.mfcc import mfcc
+from audio.resampler import resample
+from audio.voice_activity import VoiceActivityDetector
+from audio.wake_word import DEFAULT_TEMPLATES, WAKE_SAMPLE_RATE, enrollment_threshold, save_templates
+
+
+def read_wav(path):
+    """
+    Reads a 16 bit PCM WAV file as mono float32 samples at 16 kHz
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        float32 numpy array
+    """
+    with wave.open(str(path), "rb") as file:
+        if file.getsampwidth() != 2:
+            raise ValueError(f"{path} is not 16 bit PCM")
+        samples = np.frombuffer(file.readframes(file.getnframes()), dtype="<i2")
+        channels = file.getnchannels()
+        rate = file.getframerate()
+    samples = samples.reshape(-1, channels).mean(axis=1) / 32768.0
+    return resample(samples.astype(np.float32), rate, WAKE_SAMPLE_RATE)
+
+
+def record(duration):
+    """
+    Records one take from the default microphone
+
+    Args:
+        duration: Seconds to record
+
+    Returns:
+        float32 numpy array of mono samples at 16 kHz
+    """
+    import sounddevice as sd
+    rate = int(sd.query_devices(kind='input')['default_samplerate'])
+    samples = sd.rec(int(rate * duration), samplerate=rate, channels=1, dtype='float32')
+    sd.wait()
+    return resample(samples[:, 0], rate, WAKE_SAMPLE_RATE)
+
+
+def trim_silence(samples):
+    """
+    Cuts the silence before and after the phrase of a take
+
+    Args:
+        samples: float32 array of mono samples at 16 kHz
+
+    Returns:
+        The samples from the first to the last frame of speech
+
+    Raises:
+        ValueError when the take holds no speech
+    """
+    detector = VoiceActivityDetector(WAKE_SAMPLE_RATE)
+    # Two passes, so the noise floor is learnt before the frames are classified
+    detector.is_speech(samples)
+    speech = np.flatnonzero(detector.is_speech(samples))
+    if not len(speech):
+        raise ValueError("No speech in the recording")
+    return samples[speech[0] * detector.frame_length:(speech[-1] + 1) * detector.frame_length]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Enrolls the wake phrase of the wake word gate.")
+    parser.add_argument("recordings", nargs="*", help="WAV files of the phrase, records from the mic if none are given")
+    parser.add_argument("--takes", type=int, default=4, help="number of takes recorded from the mic")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per recorded take")
+    parser.add_argument("--margin", type=float, default=2.0,
+                        help="threshold as a multiple of the distance between the takes")
+    parser.add_argument("--output", default=DEFAULT_TEMPLATES, help="file to store the templates in")
+    options = parser.parse_args(args)
+
+    if options.recordings:
+        takes = [read_wav(path) for path in options.recordings]
+    else:
+        takes = []
+        for take in range(options.takes):
+            input(f"Take {take + 1} of {options.takes}: press enter and say the wake phrase")
+            takes.append(record(options.duration))
+
+    try:
+        templates = [mfcc(trim_silence(samples)) for samples in takes]
+        threshold = enrollment_threshold(templates, options.margin)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    output = os.path.expanduser(options.output)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    save_templates(output, templates, threshold)
+    print(f"Stored {len(templates)} templates in {output}, threshold {threshold:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+from functools import lru_cache
+
+import numpy as np
+
+from audio.pcm import to_float32
+
+
+def hz_to_mel(frequency):
+    """
+    Converts frequencies in Hz to the mel scale
+
+    Args:
+        frequency: Frequency or array of frequencies in Hz
+
+    Returns:
+        The frequencies in mel
+    """
+    return 2595.0 * np.log10(1.0 + np.asarray(frequency) / 700.0)
+
+
+def mel_to_hz(mel):
+    """
+    Converts mel back to frequencies in Hz
+
+    Args:
+        mel: Value or array of values in mel
+
+    Returns:
+        The frequencies in Hz
+    """
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+@lru_cache(maxsize=4)
+def mel_filterbank(sample_rate, fft_size, mel_count, low=20.0, high=None):
+    """
+    Builds triangular mel filters over the bins of a real FFT
+
+    Args:
+        sample_rate: Sample rate of the audio
+        fft_size: Length of the FFT
+        mel_count: Number of filters
+        low: Lowest frequency in Hz
+        high: Highest frequency in Hz, None for the Nyquist frequency
+
+    Returns:
+        float32 array (fft_size // 2 + 1, mel_count), read only since it is cached
+    """
+    high = sample_rate / 2 if high is None else high
+    edges = mel_to_hz(np.linspace(hz_to_mel(low), hz_to_mel(high), mel_count + 2))
+    bins = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)[:, None]
+    rising = (bins - edges[:-2]) / (edges[1:-1] - edges[:-2])
+    falling = (edges[2:] - bins) / (edges[2:] - edges[1:-1])
+    filters = np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+    filters.setflags(write=False)
+    return filters
+
+
+@lru_cache(maxsize=4)
+def dct_matrix(mel_count, coefficient_count):
+    """
+    Builds the orthonormal DCT-II that turns log mel energies into cepstral coefficients
+
+    Args:
+        mel_count: Number of mel filters
+        coefficient_count: Number of coefficients kept
+
+    Returns:
+        float32 array (mel_count, coefficient_count), read only since it is cached
+    """
+    n = np.arange(mel_count)[:, None]
+    k = np.arange(coefficient_count)[None, :]
+    matrix = np.cos(np.pi / mel_count * (n + 0.5) * k) * np.sqrt(2.0 / mel_count)
+    matrix[:, 0] /= np.sqrt(2.0)
+    matrix = matrix.astype(np.float32)
+    matrix.setflags(write=False)
+    return matrix
+
+
+class StreamingMfcc:
+    """
+    Computes MFCC features of a stream of audio chunks with NumPy.
+
+    Frames of frame_duration seconds every hop_duration seconds are windowed, their power
+    spectrum is summed into mel bands, and the log of the bands is turned into cepstral
+    coefficients by a DCT. The samples that do not fill a frame yet are kept for the next
+    chunk, so chunked features are identical to the features of the whole stream and
+    every sample is only transformed once per frame it belongs to.
+
+    The first coefficient (the loudness) is dropped, so the features do not depend on how
+    far the speaker is from the microphone.
+
+    Attributes:
+        frame_length: Number of samples per frame
+        hop_length: Number of samples between frames
+        coefficient_count: Number of coefficients per frame
+
+    Methods:
+        __init__ : Initializes the filters and clears the state
+        reset : Drops the samples kept from the last chunk
+        process : Returns the features of the frames completed by a chunk
+    """
+
+    def __init__(self, sample_rate=16000, frame_duration=0.025, hop_duration=0.01, mel_count=40,
+                 coefficient_count=13):
+        """
+        Initializes the StreamingMfcc
+
+        Args:
+            sample_rate: Sample rate of the audio
+            frame_duration: Length of a frame in seconds
+            hop_duration: Seconds between the starts of two frames
+            mel_count: Number of mel filters
+            coefficient_count: Number of coefficients per frame, including the dropped first one
+
+        Returns:
+            None
+        """
+        self.frame_length = int(sample_rate * frame_duration)
+        self.hop_length = int(sample_rate * hop_duration)
+        self.fft_size = 1 << (self.frame_length - 1).bit_length()
+        self.coefficient_count = coefficient_count - 1
+        self.window = np.hamming(self.frame_length).astype(np.float32)
+        self.filters = mel_filterbank(sample_rate, self.fft_size, mel_count)
+        self.dct = dct_matrix(mel_count, coefficient_count)[:, 1:]
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the samples kept from the last chunk
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.pending = np.empty(0, dtype=np.float32)
+
+    def process(self, samples):
+        """
+        Returns the features of the frames completed by a chunk
+
+        Args:
+            samples: Array of mono samples, int16 or float in [-1, 1]
+
+        Returns:
+            float32 array (frames, coefficient_count), frames may be 0
+        """
+        buffer = np.concatenate((self.pending, to_float32(samples).reshape(-1)))
+        count = max((len(buffer) - self.frame_length) // self.hop_length + 1, 0)
+        self.pending = buffer[count * self.hop_length:]
+        if not count:
+            return np.empty((0, self.coefficient_count), dtype=np.float32)
+
+        starts = np.arange(count)[:, None] * self.hop_length
+        frames = buffer[starts + np.arange(self.frame_length)] * self.window
+        power = np.abs(np.fft.rfft(frames, self.fft_size, axis=1)) ** 2
+        return (np.log(power @ self.filters + 1e-10) @ self.dct).astype(np.float32)
+
+
+def mfcc(samples, sample_rate=16000):
+    """
+    Computes the MFCC features of a complete recording
+
+    Args:
+        samples: Array of mono samples, int16 or float in [-1, 1]
+        sample_rate: Sample rate of the samples
+
+    Returns:
+        float32 array (frames, coefficients)
+    """
+    return StreamingMfcc(sample_rate).process(samples)
@@ -0,0 +1,35 @@
+import numpy as np
+
+INT16_SCALE = 32768.0
+
+
+def to_float32(samples):
+    """
+    Converts samples to float32 in [-1, 1]
+
+    Args:
+        samples: numpy array of int16 or float samples
+
+    Returns:
+        float32 numpy array, the array itself if it already is float32
+    """
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) * np.float32(1.0 / INT16_SCALE)
+    return samples.astype(np.float32, copy=False)
+
+
+def to_int16(samples):
+    """
+    Converts samples to int16, clipping float samples outside [-1, 1]
+
+    Args:
+        samples: numpy array of int16 or float samples
+
+    Returns:
+        int16 numpy array, the array itself if it already is int16
+    """
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(np.rint(samples * INT16_SCALE), -INT16_SCALE, INT16_SCALE - 1).astype(np.int16)
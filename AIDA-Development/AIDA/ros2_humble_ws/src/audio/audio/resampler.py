@@ -0,0 +1,165 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+from audio.pcm import to_float32
+
+
+@lru_cache(maxsize=8)
+def design_filter(up, down, zero_crossings=16, beta=8.0, rolloff=0.9):
+    """
+    Designs the polyphase anti-aliasing filter for a rational rate change
+
+    The prototype is a Kaiser windowed sinc at the upsampled rate, with the cutoff at
+    rolloff times the lower of the two Nyquist frequencies, reaching zero_crossings zeros of
+    the sinc to each side. It is split into up phases, each scaled to a gain of one, and the
+    taps of each phase are reversed so a phase is applied as a dot product with the input
+    in time order.
+
+    Args:
+        up: Upsampling factor
+        down: Downsampling factor
+        zero_crossings: Half length of the filter in zeros of the sinc, the transition band
+            gets narrower as it grows
+        beta: Kaiser window shape, higher trades a wider transition for a lower stopband
+        rolloff: Cutoff as a fraction of the output (or input) Nyquist frequency
+
+    Returns:
+        float32 array (up, taps per phase), read only since it is cached
+    """
+    taps_per_phase = -(-2 * zero_crossings * max(up, down) // up)
+    length = up * taps_per_phase
+    cutoff = rolloff * 0.5 / max(up, down)
+    time = np.arange(length) - (length - 1) / 2
+    prototype = 2 * cutoff * np.sinc(2 * cutoff * time) * np.kaiser(length, beta)
+
+    phases = prototype.reshape(taps_per_phase, up).T[:, ::-1]
+    phases = phases / phases.sum(axis=1, keepdims=True)
+    phases = np.ascontiguousarray(phases, dtype=np.float32)
+    phases.setflags(write=False)
+    return phases
+
+
+class StreamingResampler:
+    """
+    Resamples a stream of audio chunks from one rate to another with a polyphase FIR filter.
+
+    The rate change is reduced to a ratio up / down (48000 to 16000 is 1 / 3, 44100 to
+    16000 is 160 / 441). Output sample n sits at n * down / up input samples and is the dot
+    product of the input samples before it with the filter phase for its fractional
+    position, 2 * zero_crossings * max(up, down) / up multiplications per output sample and
+    channel. All output samples of a chunk are computed at once with one gather and one
+    einsum. The last input samples and the fractional position are kept between chunks, so
+    chunked output is identical to resampling the whole stream at once and the cost per
+    second of audio is fixed.
+
+    Attributes:
+        input_rate: Sample rate of the input
+        output_rate: Sample rate of the output
+        output_position: Offset of the next output sample since the start of the stream
+        delay: Delay of the filter in output samples
+
+    Methods:
+        __init__ : Designs the filter and clears the state
+        reset : Restarts the stream at an input offset
+        process : Resamples the next chunk
+    """
+
+    def __init__(self, input_rate, output_rate, channels=1, zero_crossings=16, beta=8.0,
+                 rolloff=0.9):
+        """
+        Initializes the StreamingResampler
+
+        Args:
+            input_rate: Sample rate of the input
+            output_rate: Sample rate of the output
+            channels: Number of channels per frame
+            zero_crossings: Half length of the filter in zeros of the sinc
+            beta: Kaiser window shape
+            rolloff: Cutoff as a fraction of the lower Nyquist frequency
+
+        Returns:
+            None
+        """
+        if input_rate <= 0 or output_rate <= 0:
+            raise ValueError("sample rates must be positive")
+        divisor = gcd(int(input_rate), int(output_rate))
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.up = self.output_rate // divisor
+        self.down = self.input_rate // divisor
+        self.channels = channels
+        self.passthrough = self.up == self.down
+        self.phases = np.ones((1, 1), dtype=np.float32) if self.passthrough else design_filter(
+            self.up, self.down, zero_crossings, beta, rolloff)
+        self.taps = self.phases.shape[1]
+        self.delay = 0.0 if self.passthrough else (self.up * self.taps - 1) / 2 / self.down
+        self.reset()
+
+    def reset(self, input_offset=0):
+        """
+        Restarts the stream at an input offset
+
+        Used when input samples were lost, the filter history is cleared and the output
+        position continues at the output sample matching the input offset.
+
+        Args:
+            input_offset: Offset of the next input sample
+
+        Returns:
+            None
+        """
+        # Position of the next output sample in upsampled units, relative to the first
+        # sample of the next chunk
+        self.output_position = -(-input_offset * self.up // self.down)
+        self.time = self.output_position * self.down - input_offset * self.up
+        self.history = np.zeros((self.taps - 1, self.channels), dtype=np.float32)
+
+    def process(self, samples):
+        """
+        Resamples the next chunk
+
+        Args:
+            samples: Array of shape (n, channels), or (n,) for one channel, int16 or float
+
+        Returns:
+            float32 array (m, channels), or (m,) for one dimensional input. m varies by
+            one between chunks when the ratio does not divide the chunk length.
+        """
+        samples = to_float32(samples)
+        flat = samples.ndim == 1
+        frames = samples.reshape(-1, self.channels)
+        if self.passthrough:
+            self.output_position += len(frames)
+            return samples.copy()
+
+        count = max(-(-(len(frames) * self.up - self.time) // self.down), 0)
+        positions = self.time + np.arange(count, dtype=np.int64) * self.down
+        newest, phase = np.divmod(positions, self.up)
+
+        buffer = np.concatenate((self.history, frames))
+        # Row i holds the taps input samples ending at the newest one for output i
+        windows = buffer[newest[:, None] + np.arange(self.taps)]
+        output = np.einsum('nk,nkc->nc', self.phases[phase], windows)
+
+        self.time += count * self.down - len(frames) * self.up
+        self.history = buffer[len(buffer) - (self.taps - 1):]
+        self.output_position += count
+        return output[:, 0] if flat else output
+
+
+def resample(samples, input_rate, output_rate, channels=1):
+    """
+    Resamples a complete recording
+
+    Args:
+        samples: Array of shape (n, channels), or (n,) for one channel, int16 or float
+        input_rate: Sample rate of the samples
+        output_rate: Sample rate wanted
+        channels: Number of channels per frame
+
+    Returns:
+        float32 array in the layout of samples
+    """
+    return StreamingResampler(input_rate, output_rate, channels).process(samples)
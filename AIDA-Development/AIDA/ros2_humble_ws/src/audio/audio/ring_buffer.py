@@ -0,0 +1,148 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    A single-producer, single-consumer ring buffer of audio frames.
+
+    The producer is the sounddevice callback and must never wait, so the buffer has no
+    lock. Each side only writes its own positions: the producer claims the frames it is
+    about to overwrite, copies the frames in and then advances write_position, the consumer
+    copies frames out, checks that none of them were claimed meanwhile and then advances
+    read_position. Positions count frames since the start of the stream and never wrap,
+    so they double as continuous sample offsets.
+
+    When the consumer falls behind by more than the capacity, the oldest frames are
+    overwritten. The consumer notices, skips to the oldest frame still in the buffer and
+    counts an overrun.
+
+    Attributes:
+        write_position: Number of frames written since the start
+        read_position: Offset of the next frame to read
+        overruns: Number of times the consumer lost frames
+
+    Methods:
+        __init__ : Allocates the buffer
+        write : Appends frames, called by the producer
+        available : Number of frames that can be read
+        read : Reads a chunk of frames, called by the consumer
+        peek : Copies frames that are still in the buffer, called by the consumer
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        """
+        Allocates the buffer
+
+        Args:
+            capacity: Number of frames the buffer holds
+            channels: Number of channels per frame
+            dtype: Sample type
+
+        Returns:
+            None
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least one frame")
+        self.capacity = capacity
+        self.channels = channels
+        self.buffer = np.zeros((capacity, channels), dtype=dtype)
+        self.write_position = 0
+        self.claimed_position = 0
+        self.read_position = 0
+        self.overruns = 0
+
+    def write(self, frames):
+        """
+        Appends frames, called by the producer
+
+        Args:
+            frames: Array of shape (n, channels), or (n,) for one channel
+
+        Returns:
+            None
+        """
+        frames = np.asarray(frames).reshape(-1, self.channels)
+        position = self.write_position
+        if len(frames) > self.capacity:
+            # Only the newest frames fit, the older ones count as already overwritten
+            position += len(frames) - self.capacity
+            frames = frames[-self.capacity:]
+
+        self.claimed_position = position + len(frames)
+        start = position % self.capacity
+        first = min(len(frames), self.capacity - start)
+        self.buffer[start:start + first] = frames[:first]
+        self.buffer[:len(frames) - first] = frames[first:]
+        # Publish the frames only after they are in place
+        self.write_position = position + len(frames)
+
+    def available(self):
+        """
+        Number of frames that can be read
+
+        Args:
+            None
+
+        Returns:
+            Number of frames, at most the capacity
+        """
+        return min(self.write_position - self.read_position, self.capacity)
+
+    def read(self, count):
+        """
+        Reads a chunk of frames, called by the consumer
+
+        Args:
+            count: Number of frames to read, at most the capacity
+
+        Returns:
+            Tuple of (offset of the first frame, array of shape (count, channels)), or None
+            if fewer than count frames are available
+        """
+        if count > self.capacity:
+            raise ValueError("count is larger than the capacity")
+        while True:
+            written = self.write_position
+            if written - self.read_position > self.capacity:
+                self.read_position = written - self.capacity
+                self.overruns += 1
+            if written - self.read_position < count:
+                return None
+
+            offset = self.read_position
+            start = offset % self.capacity
+            first = min(count, self.capacity - start)
+            chunk = np.concatenate((self.buffer[start:start + first],
+                                    self.buffer[:count - first]))
+
+            # The producer may have lapped the chunk while it was copied, then read again
+            if self.claimed_position - offset <= self.capacity:
+                self.read_position = offset + count
+                return offset, chunk
+
+    def peek(self, offset, count):
+        """
+        Copies frames that are still in the buffer, called by the consumer
+
+        Unlike read, this does not move the read position, so frames that were already read
+        can be looked at again, e.g. as pre-roll before an event.
+
+        Args:
+            offset: Offset of the first frame wanted
+            count: Number of frames wanted
+
+        Returns:
+            Tuple of (offset of the first frame returned, array of shape (n, channels)). The
+            range is cut to the frames that were written and not yet overwritten.
+        """
+        while True:
+            written = self.write_position
+            start = max(offset, written - self.capacity, 0)
+            end = max(min(offset + count, written), start)
+
+            first = min(end - start, self.capacity - start % self.capacity)
+            position = start % self.capacity
+            frames = np.concatenate((self.buffer[position:position + first],
+                                     self.buffer[:end - start - first]))
+            if self.claimed_position - start <= self.capacity:
+                return start, frames
@@ -0,0 +1,222 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Layout of the shared memory block: a header of HEADER_FIELDS uint64 values followed by
+# capacity frames of audio. Positions count frames since the writer started and never wrap.
+MAGIC = 0x4149444141554431  # "AIDAAUD1"
+HEADER_FIELDS = 8
+HEADER_SIZE = HEADER_FIELDS * 8
+_MAGIC, _CAPACITY, _CHANNELS, _DTYPE, _SAMPLE_RATE, _WRITE, _CLAIMED = range(7)
+DTYPES = {0: np.dtype(np.float32), 1: np.dtype(np.int16)}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+class SharedAudioRing:
+    """
+    A ring buffer of audio frames in shared memory, with one writer and any number of readers.
+
+    The mic node writes every captured block, and local consumers (level meters, recorders,
+    streaming) attach by name and read straight from the shared block, without serializing
+    the audio. Readers never lock the writer out. The writer first advances the claimed
+    cursor over the frames it is about to overwrite, copies the frames and then advances
+    the write cursor. A reader copies the frames it wants and then checks the claimed
+    cursor: if the writer lapped the frames meanwhile, the copy is retried.
+
+    Attributes:
+        capacity: Number of frames the ring holds
+        channels: Number of channels per frame
+        sample_rate: Sample rate of the audio
+        frames: numpy array (capacity, channels) in the shared block
+
+    Methods:
+        create : Creates a ring, for the writer
+        attach : Attaches to an existing ring, for readers
+        write : Appends frames, called by the writer
+        write_position : Number of frames written since the start
+        read : Copies a range of frames
+        read_latest : Copies the latest milliseconds of audio
+        close : Detaches from the shared block, the writer also removes it
+    """
+
+    def __init__(self, memory, owner):
+        """
+        Wraps a shared memory block, use create or attach instead
+
+        Args:
+            memory: SharedMemory block with a valid header
+            owner: Whether this process created the block and removes it on close
+
+        Returns:
+            None
+        """
+        self.memory = memory
+        self.owner = owner
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=memory.buf)
+        if int(self.header[_MAGIC]) != MAGIC:
+            raise ValueError(f"{memory.name} is not an audio ring")
+        self.capacity = int(self.header[_CAPACITY])
+        self.channels = int(self.header[_CHANNELS])
+        self.sample_rate = int(self.header[_SAMPLE_RATE])
+        self.frames = np.ndarray((self.capacity, self.channels),
+                                 dtype=DTYPES[int(self.header[_DTYPE])],
+                                 buffer=memory.buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, name, capacity, channels=1, sample_rate=16000, dtype=np.int16):
+        """
+        Creates a ring, for the writer
+
+        A stale block with the same name, left by a writer that crashed, is replaced.
+
+        Args:
+            name: Name of the shared memory block
+            capacity: Number of frames the ring holds
+            channels: Number of channels per frame
+            sample_rate: Sample rate of the audio
+            dtype: Sample type, np.int16 or np.float32
+
+        Returns:
+            SharedAudioRing
+        """
+        dtype = np.dtype(dtype)
+        size = HEADER_SIZE + capacity * channels * dtype.itemsize
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=memory.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_CHANNELS] = channels
+        header[_DTYPE] = DTYPE_CODES[dtype]
+        header[_SAMPLE_RATE] = sample_rate
+        # The magic goes last, so readers never see a half written header
+        header[_MAGIC] = MAGIC
+        del header
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to an existing ring, for readers
+
+        Args:
+            name: Name of the shared memory block
+
+        Returns:
+            SharedAudioRing
+
+        Raises:
+            FileNotFoundError: If no ring with that name exists
+        """
+        memory = shared_memory.SharedMemory(name=name)
+        # Python registers every attached block with its resource tracker and removes it when
+        # the reader exits, which would remove the ring under the writer
+        resource_tracker.unregister(memory._name, "shared_memory")
+        try:
+            return cls(memory, owner=False)
+        except ValueError:
+            memory.close()
+            raise
+
+    def write_position(self):
+        """
+        Number of frames written since the start
+
+        Args:
+            None
+
+        Returns:
+            The write cursor
+        """
+        return int(self.header[_WRITE])
+
+    def write(self, frames):
+        """
+        Appends frames, called by the writer
+
+        Args:
+            frames: Array of shape (n, channels), or (n,) for one channel
+
+        Returns:
+            None
+        """
+        frames = np.asarray(frames).reshape(-1, self.channels)
+        position = int(self.header[_WRITE])
+        if len(frames) > self.capacity:
+            position += len(frames) - self.capacity
+            frames = frames[-self.capacity:]
+
+        self.header[_CLAIMED] = position + len(frames)
+        start = position % self.capacity
+        first = min(len(frames), self.capacity - start)
+        self.frames[start:start + first] = frames[:first]
+        self.frames[:len(frames) - first] = frames[first:]
+        self.header[_WRITE] = position + len(frames)
+
+    def read(self, offset, count, retries=3):
+        """
+        Copies a range of frames
+
+        The range is cut to the frames that were written and are still in the ring, so a
+        consumer that keeps its own offset notices lost frames from the returned offset.
+
+        Args:
+            offset: Offset of the first frame wanted
+            count: Number of frames wanted
+            retries: Number of retries when the writer overwrites the frames during the copy
+
+        Returns:
+            Tuple of (offset of the first frame returned, array of shape (n, channels))
+        """
+        for _ in range(retries + 1):
+            written = int(self.header[_WRITE])
+            start = max(offset, written - self.capacity, 0)
+            end = max(min(offset + count, written), start)
+
+            position = start % self.capacity
+            first = min(end - start, self.capacity - position)
+            frames = np.concatenate((self.frames[position:position + first],
+                                     self.frames[:end - start - first]))
+            if int(self.header[_CLAIMED]) - start <= self.capacity:
+                return start, frames
+        # The writer keeps lapping this reader, return only what is certainly intact
+        claimed = int(self.header[_CLAIMED])
+        intact = max(claimed - self.capacity - start, 0)
+        return start + intact, frames[intact:]
+
+    def read_latest(self, milliseconds):
+        """
+        Copies the latest milliseconds of audio
+
+        Args:
+            milliseconds: Length of the audio wanted
+
+        Returns:
+            Tuple of (offset of the first frame, array of shape (n, channels)), shorter than
+            requested if less audio was written
+        """
+        count = min(int(self.sample_rate * milliseconds / 1000), self.capacity)
+        written = int(self.header[_WRITE])
+        return self.read(written - count, count)
+
+    def close(self):
+        """
+        Detaches from the shared block, the writer also removes it
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.header = None
+        self.frames = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,244 @@
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """
+    Detects speech in frames of audio with NumPy.
+
+    The audio is split into short frames and every frame is classified at once from two
+    features: its energy, which has to be a margin above the tracked noise floor, and the
+    spectral flatness of its power spectrum, which is low for voiced sounds (harmonics)
+    and high for noise-like sounds such as fans or hiss.
+
+    Attributes:
+        frame_length: Number of samples per frame
+        noise_floor_db: Tracked energy of the background noise in dB
+
+    Methods:
+        __init__ : Initializes the detector and its configuration
+        features : Returns the energy and the spectral flatness of each frame
+        is_speech : Classifies each frame as speech or not
+    """
+
+    def __init__(self, sample_rate=16000, frame_duration=0.02, energy_margin_db=10.0,
+                 min_energy_db=-55.0, flatness_threshold=0.3, noise_adaptation=0.05):
+        """
+        Initializes the VoiceActivityDetector
+
+        Args:
+            sample_rate: Sample rate of the audio
+            frame_duration: Length of a frame in seconds
+            energy_margin_db: Speech has to be this much louder than the noise floor
+            min_energy_db: Frames quieter than this (dB relative to full scale) are never speech
+            flatness_threshold: Frames with a higher spectral flatness are never speech
+            noise_adaptation: Weight of the non-speech frames of a call in the noise floor
+
+        Returns:
+            None
+        """
+        self.frame_length = max(int(sample_rate * frame_duration), 16)
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.flatness_threshold = flatness_threshold
+        self.noise_adaptation = noise_adaptation
+        self.noise_floor_db = min_energy_db
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+
+    def features(self, samples):
+        """
+        Returns the energy and the spectral flatness of each frame
+
+        Args:
+            samples: float array of mono samples in [-1, 1], trailing samples that do not
+                fill a frame are ignored
+
+        Returns:
+            Tuple of (energy in dB, spectral flatness in [0, 1]), one value per frame
+        """
+        count = len(samples) // self.frame_length
+        frames = np.asarray(samples[:count * self.frame_length], dtype=np.float32)
+        frames = frames.reshape(count, self.frame_length)
+
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, flatness
+
+    def is_speech(self, samples):
+        """
+        Classifies each frame as speech or not
+
+        The noise floor follows the non-speech frames: it drops at once to a quieter frame,
+        and rises slowly towards the mean of the non-speech frames.
+
+        Args:
+            samples: float array of mono samples in [-1, 1]
+
+        Returns:
+            bool array, one value per complete frame
+        """
+        energy_db, flatness = self.features(samples)
+        threshold = max(self.min_energy_db, self.noise_floor_db + self.energy_margin_db)
+        speech = (energy_db > threshold) & (flatness < self.flatness_threshold)
+
+        background = energy_db[~speech]
+        if len(background):
+            self.noise_floor_db = min(
+                float(background.min()),
+                self.noise_floor_db
+                + self.noise_adaptation * (float(background.mean()) - self.noise_floor_db))
+        return speech
+
+
+class SpeechSegmenter:
+    """
+    Cuts a continuous stream of audio into speech segments.
+
+    Chunks are fed in order with their sample offsets. A segment starts at the first
+    speech frame, reaching back pre_roll seconds into the history so the onset is not
+    clipped, and ends after hangover seconds without speech. Segments with less than
+    min_speech seconds of speech (clicks, bumps) are dropped, and segments longer than
+    max_segment seconds are cut.
+
+    Attributes:
+        detector: The VoiceActivityDetector classifying the frames
+        in_speech: True while a segment is open
+
+    Methods:
+        __init__ : Initializes the segmenter and its configuration
+        feed : Adds a chunk and returns the completed segments
+        flush : Closes the open segment
+    """
+
+    def __init__(self, detector, history, pre_roll=0.3, hangover=0.3, min_speech=0.1,
+                 max_segment=10.0, sample_rate=16000):
+        """
+        Initializes the SpeechSegmenter
+
+        Args:
+            detector: VoiceActivityDetector to classify the frames
+            history: Function (offset, count) returning (offset, samples) of the audio still
+                available in that range, like AudioRingBuffer.peek
+            pre_roll: Seconds of audio kept before the first speech frame
+            hangover: Seconds without speech before a segment ends
+            min_speech: Segments with fewer seconds of speech frames are dropped
+            max_segment: Segments are cut after this many seconds
+            sample_rate: Sample rate of the audio
+
+        Returns:
+            None
+        """
+        self.detector = detector
+        self.history = history
+        frame_duration = detector.frame_length / sample_rate
+        self.pre_roll = int(pre_roll * sample_rate)
+        self.hangover_frames = max(int(round(hangover / frame_duration)), 1)
+        self.min_speech_frames = int(round(min_speech / frame_duration))
+        self.max_segment = int(max_segment * sample_rate)
+
+        self.leftover = np.empty(0, dtype=np.float32)
+        self.leftover_offset = 0
+        self._reset_segment()
+
+    def _reset_segment(self):
+        """
+        Forgets the open segment
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.in_speech = False
+        self.segment_start = 0
+        self.segment_parts = []
+        self.segment_length = 0
+        self.speech_frames = 0
+        self.silent_frames = 0
+
+    def _close_segment(self, segments):
+        """
+        Closes the open segment, keeping it if it held enough speech
+
+        Args:
+            segments: List the segment is appended to
+
+        Returns:
+            None
+        """
+        if self.in_speech and self.segment_parts and self.speech_frames >= self.min_speech_frames:
+            segments.append((self.segment_start, np.concatenate(self.segment_parts)))
+        self._reset_segment()
+
+    def feed(self, offset, samples):
+        """
+        Adds a chunk and returns the completed segments
+
+        Args:
+            offset: Sample offset of the first sample of the chunk
+            samples: float array of mono samples, continuing the previous chunk
+
+        Returns:
+            List of (sample offset, samples) of the segments that ended in this chunk
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        segments = []
+        if offset == self.leftover_offset + len(self.leftover):
+            samples = np.concatenate((self.leftover, samples))
+            offset = self.leftover_offset
+        else:
+            # Samples were lost, a segment cannot span the gap
+            self._close_segment(segments)
+
+        frame_length = self.detector.frame_length
+        speech = self.detector.is_speech(samples)
+        used = len(speech) * frame_length
+        self.leftover = samples[used:]
+        self.leftover_offset = offset + used
+
+        for index, is_speech in enumerate(speech):
+            frame_offset = offset + index * frame_length
+            frame = samples[index * frame_length:(index + 1) * frame_length]
+
+            if not self.in_speech:
+                if not is_speech:
+                    continue
+                self.in_speech = True
+                start = max(frame_offset - self.pre_roll, 0)
+                history_offset, pre_roll = self.history(start, frame_offset - start)
+                self.segment_start = history_offset
+                self.segment_parts = [np.asarray(pre_roll, dtype=np.float32).reshape(-1)]
+                self.segment_length = len(self.segment_parts[0])
+
+            self.segment_parts.append(frame)
+            self.segment_length += len(frame)
+            if is_speech:
+                self.speech_frames += 1
+                self.silent_frames = 0
+            else:
+                self.silent_frames += 1
+
+            if self.silent_frames >= self.hangover_frames:
+                self._close_segment(segments)
+            elif self.segment_length >= self.max_segment:
+                next_start = frame_offset + len(frame)
+                self._close_segment(segments)
+                # Speech goes on, continue right after the cut without pre-roll
+                self.in_speech = True
+                self.segment_start = next_start
+        return segments
+
+    def flush(self):
+        """
+        Closes the open segment
+
+        Args:
+            None
+
+        Returns:
+            List with the open segment, if it held any audio and enough speech
+        """
+        segments = []
+        self._close_segment(segments)
+        return segments
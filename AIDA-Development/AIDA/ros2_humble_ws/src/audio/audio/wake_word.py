@@ -0,0 +1,189 @@
+import numpy as np
+
+from audio.mfcc import StreamingMfcc
+
+# The features are computed at this rate, audio at other rates is resampled first
+WAKE_SAMPLE_RATE = 16000
+# Where enroll_wake_word stores the templates and the gate looks for them
+DEFAULT_TEMPLATES = "~/.aida/wake_word.npz"
+
+
+def subsequence_dtw(template, features):
+    """
+    Finds how well a template matches the end of a feature sequence
+
+    Dynamic time warping with a free start in the features: every step of the path
+    advances one template frame and one or two feature frames, or two template frames
+    and one feature frame, so the spoken phrase may be half to twice as long as the
+    template. Rows are computed one template frame at a time over all feature frames.
+
+    Args:
+        template: float array (template frames, coefficients)
+        features: float array (frames, coefficients)
+
+    Returns:
+        float array with, for every feature frame, the mean distance per template frame of
+        the best match of the whole template ending at that frame
+    """
+    distances = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    # Cost of the best path ending at each feature frame, for the last two template frames
+    before = np.full(len(features), np.inf)
+    cost = distances[0].copy()
+    for row in distances[1:]:
+        step = np.full(len(features), np.inf)
+        step[1:] = np.minimum(cost[:-1], before[:-1])
+        step[2:] = np.minimum(step[2:], cost[:-2])
+        before, cost = cost, step + row
+    return cost / len(template)
+
+
+def save_templates(path, templates, threshold):
+    """
+    Stores enrolled templates and their threshold
+
+    Args:
+        path: Path of the .npz file
+        templates: List of float arrays (frames, coefficients)
+        threshold: Largest accepted DTW distance
+
+    Returns:
+        None
+    """
+    np.savez(path, features=np.concatenate(templates),
+             lengths=np.array([len(template) for template in templates]),
+             threshold=np.float32(threshold))
+
+
+def load_templates(path):
+    """
+    Loads templates stored by save_templates
+
+    Args:
+        path: Path of the .npz file
+
+    Returns:
+        Tuple of (list of float32 arrays (frames, coefficients), threshold)
+    """
+    with np.load(path) as data:
+        templates = np.split(data["features"].astype(np.float32), np.cumsum(data["lengths"])[:-1])
+        return templates, float(data["threshold"])
+
+
+def enrollment_threshold(templates, margin=2.0):
+    """
+    Derives the detection threshold from the spread of the enrolled takes
+
+    Every take is matched against the others, and the threshold is margin times the
+    largest distance of a take to its closest other take.
+
+    Args:
+        templates: List of at least two templates
+        margin: Factor above the spread of the takes
+
+    Returns:
+        The threshold
+    """
+    if len(templates) < 2:
+        raise ValueError("At least two recordings are needed to enroll a wake word")
+    closest = []
+    for index, template in enumerate(templates):
+        others = [subsequence_dtw(other, template)[-1]
+                  for other_index, other in enumerate(templates) if other_index != index]
+        closest.append(min(others))
+    return margin * max(closest)
+
+
+class WakeWordDetector:
+    """
+    Detects an enrolled wake phrase in a stream of audio chunks.
+
+    MFCC features are computed incrementally, and the features of twice the longest
+    template are kept between chunks. Every check_interval seconds each template is matched
+    with subsequence DTW against the kept features followed by all the new ones, so a long
+    chunk, such as a whole speech segment holding the phrase and a command, is searched
+    entirely. The phrase is detected when a template matches within the threshold at one
+    of the new frames, and match_end tells where in the chunk it ended. After a detection
+    the features are cleared, so one phrase is detected once.
+
+    Attributes:
+        templates: Templates, float32 arrays (frames, coefficients)
+        threshold: Largest accepted DTW distance
+        last_distance: Best distance of the last check
+        match_end: Index of the sample of the last chunk where the detected phrase ended
+
+    Methods:
+        __init__ : Initializes the detector
+        reset : Clears the features
+        feed : Adds a chunk and tells whether the phrase ended in it
+    """
+
+    def __init__(self, templates, threshold, sample_rate=WAKE_SAMPLE_RATE, check_interval=0.05):
+        """
+        Initializes the WakeWordDetector
+
+        Args:
+            templates: List of templates from load_templates
+            threshold: Largest accepted DTW distance
+            sample_rate: Sample rate of the audio
+            check_interval: Seconds between two matches
+
+        Returns:
+            None
+        """
+        self.templates = [np.asarray(template, dtype=np.float32) for template in templates]
+        self.threshold = threshold
+        self.features = StreamingMfcc(sample_rate)
+        frames_per_second = sample_rate / self.features.hop_length
+        self.window = 2 * max(len(template) for template in self.templates)
+        self.check_frames = max(int(check_interval * frames_per_second), 1)
+        self.last_distance = np.inf
+        self.match_end = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the features
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.features.reset()
+        self.history = np.empty((0, self.features.coefficient_count), dtype=np.float32)
+        self.unchecked = 0
+
+    def feed(self, samples):
+        """
+        Adds a chunk and tells whether the phrase ended in it
+
+        Args:
+            samples: Array of mono samples, int16 or float in [-1, 1]
+
+        Returns:
+            True if the wake phrase was detected, match_end then tells where it ended
+        """
+        # Samples kept by the features from the last chunk, the first new frame starts there
+        kept = len(self.features.pending)
+        frames = self.features.process(samples)
+        features = np.concatenate((self.history, frames))
+        self.history = features[-self.window:]
+        self.unchecked += len(frames)
+        if self.unchecked < self.check_frames or len(features) < self.window // 4:
+            return False
+
+        recent = min(self.unchecked, len(features))
+        self.unchecked = 0
+        costs = np.min([subsequence_dtw(template, features)[-recent:]
+                        for template in self.templates], axis=0)
+        best = int(np.argmin(costs))
+        self.last_distance = float(costs[best])
+        if self.last_distance <= self.threshold:
+            # Frame best - (recent - len(frames)) of this chunk starts that many hops after kept
+            frame = best - (recent - len(frames))
+            end = frame * self.features.hop_length + self.features.frame_length - kept
+            self.match_end = min(max(end, 0), len(samples))
+            self.reset()
+            return True
+        return False
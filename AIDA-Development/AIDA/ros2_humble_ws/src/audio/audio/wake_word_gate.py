@@ -0,0 +1,262 @@
+import os
+import threading
+
+import numpy as np
+
+import rclpy
+from rclpy.node import Node
+from audio_data.msg import AudioData
+
+from audio.pcm import to_float32
+from audio.resampler import StreamingResampler
+from audio.voice_activity import VoiceActivityDetector
+from audio.wake_word import DEFAULT_TEMPLATES, WAKE_SAMPLE_RATE, WakeWordDetector, load_templates
+
+
+class WakeWordGate(Node):
+    """
+    A ROS2 node that only lets audio through after a wake phrase.
+
+    It sits between the mic node and the STT node: every message of the mic is fed to a
+    WakeWordDetector, which matches MFCC features against the templates recorded with
+    enroll_wake_word. Nothing is forwarded until the wake phrase is detected. The audio
+    after the phrase in that message and the messages that follow are republished on
+    output_topic, until listen_silence seconds pass without speech or max_listen seconds
+    in total, and the gate closes again. So Whisper only runs on what is said to the
+    robot, and stays idle while a classroom talks around it.
+
+    The mic runs with capture_mode stream. With vad (its default) the phrase and the
+    command usually arrive in one speech segment, and only the command is forwarded. With
+    raw chunks (vad false), run the STT node with streaming true, so the chunks are joined
+    into utterances instead of transcribed one by one.
+
+    The STT node is pointed at the gate with its audio_topic parameter.
+
+    Attributes:
+        detector : The WakeWordDetector
+        listening : Whether chunks are forwarded
+        stats : Counters since the last statistics log
+
+    Methods:
+        __init__ : Loads the templates and creates the subscription and the publisher
+        audio_callback : Feeds a chunk to the detector, or forwards it while listening
+        _close_if_done : Closes the gate once the speech after the phrase is over
+        _tail : Cuts the start off a message
+        _to_mono : Converts a message to mono float32 samples at 16 kHz
+        _empty_stats : Returns zeroed statistics
+        log_stats : Logs the detections and the share of audio forwarded
+    """
+
+    def __init__(self):
+        """
+        Initializes the WakeWordGate
+
+        Raises:
+            FileNotFoundError when the templates were not enrolled
+        """
+        super().__init__('wake_word_gate', namespace='wake')
+
+        self.declare_parameter("input_topic", "/mic/mic_audio")
+        self.declare_parameter("output_topic", "mic_audio")
+        self.declare_parameter("templates", DEFAULT_TEMPLATES)
+        self.declare_parameter("threshold_scale", 1.0)
+        self.declare_parameter("listen_silence", 1.5)
+        self.declare_parameter("max_listen", 10.0)
+        self.declare_parameter("stats_period", 10.0)
+
+        path = os.path.expanduser(self.get_parameter('templates').get_parameter_value().string_value)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No wake word templates at {path}, record them with enroll_wake_word")
+        templates, threshold = load_templates(path)
+        threshold *= self.get_parameter('threshold_scale').get_parameter_value().double_value
+        self.detector = WakeWordDetector(templates, threshold, WAKE_SAMPLE_RATE)
+        self.vad = VoiceActivityDetector(WAKE_SAMPLE_RATE)
+        self.listen_silence = self.get_parameter('listen_silence').get_parameter_value().double_value
+        self.max_listen = self.get_parameter('max_listen').get_parameter_value().double_value
+        self.get_logger().info(f"WAKE node: Loaded {len(templates)} templates from {path}, threshold {threshold:.2f}")
+
+        self.listening = False
+        self.silence = 0.0
+        self.listened = 0.0
+        self.resampler = None
+        self.next_offset = None
+
+        self.publisher = self.create_publisher(
+            AudioData, self.get_parameter('output_topic').get_parameter_value().string_value, 10)
+        self.subscription = self.create_subscription(
+            AudioData, self.get_parameter('input_topic').get_parameter_value().string_value,
+            self.audio_callback, 10)
+
+        self.stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+        self.stats_timer = self.create_timer(
+            self.get_parameter('stats_period').get_parameter_value().double_value, self.log_stats)
+
+    def audio_callback(self, msg):
+        """
+        Feeds a chunk to the detector, or forwards it while listening
+
+        Args:
+            msg: An AudioData message of the mic stream
+
+        Returns:
+            None
+        """
+        if msg.samples == 0:
+            return
+        samples = self._to_mono(msg)
+        duration = len(samples) / WAKE_SAMPLE_RATE
+        with self.stats_lock:
+            self.stats["audio"] += duration
+
+        # With vad the mic sends nothing between speech segments, count the gap as silence
+        rate = msg.sample_rate or WAKE_SAMPLE_RATE
+        gap = 0.0
+        if self.next_offset is not None:
+            gap = max(msg.sample_offset - self.next_offset, 0) / rate
+        self.next_offset = msg.sample_offset + msg.samples
+        if self.listening and gap:
+            self.silence += gap
+            self.listened += gap
+            self._close_if_done()
+        elif gap:
+            # A phrase cannot span the gap
+            self.detector.reset()
+
+        if not self.listening:
+            if not self.detector.feed(samples):
+                return
+            self.get_logger().info(f"WAKE node: Wake phrase detected, distance {self.detector.last_distance:.2f}")
+            self.listening = True
+            self.silence = 0.0
+            self.listened = 0.0
+            with self.stats_lock:
+                self.stats["detections"] += 1
+            # A speech segment holds the command right after the phrase, forward that part
+            msg = self._tail(msg, self.detector.match_end)
+            samples = samples[self.detector.match_end:]
+            duration = len(samples) / WAKE_SAMPLE_RATE
+            if msg.samples == 0:
+                return
+
+        self.publisher.publish(msg)
+        speech = self.vad.is_speech(samples)
+        frame_duration = self.vad.frame_length / WAKE_SAMPLE_RATE
+        if speech.any():
+            self.silence = (len(speech) - 1 - np.flatnonzero(speech)[-1]) * frame_duration
+        else:
+            self.silence += duration
+        self.listened += duration
+        with self.stats_lock:
+            self.stats["forwarded"] += duration
+        self._close_if_done()
+
+    def _close_if_done(self):
+        """
+        Closes the gate after listen_silence seconds without speech or max_listen seconds
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.silence >= self.listen_silence or self.listened >= self.max_listen:
+            self.get_logger().info(f"WAKE node: Closing the gate after {self.listened:.1f} s")
+            self.listening = False
+            self.detector.reset()
+
+    def _tail(self, msg, start):
+        """
+        Cuts the start off a message
+
+        Args:
+            msg: An AudioData message
+            start: Number of samples at 16 kHz to cut off
+
+        Returns:
+            An AudioData message with the samples after start
+        """
+        rate = msg.sample_rate or WAKE_SAMPLE_RATE
+        frames = min(int(round(start * rate / WAKE_SAMPLE_RATE)), msg.samples)
+        frame_size = len(msg.data) // msg.samples
+        tail = AudioData()
+        tail.header = msg.header
+        tail.data = bytes(msg.data[frames * frame_size:])
+        tail.sample_format = msg.sample_format
+        tail.sample_rate = msg.sample_rate
+        tail.channels = msg.channels
+        tail.samples = msg.samples - frames
+        tail.sample_offset = msg.sample_offset + frames
+        return tail
+
+    def _to_mono(self, msg):
+        """
+        Converts a message to mono float32 samples at 16 kHz
+
+        Args:
+            msg: An AudioData message
+
+        Returns:
+            float32 numpy array
+        """
+        dtype = np.int16 if msg.sample_format == AudioData.FORMAT_INT16 else np.float32
+        samples = to_float32(np.frombuffer(msg.data, dtype=dtype))
+        if msg.channels > 1:
+            samples = samples.reshape(-1, msg.channels).mean(axis=1, dtype=np.float32)
+        rate = msg.sample_rate or WAKE_SAMPLE_RATE
+        if rate == WAKE_SAMPLE_RATE:
+            return samples
+        if self.resampler is None or self.resampler.input_rate != rate:
+            self.resampler = StreamingResampler(rate, WAKE_SAMPLE_RATE)
+        return self.resampler.process(samples)
+
+    @staticmethod
+    def _empty_stats():
+        """
+        Returns zeroed statistics
+
+        Args:
+            None
+
+        Returns:
+            Dictionary of counters
+        """
+        return {"detections": 0, "audio": 0.0, "forwarded": 0.0}
+
+    def log_stats(self):
+        """
+        Logs the detections and the share of audio forwarded to the STT node
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self.stats_lock:
+            stats = self.stats
+            self.stats = self._empty_stats()
+        share = stats["forwarded"] / stats["audio"] * 100 if stats["audio"] else 0.0
+        self.get_logger().info(
+            f"WAKE node: {stats['detections']} detections, forwarded {stats['forwarded']:.1f} s of "
+            f"{stats['audio']:.1f} s ({share:.0f} %)")
+
+
+def main(args=None):
+    rclpy.init(args=args)
+
+    gate = WakeWordGate()
+
+    try:
+        rclpy.spin(gate)
+    except KeyboardInterrupt:
+        gate.get_logger().info('WAKE node: Keyboard interrupt')
+
+    gate.destroy_node()
+
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,8 @@ setup(
     entry_points={
         'console_scripts': [
             'audio_transmit_mic = audio.audio_transmit_mic:main',
+            'wake_word_gate = audio.wake_word_gate:main',
+            'enroll_wake_word = audio.enroll_wake_word:main',
         ],
     },
 )
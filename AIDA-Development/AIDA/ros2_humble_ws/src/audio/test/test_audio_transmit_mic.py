@@ -26,6 +26,14 @@ def test_publisher_creation_success(node):
     created_topic = node.get_topic_names_and_types()
     assert ('/mic/mic_audio', ['audio_data/msg/AudioData']) in created_topic
 
+def test_stream_publisher_creation_success(node):
+    """
+    Tests the creation of the publisher of the live chunks in the AudioTransmitterNode class.
+    """
+    assert node.stream_publisher is not None
+    created_topic = node.get_topic_names_and_types()
+    assert ('/mic/mic_stream', ['audio_data/msg/AudioData']) in created_topic
+
 def test_service_creation_success(node):
     """
     Tests the creation of the service in the STTNode class.
@@ -37,8 +45,36 @@ def test_service_creation_success(node):
 def test_to_msg(node):
     """
     Tests the data_to_msg method in the AudioTransmitterNode class.
-    Tests with a numpy array with 4 elements.
+    Tests with a numpy array with 4 elements, which is sent as int16 by default.
+    """
+
+    data = np.array([0.5, -0.25, 1.0, -1.0], dtype=np.float32)
+
+    result = node._to_msg(data, 16000, 1)
+
+    assert result.samples == len(data)
+    assert result.sample_rate == 16000
+    assert result.channels == 1
+    assert result.sample_format == AudioData.FORMAT_INT16
+    assert np.array_equal(np.frombuffer(result.data, dtype=np.int16), [16384, -8192, 32767, -32768])
+
+def test_to_msg_int16_data(node):
+    """
+    Tests the data_to_msg method in the AudioTransmitterNode class.
+    Tests that int16 samples are sent unchanged.
     """
+    data = np.array([1, -2, 300, -32768], dtype=np.int16)
+
+    result = node._to_msg(data, 16000, 1)
+
+    assert np.array_equal(np.frombuffer(result.data, dtype=np.int16), data)
+
+def test_to_msg_float32(node):
+    """
+    Tests the data_to_msg method in the AudioTransmitterNode class.
+    Tests with a numpy array with 4 elements, sent as float32.
+    """
+    node.sample_format = AudioData.FORMAT_FLOAT32
 
     data = np.ndarray(shape=(4,), dtype=np.float32)
     data[0] = 1.32
@@ -49,8 +85,7 @@ def test_to_msg(node):
     result = node._to_msg(data, 16000, 1)
 
     assert result.samples == len(data)
-    assert result.sample_rate == 16000
-    assert result.channels == 1
+    assert result.sample_format == AudioData.FORMAT_FLOAT32
     assert np.array_equal(np.frombuffer(result.data, dtype=np.float32), data)
 
 def test_to_msg_empty(node):
@@ -64,7 +99,7 @@ def test_to_msg_empty(node):
     assert result.samples == len(data)
     assert result.sample_rate == 16000
     assert result.channels == 1
-    assert np.array_equal(np.frombuffer(result.data, dtype=np.float32), data)
+    assert np.array_equal(np.frombuffer(result.data, dtype=np.int16), data)
 
 def test_start_and_stop_workers(node):
     """
@@ -76,6 +111,7 @@ def test_start_and_stop_workers(node):
     node.stop_workers()
     assert not node.publisher_thread.is_alive()
     assert not node.capturer_thread.is_alive()
+    assert node.capture_queue.empty()
 
 def test_set_recording(node):
     """
@@ -100,4 +136,14 @@ def test_set_recording(node):
     assert response.success == True
     assert response.message == "Successfully set state to: idle"
     assert not node.publisher_thread.is_alive()
-    assert not node.capturer_thread.is_alive()
\ No newline at end of file
+    assert not node.capturer_thread.is_alive()
+
+def test_to_msg_sample_offset(node):
+    """
+    Tests that the data_to_msg method in the AudioTransmitterNode class stores the sample offset of a chunk.
+    """
+    data = np.zeros(1600, dtype=np.float32)
+    result = node._to_msg(data, 16000, 1, sample_offset=3200)
+
+    assert result.sample_offset == 3200
+    assert result.samples == 1600
@@ -0,0 +1,39 @@
+from audio.mfcc import StreamingMfcc, mel_filterbank, mfcc
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def test_chunked_features_match_whole_stream():
+    """
+    Tests that features of chunks are identical to the features of the whole stream.
+    """
+    samples = np.random.default_rng(0).normal(0, 0.1, SAMPLE_RATE).astype(np.float32)
+    whole = mfcc(samples)
+
+    features = StreamingMfcc()
+    chunks = [features.process(samples[start:start + 1234]) for start in range(0, len(samples), 1234)]
+
+    assert whole.shape == (98, 12)
+    np.testing.assert_allclose(np.concatenate(chunks), whole, rtol=1e-4, atol=1e-4)
+
+
+def test_features_do_not_depend_on_loudness():
+    """
+    Tests that a louder copy of a sound has about the same features.
+    """
+    t = np.arange(SAMPLE_RATE // 2) / SAMPLE_RATE
+    tone = (0.05 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    np.testing.assert_allclose(mfcc(tone * 8), mfcc(tone), atol=1e-2)
+
+
+def test_mel_filterbank_covers_spectrum():
+    """
+    Tests that the mel filters are triangles between 0 and 1 spread over the spectrum.
+    """
+    filters = mel_filterbank(SAMPLE_RATE, 512, 40)
+
+    assert filters.shape == (257, 40)
+    assert filters.max() <= 1.0 and filters.min() >= 0.0
+    assert np.all(filters.max(axis=0) > 0.5)
@@ -0,0 +1,29 @@
+from audio.pcm import to_float32, to_int16
+import numpy as np
+
+
+def test_int16_round_trip():
+    """
+    Tests that int16 samples survive a conversion to float32 and back.
+    """
+    samples = np.array([-32768, -1, 0, 1, 32767], dtype=np.int16)
+
+    assert np.array_equal(to_int16(to_float32(samples)), samples)
+
+
+def test_float_is_clipped():
+    """
+    Tests that float samples outside [-1, 1] are clipped instead of wrapping around.
+    """
+    samples = np.array([-2.0, -1.0, 0.5, 1.0, 2.0], dtype=np.float32)
+
+    assert np.array_equal(to_int16(samples), [-32768, -32768, 16384, 32767, 32767])
+
+
+def test_float32_is_not_copied():
+    """
+    Tests that float32 samples are returned as they are.
+    """
+    samples = np.zeros(4, dtype=np.float32)
+
+    assert to_float32(samples) is samples
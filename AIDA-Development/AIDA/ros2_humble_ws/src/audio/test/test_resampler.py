@@ -0,0 +1,76 @@
+from audio.resampler import StreamingResampler, design_filter, resample
+import numpy as np
+import pytest
+
+
+def sine(frequency, sample_rate, seconds=1.0):
+    return np.sin(2 * np.pi * frequency * np.arange(int(sample_rate * seconds)) / sample_rate)
+
+
+@pytest.mark.parametrize("input_rate", [48000, 44100, 22050, 8000])
+def test_tone_keeps_frequency(input_rate):
+    """
+    Tests that a tone in the passband comes out at the same frequency, delayed by the filter.
+    """
+    resampler = StreamingResampler(input_rate, 16000)
+
+    output = resampler.process(sine(1000, input_rate).astype(np.float32))
+
+    expected = np.sin(2 * np.pi * 1000 * (np.arange(len(output)) - resampler.delay) / 16000)
+    assert len(output) == 16000
+    assert np.max(np.abs(output[200:] - expected[200:])) < 1e-3
+
+
+def test_chunks_match_whole_stream():
+    """
+    Tests that resampling in uneven chunks gives the same output as one call.
+    """
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1, 1, (44100, 2)).astype(np.float32)
+    chunked = StreamingResampler(44100, 16000, channels=2)
+
+    parts = [chunked.process(samples[start:start + 1234]) for start in range(0, 44100, 1234)]
+
+    assert np.allclose(np.concatenate(parts), resample(samples, 44100, 16000, channels=2), atol=1e-6)
+    assert chunked.output_position == 16000
+
+
+def test_aliasing_is_suppressed():
+    """
+    Tests that a tone above the output Nyquist frequency is filtered out.
+    """
+    output = resample(sine(9000, 48000), 48000, 16000)
+
+    assert np.sqrt(np.mean(output[100:] ** 2)) < 1e-3
+
+
+def test_same_rate_is_passthrough():
+    """
+    Tests that int16 samples at the output rate are only converted to float.
+    """
+    samples = np.array([16384, -8192, 0], dtype=np.int16)
+
+    assert np.allclose(resample(samples, 16000, 16000), [0.5, -0.25, 0.0])
+
+
+def test_reset_aligns_output_offset():
+    """
+    Tests that after lost input the output offset continues at the matching position.
+    """
+    resampler = StreamingResampler(48000, 16000)
+    resampler.process(np.zeros(4800))
+
+    resampler.reset(9601)
+
+    assert resampler.output_position == 3201
+    assert len(resampler.process(np.zeros(4800))) == 1600
+
+
+def test_filter_phases_have_unit_gain():
+    """
+    Tests that every phase of the filter passes DC unchanged.
+    """
+    phases = design_filter(160, 441)
+
+    assert phases.shape[0] == 160
+    assert np.allclose(phases.sum(axis=1), 1.0, atol=1e-5)
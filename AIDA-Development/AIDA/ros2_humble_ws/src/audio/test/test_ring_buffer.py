@@ -0,0 +1,86 @@
+from audio.ring_buffer import AudioRingBuffer
+import numpy as np
+import pytest
+
+
+def test_read_returns_chunks_in_order():
+    """
+    Tests that chunks are read in order, with continuous offsets, across the wrap of the buffer.
+    """
+    ring = AudioRingBuffer(10)
+    samples = np.arange(25, dtype=np.float32)
+    chunks = []
+    for start in range(0, 25, 5):
+        ring.write(samples[start:start + 5])
+        chunk = ring.read(4)
+        if chunk is not None:
+            chunks.append(chunk)
+
+    offsets = [offset for offset, _ in chunks]
+    assert offsets == [0, 4, 8, 12, 16]
+    assert np.array_equal(np.concatenate([data[:, 0] for _, data in chunks]), samples[:20])
+    assert ring.overruns == 0
+
+
+def test_read_waits_for_full_chunk():
+    """
+    Tests that nothing is returned before a whole chunk is available.
+    """
+    ring = AudioRingBuffer(10)
+    ring.write(np.ones(3, dtype=np.float32))
+
+    assert ring.read(4) is None
+    assert ring.available() == 3
+
+
+def test_overrun_skips_to_oldest_frame():
+    """
+    Tests that a consumer that fell behind loses the oldest frames and counts an overrun.
+    """
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(20, dtype=np.float32))
+
+    offset, data = ring.read(4)
+
+    assert offset == 12
+    assert np.array_equal(data[:, 0], np.arange(12, 16))
+    assert ring.overruns == 1
+
+
+def test_multiple_channels():
+    """
+    Tests that frames of several channels are kept together.
+    """
+    ring = AudioRingBuffer(6, channels=2)
+    frames = np.arange(8, dtype=np.float32).reshape(4, 2)
+    ring.write(frames)
+
+    _, data = ring.read(4)
+
+    assert np.array_equal(data, frames)
+
+
+def test_rejects_chunk_larger_than_capacity():
+    """
+    Tests that a chunk that can never fit is refused.
+    """
+    with pytest.raises(ValueError):
+        AudioRingBuffer(4).read(5)
+
+
+def test_peek_returns_frames_still_in_buffer():
+    """
+    Tests that frames that were already read can be looked at again until they are overwritten.
+    """
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(6, dtype=np.float32))
+    ring.read(6)
+
+    offset, data = ring.peek(2, 3)
+    assert offset == 2
+    assert np.array_equal(data[:, 0], [2, 3, 4])
+
+    ring.write(np.arange(6, 12, dtype=np.float32))
+    offset, data = ring.peek(0, 6)
+    assert offset == 4
+    assert np.array_equal(data[:, 0], [4, 5])
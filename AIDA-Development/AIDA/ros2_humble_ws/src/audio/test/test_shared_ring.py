@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+from audio.shared_ring import SharedAudioRing
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def ring():
+    ring = SharedAudioRing.create(f"aida_test_{os.getpid()}", 1600, sample_rate=16000)
+    yield ring
+    ring.close()
+
+
+def test_reader_sees_written_frames(ring):
+    """
+    Tests that an attached reader reads the frames of the writer.
+    """
+    reader = SharedAudioRing.attach(ring.memory.name)
+    ring.write(np.arange(800, dtype=np.int16))
+
+    offset, frames = reader.read_latest(10)
+
+    assert reader.sample_rate == 16000 and reader.channels == 1
+    assert offset == 640
+    assert np.array_equal(frames[:, 0], np.arange(640, 800))
+    reader.close()
+
+
+def test_read_is_cut_to_frames_in_ring(ring):
+    """
+    Tests that overwritten frames are not returned and the returned offset shows the loss.
+    """
+    ring.write(np.arange(3000, dtype=np.int16))
+
+    offset, frames = ring.read(0, 2000)
+
+    assert offset == 1400
+    assert np.array_equal(frames[:, 0], np.arange(1400, 2000))
+
+
+def test_read_latest_before_enough_audio(ring):
+    """
+    Tests that read_latest returns what was written when less audio is available.
+    """
+    ring.write(np.ones(10, dtype=np.int16))
+
+    offset, frames = ring.read_latest(50)
+
+    assert offset == 0
+    assert len(frames) == 10
+
+
+def test_attach_from_other_process(ring):
+    """
+    Tests that another process can read the ring, and does not remove it when it exits.
+    """
+    ring.write(np.full(160, 7, dtype=np.int16))
+    script = (
+        "from audio.shared_ring import SharedAudioRing\n"
+        f"reader = SharedAudioRing.attach('{ring.memory.name}')\n"
+        "_, frames = reader.read_latest(10)\n"
+        "print(int(frames.sum()))\n"
+        "reader.close()\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+
+    assert result.stdout.strip() == str(7 * 160), result.stderr
+    reader = SharedAudioRing.attach(ring.memory.name)
+    assert reader.read_latest(10)[1].sum() == 7 * 160
+    reader.close()
+
+
+def test_attach_missing_ring():
+    """
+    Tests that attaching to a ring that does not exist fails.
+    """
+    with pytest.raises(FileNotFoundError):
+        SharedAudioRing.attach("aida_test_missing")
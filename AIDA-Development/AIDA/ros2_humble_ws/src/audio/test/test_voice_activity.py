@@ -0,0 +1,91 @@
+from audio.ring_buffer import AudioRingBuffer
+from audio.voice_activity import SpeechSegmenter, VoiceActivityDetector
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def voiced(seconds):
+    """Harmonic signal with a 150 Hz fundamental, like a voiced sound."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20)).astype(np.float32) * 0.1
+
+
+def noise(seconds, level, seed=0):
+    return np.random.default_rng(seed).normal(0, level, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def segment(audio, chunk=1600, **options):
+    """Streams audio through a ring buffer and a segmenter like the mic node does."""
+    ring = AudioRingBuffer(SAMPLE_RATE * 5)
+
+    def history(offset, count):
+        start, frames = ring.peek(offset, count)
+        return start, frames[:, 0]
+
+    segmenter = SpeechSegmenter(VoiceActivityDetector(SAMPLE_RATE), history, **options)
+    segments = []
+    for start in range(0, len(audio), chunk):
+        ring.write(audio[start:start + chunk])
+        offset, frames = ring.read(len(audio[start:start + chunk]))
+        segments += segmenter.feed(offset, frames[:, 0])
+    return segments + segmenter.flush()
+
+
+def test_detects_voiced_frames():
+    """
+    Tests that voiced frames are speech, and quiet or noise-like frames are not.
+    """
+    detector = VoiceActivityDetector(SAMPLE_RATE)
+
+    assert not detector.is_speech(noise(0.5, 0.001)).any()
+    assert detector.is_speech(voiced(0.5)).all()
+    assert not detector.is_speech(noise(0.5, 0.1, seed=1)).any()
+
+
+def test_segment_with_pre_roll_and_hangover():
+    """
+    Tests that one segment is cut around the speech, with pre-roll before and hangover after it.
+    """
+    audio = np.concatenate((noise(1.0, 0.001), voiced(1.0), noise(1.0, 0.001, seed=1)))
+
+    segments = segment(audio, pre_roll=0.3, hangover=0.3)
+
+    assert len(segments) == 1
+    offset, samples = segments[0]
+    assert offset == int(0.7 * SAMPLE_RATE)
+    assert abs(len(samples) - 1.6 * SAMPLE_RATE) <= 320
+    assert np.array_equal(samples, audio[offset:offset + len(samples)])
+
+
+def test_no_segments_without_speech():
+    """
+    Tests that silence and noise do not produce any segments.
+    """
+    audio = np.concatenate((noise(1.0, 0.001), noise(1.0, 0.1, seed=1)))
+
+    assert segment(audio) == []
+
+
+def test_long_speech_is_cut():
+    """
+    Tests that speech longer than max_segment is split into contiguous segments.
+    """
+    audio = np.concatenate((noise(0.5, 0.001), voiced(2.0), noise(0.5, 0.001, seed=1)))
+
+    segments = segment(audio, pre_roll=0.0, max_segment=1.0)
+
+    assert len(segments) == 2
+    assert segments[1][0] == segments[0][0] + len(segments[0][1])
+
+
+def test_flush_right_after_cut():
+    """
+    Tests that flushing right after a max_segment cut does not return an empty segment.
+    """
+    audio = np.concatenate((noise(0.5, 0.001), voiced(1.0)))
+
+    segments = segment(audio, pre_roll=0.0, min_speech=0.0, max_segment=1.0)
+
+    assert len(segments) == 1
+    assert len(segments[0][1]) == SAMPLE_RATE
@@ -0,0 +1,88 @@
+import wave
+
+from audio.enroll_wake_word import main as enroll
+from audio.mfcc import mfcc
+from audio.wake_word import WakeWordDetector, enrollment_threshold, load_templates, subsequence_dtw
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 16000
+WAKE = [200, 300, 250, 400]
+OTHER = [400, 250, 300, 200]
+
+
+def phrase(pitches, tempo=1.0):
+    """Harmonic tones of 0.15 s per pitch, like the syllables of a phrase."""
+    t = np.arange(int(0.15 * tempo * SAMPLE_RATE)) / SAMPLE_RATE
+    return np.concatenate([sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 10)) * 0.1
+                           for pitch in pitches]).astype(np.float32)
+
+
+def noise(seconds, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.005, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def test_subsequence_dtw_finds_template_end():
+    """
+    Tests that a template matches best where it ends in a longer sequence.
+    """
+    features = mfcc(np.concatenate((noise(0.5), phrase(WAKE), noise(0.5, seed=1))))
+    template = mfcc(phrase(WAKE, tempo=1.1))
+
+    costs = subsequence_dtw(template, features)
+    assert abs(int(np.argmin(costs)) - 110) < 10
+
+
+def test_detector_fires_on_wake_phrase_only():
+    """
+    Tests that the wake phrase is detected once, and another phrase is not.
+    """
+    templates = [mfcc(phrase(WAKE, tempo) + noise(0.6 * tempo, seed)) for seed, tempo in enumerate((0.9, 1.0, 1.15))]
+    detector = WakeWordDetector(templates, enrollment_threshold(templates))
+    stream = np.concatenate((noise(1.0), phrase(OTHER), noise(1.0, 1), phrase(WAKE, 1.05), noise(1.0, 2)))
+    stream += noise(len(stream) / SAMPLE_RATE, seed=3)
+
+    detections = [start / SAMPLE_RATE for start in range(0, len(stream), 1600)
+                  if detector.feed(stream[start:start + 1600])]
+
+    assert len(detections) == 1
+    # The phrase runs from 2.6 s to 3.23 s
+    assert 2.9 <= detections[0] <= 3.5
+
+
+def test_enrollment_from_wav_files(tmp_path):
+    """
+    Tests that enrolled templates are stored with their threshold, and one take is refused.
+    """
+    paths = []
+    for index, tempo in enumerate((0.9, 1.0, 1.1)):
+        path = tmp_path / f"take{index}.wav"
+        samples = np.concatenate((noise(0.3, index), phrase(WAKE, tempo), noise(0.3, index + 5)))
+        with wave.open(str(path), "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(48000)
+            file.writeframes((np.repeat(samples, 3) * 32767).astype("<i2").tobytes())
+        paths.append(str(path))
+
+    output = tmp_path / "wake_word.npz"
+    assert enroll(paths + ["--output", str(output)]) == 0
+    templates, threshold = load_templates(output)
+    assert len(templates) == 3 and threshold > 0
+    assert templates[0].shape[1] == 12
+
+    assert enroll(paths[:1] + ["--output", str(tmp_path / "single.npz")]) == 1
+
+
+def test_detector_finds_phrase_in_long_segment():
+    """
+    Tests that a phrase followed by a command in one speech segment is detected, and where it ends.
+    """
+    templates = [mfcc(phrase(WAKE, tempo) + noise(0.6 * tempo, seed)) for seed, tempo in enumerate((0.9, 1.0, 1.15))]
+    detector = WakeWordDetector(templates, enrollment_threshold(templates))
+    wake = np.concatenate((noise(0.3), phrase(WAKE)))
+    segment = np.concatenate((wake, phrase(OTHER), noise(1.5, seed=1)))
+    segment += noise(len(segment) / SAMPLE_RATE, seed=3)
+
+    assert detector.feed(segment)
+    assert abs(detector.match_end - len(wake)) < 0.15 * SAMPLE_RATE
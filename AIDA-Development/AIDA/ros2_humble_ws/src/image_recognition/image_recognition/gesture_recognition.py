@@ -7,6 +7,8 @@ import mediapipe as mp
 from mediapipe.tasks.python import vision
 from mediapipe.framework.formats import landmark_pb2
 
+from aida_models.registry import resolve_model
+
 class GestureRecognizerWrapper:
     """
     Object that performs gesture recognition on the captured images.
@@ -25,7 +27,7 @@ class GestureRecognizerWrapper:
             "num_hands": 2,
         }
 
-        self.model = "..//ros2_humble_ws//src//image_recognition//models//gesture_recognizer.task"
+        self.model = str(resolve_model("gesture_recognizer"))
         self.result = None
         self.result_lock = threading.Lock()
 
@@ -7,6 +7,8 @@ import mediapipe as mp
 from mediapipe.tasks.python import vision
 from mediapipe.framework.formats import landmark_pb2
 
+from aida_models.registry import resolve_model
+
 
 class PoseLandmarkerWrapper:
     """
@@ -22,7 +24,7 @@ class PoseLandmarkerWrapper:
         self.label_font_size = 1
         self.label_thickness = 2
 
-        self.model = "..//src//image_recognition//models//pose_landmarker_lite.task"
+        self.model = str(resolve_model("pose_landmarker_lite"))
         self.result = None
         self.result_lock = threading.Lock()
 
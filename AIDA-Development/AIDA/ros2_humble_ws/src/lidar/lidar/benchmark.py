@@ -0,0 +1,287 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from lidar.collision_guard import CollisionGuard
+from lidar.ld06 import POINTS_PER_PACKET, PacketParser, build_packet, decode_packets
+from lidar.occupancy_grid import OccupancyGrid
+from lidar.scan_filter import SCAN_SIZE, ScanFilter
+from lidar.scan_matcher import ScanOdometry
+from lidar.scan_recorder import ScanRecording
+from lidar.scan_renderer import ScanRenderer
+
+
+def synthetic_scan(rng, dropout=0.1):
+    """
+    Creates a scan of a rectangular room with noise and no-returns
+
+    Args:
+        rng: numpy random Generator
+        dropout: Share of points that are no-returns
+
+    Returns:
+        Tuple of (distances, confidences) as int32 arrays of 360 values
+    """
+    angles = np.radians(np.arange(SCAN_SIZE))
+    # Distance to the walls of a 6 x 4 meter room centered on the robot
+    with np.errstate(divide='ignore'):
+        to_x = np.abs(3000 / np.cos(angles))
+        to_y = np.abs(2000 / np.sin(angles))
+    distances = np.minimum(to_x, to_y) + rng.normal(0, 15, SCAN_SIZE)
+    confidences = rng.integers(150, 230, SCAN_SIZE)
+
+    missing = rng.random(SCAN_SIZE) < dropout
+    distances[missing] = 0
+    confidences[missing] = 0
+    return distances.astype(np.int32), confidences.astype(np.int32)
+
+
+def time_per_call(function, repeats):
+    """
+    Measures the mean wall time of a function
+
+    Args:
+        function: Function without arguments
+        repeats: Number of calls
+
+    Returns:
+        Mean time per call in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def synthetic_stream(scans):
+    """
+    Encodes scans as the serial byte stream of an LD06
+
+    Args:
+        scans: List of (distances, confidences) tuples
+
+    Returns:
+        bytes of all packets, 30 packets per scan
+    """
+    packets = []
+    for distances, confidences in scans:
+        for start in range(0, SCAN_SIZE, POINTS_PER_PACKET):
+            points = slice(start, start + POINTS_PER_PACKET)
+            packets.append(build_packet(start, start + POINTS_PER_PACKET - 1,
+                                        distances[points], confidences[points]))
+    return b''.join(packets)
+
+
+def synthetic_reads(scans, read_size=470):
+    """
+    Splits the synthetic serial stream into reads of 10 packets, like a reader that drains the port
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        read_size: Number of bytes per read
+
+    Returns:
+        List of bytes, one per read
+    """
+    stream = synthetic_stream(scans)
+    return [stream[i:i + read_size] for i in range(0, len(stream), read_size)]
+
+
+def load_recording(path):
+    """
+    Loads the reads and the revolutions of a recording made by the lidar reader
+
+    Args:
+        path: Path of the recording
+
+    Returns:
+        Tuple of (list of bytes, one per recorded read, list of (distances, confidences) tuples)
+    """
+    recording = ScanRecording(path)
+    try:
+        reads = [bytes(payload) for _, payload in recording.raw_chunks()]
+        scans = [(distances.copy(), confidences.copy())
+                 for _, distances, confidences in recording.scans()]
+    finally:
+        recording.close()
+    if not reads or not scans:
+        raise ValueError(
+            f"{path} holds {len(reads)} reads and {len(scans)} scans, both are needed")
+    return reads, scans
+
+
+def benchmark_decoder(reads, repeats):
+    """
+    Measures splitting the serial stream into packets and decoding them
+
+    Args:
+        reads: List of bytes, the stream as it is read from the port
+        repeats: Number of calls per measurement
+
+    Returns:
+        Dictionary of stage name to mean time per read in microseconds
+    """
+    read_cycle = itertools.cycle(reads)
+    parser = PacketParser()
+
+    def feed_and_decode():
+        decode_packets(parser.feed(next(read_cycle)))
+
+    return {"decoder.read": time_per_call(feed_and_decode, repeats)}
+
+
+def benchmark_filter(scans, repeats):
+    """
+    Measures each ScanFilter stage and the whole pipeline
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        repeats: Number of calls per measurement
+
+    Returns:
+        Dictionary of stage name to mean time per scan in microseconds
+    """
+    scan_filter = ScanFilter()
+    distances, confidences = scans[0]
+    distances = distances.astype(np.float32)
+    valid = scan_filter.gate(distances, confidences)
+    median = scan_filter.median(distances, valid)
+
+    scan_cycle = itertools.cycle(scans)
+
+    def pipeline():
+        scan_distances, scan_confidences = next(scan_cycle)
+        scan_filter.apply(scan_distances, scan_confidences)
+
+    return {
+        "filter.gate": time_per_call(lambda: scan_filter.gate(distances, confidences), repeats),
+        "filter.median": time_per_call(lambda: scan_filter.median(distances, valid), repeats),
+        "filter.smooth": time_per_call(lambda: scan_filter.smooth(median, valid), repeats),
+        "filter.apply": time_per_call(pipeline, repeats),
+    }
+
+
+def benchmark_occupancy_grid(scans, repeats):
+    """
+    Measures the integration of scans into an occupancy grid
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        repeats: Number of calls per measurement
+
+    Returns:
+        Dictionary of stage name to mean time per scan in microseconds
+    """
+    grid = OccupancyGrid()
+    scan_cycle = itertools.cycle(scans)
+
+    def integrate():
+        distances, _ = next(scan_cycle)
+        grid.integrate(distances)
+
+    return {"grid.integrate": time_per_call(integrate, repeats)}
+
+
+def benchmark_collision_guard(scans, repeats):
+    """
+    Measures the update of the collision guard with one packet of 12 points
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        repeats: Number of calls per measurement
+
+    Returns:
+        Dictionary of stage name to mean time per packet in microseconds
+    """
+    guard = CollisionGuard()
+    distances, confidences = scans[0]
+    packets = itertools.cycle(range(0, SCAN_SIZE, 12))
+
+    def update():
+        start = next(packets)
+        angles = np.arange(start, start + 12)
+        guard.update(angles, distances[angles], confidences[angles], time.perf_counter())
+
+    return {"guard.update": time_per_call(update, repeats)}
+
+
+def benchmark_scan_odometry(scans, repeats):
+    """
+    Measures the scan odometry, matching each scan against the previous one
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        repeats: Number of calls per measurement
+
+    Returns:
+        Dictionary of stage name to mean time per scan in microseconds
+    """
+    odometry = ScanOdometry()
+    scan_filter = ScanFilter()
+    scan_cycle = itertools.cycle(scans)
+
+    def update():
+        distances, confidences = next(scan_cycle)
+        odometry.update(distances, scan_filter.gate(distances, confidences))
+
+    return {"odometry.update": time_per_call(update, repeats)}
+
+
+def benchmark_renderer(scans, repeats, sizes=(640, 1280)):
+    """
+    Measures the rendering of scans on canvases of different sizes
+
+    Args:
+        scans: List of (distances, confidences) tuples
+        repeats: Number of calls per measurement
+        sizes: Canvas sizes in pixels
+
+    Returns:
+        Dictionary of stage name to mean time per scan in microseconds
+    """
+    results = {}
+    for size in sizes:
+        renderer = ScanRenderer(width=size, height=size)
+        scan_cycle = itertools.cycle(scans)
+
+        def render():
+            distances, _ = next(scan_cycle)
+            renderer.render(distances)
+
+        results[f"render.{size}x{size}"] = time_per_call(render, repeats)
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the lidar processing stages.")
+    parser.add_argument("--repeats", type=int, default=1000, help="calls per measurement")
+    parser.add_argument("--scans", type=int, default=50, help="number of synthetic scans")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic scans")
+    parser.add_argument("--recording", help="recording of the lidar reader to use instead of "
+                                            "synthetic scans (see its record_file parameter)")
+    options = parser.parse_args(args)
+
+    if options.recording:
+        reads, scans = load_recording(options.recording)
+        print(f"{len(reads)} reads and {len(scans)} scans from {options.recording}")
+    else:
+        rng = np.random.default_rng(options.seed)
+        scans = [synthetic_scan(rng) for _ in range(options.scans)]
+        reads = synthetic_reads(scans)
+
+    results = {}
+    results.update(benchmark_decoder(reads, options.repeats))
+    results.update(benchmark_filter(scans, options.repeats))
+    results.update(benchmark_occupancy_grid(scans, options.repeats))
+    results.update(benchmark_collision_guard(scans, options.repeats))
+    results.update(benchmark_scan_odometry(scans, options.repeats))
+    results.update(benchmark_renderer(scans, options.repeats))
+
+    for name, micros in results.items():
+        print(f"{name:<24} {micros:10.1f} us")
+
+
+if __name__ == '__main__':
+    main()
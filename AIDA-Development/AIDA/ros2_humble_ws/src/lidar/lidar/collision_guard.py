@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+
+from lidar.scan_filter import SCAN_SIZE
+
+FRONT = 0
+BACK = 1
+
+
+class CollisionGuard:
+    """
+    Keeps track of obstacles in front of and behind the robot.
+
+    The guard is fed with every decoded lidar packet (a handful of points) instead of
+    whole scans. Each angle belongs to at most one sector (front around 0 degrees, back
+    around 180 degrees), and a packet only triggers a recomputation of the minimum of the
+    sectors it touched, so the state is current within one packet.
+
+    Attributes:
+        sector_min: float32 array with the minimum distance of each sector in millimeters
+        blocked: bool array, True for sectors with an obstacle closer than stop_distance
+        last_change_latency: Seconds from packet arrival to the state change it caused
+
+    Methods:
+        __init__ : Initializes the guard and its sectors
+        update : Updates the guard with the points of one packet
+    """
+
+    def __init__(self, stop_distance=300, half_width=30, min_confidence=100):
+        """
+        Initializes the CollisionGuard
+
+        Args:
+            stop_distance: Obstacles closer than this (in millimeters) block a sector
+            half_width: Half of the width of each sector in degrees
+            min_confidence: Points with lower confidence are ignored (0 disables the check)
+
+        Returns:
+            None
+        """
+        self.stop_distance = stop_distance
+        self.min_confidence = min_confidence
+
+        # No-returns and ignored points count as free, i.e. infinitely far away
+        self.distances = np.full(SCAN_SIZE, np.inf, dtype=np.float32)
+
+        offsets = np.arange(-half_width, half_width + 1)
+        self.sector_angles = [offsets % SCAN_SIZE, (offsets + 180) % SCAN_SIZE]
+        self.sector_of_angle = np.full(SCAN_SIZE, -1, dtype=np.int8)
+        for sector, angles in enumerate(self.sector_angles):
+            self.sector_of_angle[angles] = sector
+
+        self.sector_min = np.full(len(self.sector_angles), np.inf, dtype=np.float32)
+        self.blocked = np.zeros(len(self.sector_angles), dtype=bool)
+        self.last_change_latency = 0.0
+
+    def update(self, angles, distances, confidences=None, arrival_time=None):
+        """
+        Updates the guard with the points of one packet
+
+        Args:
+            angles: Array of angle indices (0-359) of the points
+            distances: Array of distances in millimeters
+            confidences: Array of confidences, or None to skip the confidence check
+            arrival_time: time.perf_counter() when the packet arrived, used for the latency
+
+        Returns:
+            True if the blocked state of any sector changed
+        """
+        angles = np.asarray(angles)
+        distances = np.asarray(distances, dtype=np.float32)
+        valid = distances > 0
+        if confidences is not None and self.min_confidence > 0:
+            valid &= np.asarray(confidences) >= self.min_confidence
+        self.distances[angles] = np.where(valid, distances, np.inf)
+
+        sectors = self.sector_of_angle[angles]
+        for sector in np.unique(sectors[sectors >= 0]):
+            self.sector_min[sector] = self.distances[self.sector_angles[sector]].min()
+
+        blocked = self.sector_min < self.stop_distance
+        if np.array_equal(blocked, self.blocked):
+            return False
+
+        self.blocked = blocked
+        if arrival_time is not None:
+            self.last_change_latency = time.perf_counter() - arrival_time
+        return True
@@ -0,0 +1,178 @@
+import numpy as np
+
+# Packet layout of the LD06 lidar (little endian):
+#   0: header 0x54, 1: ver_len 0x2C (12 points), 2-3: speed in degrees per second,
+#   4-5: start angle in 0.01 degrees, 6-41: 12 points of distance (2 bytes) and
+#   confidence (1 byte), 42-43: end angle in 0.01 degrees, 44-45: timestamp in ms,
+#   46: CRC8 of bytes 0-45
+PACKET_SIZE = 47
+POINTS_PER_PACKET = 12
+HEADER = b'\x54\x2c'
+
+
+def _crc_table():
+    """
+    Builds the CRC8 lookup table of the LD06 (polynomial 0x4D)
+
+    Args:
+        None
+
+    Returns:
+        uint8 array of 256 entries
+    """
+    table = np.zeros(256, dtype=np.uint8)
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x4D) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[value] = crc
+    return table
+
+
+CRC_TABLE = _crc_table()
+
+
+def crc8(packets):
+    """
+    Computes the CRC8 of many packets at once
+
+    Args:
+        packets: uint8 array (n, PACKET_SIZE)
+
+    Returns:
+        uint8 array of n CRCs over bytes 0-45 of each packet
+    """
+    crc = np.zeros(len(packets), dtype=np.uint8)
+    for column in range(PACKET_SIZE - 1):
+        crc = CRC_TABLE[crc ^ packets[:, column]]
+    return crc
+
+
+def build_packet(start_angle, end_angle, distances, confidences, speed=3600, timestamp=0):
+    """
+    Builds a valid LD06 packet, for tests and synthetic data
+
+    Args:
+        start_angle: Angle of the first point in degrees
+        end_angle: Angle of the last point in degrees
+        distances: 12 distances in millimeters
+        confidences: 12 confidences
+        speed: Rotation speed in degrees per second
+        timestamp: Timestamp in milliseconds
+
+    Returns:
+        bytes of one packet
+    """
+    packet = np.zeros(PACKET_SIZE, dtype=np.uint8)
+    packet[0:2] = np.frombuffer(HEADER, dtype=np.uint8)
+    packet[2:4] = np.array([speed], dtype='<u2').view(np.uint8)
+    packet[4:6] = np.array([round(start_angle * 100) % 36000], dtype='<u2').view(np.uint8)
+    points = packet[6:6 + 3 * POINTS_PER_PACKET].reshape(POINTS_PER_PACKET, 3)
+    points[:, 0:2] = np.asarray(distances, dtype='<u2').view(np.uint8).reshape(-1, 2)
+    points[:, 2] = confidences
+    packet[42:44] = np.array([round(end_angle * 100) % 36000], dtype='<u2').view(np.uint8)
+    packet[44:46] = np.array([timestamp % 30000], dtype='<u2').view(np.uint8)
+    packet[46] = crc8(packet[None, :])[0]
+    return packet.tobytes()
+
+
+class PacketParser:
+    """
+    Splits a stream of serial bytes into valid LD06 packets.
+
+    Bytes can be fed in chunks of any size. Complete packets are returned, incomplete
+    ones are kept until the rest arrives. The parser resynchronizes on the packet header
+    and drops packets with a bad CRC, so a lost byte only costs the packets around it.
+
+    Attributes:
+        bad_packets: Number of dropped packets (bad header alignment or CRC)
+
+    Methods:
+        __init__ : Initializes the parser
+        feed : Adds bytes and returns the complete packets
+    """
+
+    def __init__(self):
+        """
+        Initializes the PacketParser
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.buffer = b''
+        self.bad_packets = 0
+
+    def feed(self, data):
+        """
+        Adds bytes and returns the complete packets
+
+        Args:
+            data: bytes read from the serial port
+
+        Returns:
+            uint8 array (n, PACKET_SIZE) of valid packets, in order
+        """
+        data = self.buffer + data
+        blocks = []
+        start = 0
+        while True:
+            start = data.find(HEADER, start)
+            if start < 0 or len(data) - start < PACKET_SIZE:
+                break
+
+            count = (len(data) - start) // PACKET_SIZE
+            block = np.frombuffer(data, dtype=np.uint8, count=count * PACKET_SIZE,
+                                  offset=start).reshape(count, PACKET_SIZE)
+            good = (block[:, 0] == HEADER[0]) & (block[:, 1] == HEADER[1])
+            good &= crc8(block) == block[:, -1]
+            # Keep the leading run of good packets, resynchronize after the first bad one
+            run = count if good.all() else int(np.argmin(good))
+            if run:
+                blocks.append(block[:run])
+            start += run * PACKET_SIZE
+            if run < count:
+                self.bad_packets += 1
+                start += 1
+
+        # Keep the incomplete tail, or the last byte in case it starts a header
+        if start < 0:
+            self.buffer = data[-1:]
+        else:
+            self.buffer = data[start:]
+
+        if not blocks:
+            return np.empty((0, PACKET_SIZE), dtype=np.uint8)
+        return np.concatenate(blocks)
+
+
+def decode_packets(packets, angle_offset=0.0):
+    """
+    Decodes the points of many packets at once
+
+    The angles of the 12 points are spread evenly from the start angle to the end angle
+    of each packet, taking the wrap at 360 degrees into account.
+
+    Args:
+        packets: uint8 array (n, PACKET_SIZE) of valid packets
+        angle_offset: Angle in degrees that is subtracted, to put the front of the robot at 0
+
+    Returns:
+        Tuple of (angles in degrees as float32, distances in millimeters as int32,
+        confidences as int32), each an array of n * 12 values
+    """
+    packets = np.asarray(packets, dtype=np.uint8)
+    words = packets.astype(np.int32)
+
+    start_angle = (words[:, 4] | (words[:, 5] << 8)) / 100.0
+    end_angle = (words[:, 42] | (words[:, 43] << 8)) / 100.0
+    step = ((end_angle - start_angle) % 360.0) / (POINTS_PER_PACKET - 1)
+    angles = start_angle[:, None] + step[:, None] * np.arange(POINTS_PER_PACKET)[None, :]
+    angles = (angles - angle_offset) % 360.0
+
+    points = words[:, 6:6 + 3 * POINTS_PER_PACKET].reshape(-1, POINTS_PER_PACKET, 3)
+    distances = points[:, :, 0] | (points[:, :, 1] << 8)
+    confidences = points[:, :, 2]
+    return angles.astype(np.float32).ravel(), distances.ravel(), confidences.ravel()
@@ -0,0 +1,97 @@
+import rclpy
+from rclpy.node import Node
+from lidar_data.msg import LidarData
+
+from lidar.scan_filter import ScanFilter
+
+
+class LidarFilter(Node):
+    """
+    A ROS2 node for filtering lidar data.
+
+    This node subscribes to the raw lidar scans, filters them with a ScanFilter and
+    publishes the filtered scans, so that consumers do not need to filter them again.
+
+    Attributes:
+        scan_filter: The ScanFilter applied to every scan
+
+    Methods:
+        __init__ : Initializes the node, its parameters, the subscriber and the publisher
+        filter_callback : Filters a received scan and publishes the result
+    """
+
+    def __init__(self):
+        """
+        Initializes the LidarFilter node
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        super().__init__('lidar_filter')
+
+        self.declare_parameter("input_topic", "lidar/data")
+        self.declare_parameter("output_topic", "lidar/filtered")
+        self.declare_parameter("min_confidence", 100)
+        self.declare_parameter("min_range", 20)
+        self.declare_parameter("max_range", 12000)
+        self.declare_parameter("median_window", 3)
+        self.declare_parameter("smoothing_alpha", 0.5)
+
+        self.scan_filter = ScanFilter(
+            min_confidence=self.get_parameter('min_confidence').get_parameter_value().integer_value,
+            min_range=self.get_parameter('min_range').get_parameter_value().integer_value,
+            max_range=self.get_parameter('max_range').get_parameter_value().integer_value,
+            median_window=self.get_parameter('median_window').get_parameter_value().integer_value,
+            smoothing_alpha=self.get_parameter('smoothing_alpha').get_parameter_value().double_value,
+        )
+
+        self.publisher = self.create_publisher(
+            LidarData, self.get_parameter('output_topic').get_parameter_value().string_value, 10)
+        self.subscription = self.create_subscription(
+            LidarData, self.get_parameter('input_topic').get_parameter_value().string_value,
+            self.filter_callback, 10)
+
+    def filter_callback(self, msg):
+        """
+        Filters a received scan and publishes the result
+
+        Args:
+            msg: lidar data as an array
+
+        Returns:
+            None
+        """
+        confidence = msg.confidence if len(msg.confidence) == len(msg.data) else None
+        try:
+            filtered = self.scan_filter.apply(msg.data, confidence)
+        except ValueError as e:
+            self.get_logger().warn(f"Lidar filter: Skipping scan - {e}")
+            return
+
+        out = LidarData()
+        out.header = msg.header
+        out.data = filtered.tolist()
+        out.confidence = msg.confidence
+        out.length = len(out.data)
+        self.publisher.publish(out)
+
+
+def main(args=None):
+    rclpy.init(args=args)
+
+    lidar_filter = LidarFilter()
+
+    try:
+        rclpy.spin(lidar_filter)
+    except KeyboardInterrupt:
+        lidar_filter.get_logger().info('Lidar filter: Keyboard interrupt')
+
+    lidar_filter.destroy_node()
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
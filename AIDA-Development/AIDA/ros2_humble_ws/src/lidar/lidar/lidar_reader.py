@@ -33,12 +33,18 @@ Modified main()
 """
 
 import serial
-from time import sleep
+from time import perf_counter
 import threading
 
+import numpy as np
 import rclpy
+from rclpy.duration import Duration
 from rclpy.node import Node
-from lidar_data.msg import LidarData
+from lidar_data.msg import CollisionState, LidarData
+
+from lidar.collision_guard import BACK, FRONT, CollisionGuard
+from lidar.ld06 import PACKET_SIZE, PacketParser, decode_packets
+from lidar.scan_recorder import ReplaySerial, ScanRecorder
 
 
 
@@ -48,12 +54,22 @@ class Lidar(Node):
     A ROS2 node for transmitting lidar data.
 
     This node initializes a publisher to publish lidar data and captures lidar data from the sensor.
+    The serial port is read with a timeout, draining every byte that is available per wakeup,
+    so that the loop makes few large reads and always notices when it should stop.
+    The raw bytes and the completed revolutions can be recorded, and a recording can be
+    replayed instead of the serial port to run the node without the sensor.
 
     Attributes: 
+        distance: int32 array of the latest distance per degree
+        confidence: int32 array of the latest confidence per degree
+        stats: counters of reads, bytes and packets since the last statistics log
+        recorder: ScanRecorder writing the record_file, or None
 
     Methods: 
         __init__ : Initializes the ros node, as well as the publisher and capturer of lidar data
         publish_lidar_data: publishes lidar data to a ROS2 topic
+        publish_collision_state: publishes the state of the collision guard to a ROS2 topic
+        log_stats: logs the read and packet rates
         read_serial: reads serial data from port
         read_range: reads parameters from serial data and stores it
         start: starts the lidar
@@ -62,11 +78,7 @@ class Lidar(Node):
         terminate: stops and terimnate the process
     """
 
-    distance = [0] * 360
-    confidence = [0] * 360
-    keep_loop = True
-
-    def __init__(self, port, angle_offset=0):
+    def __init__(self, port, angle_offset=0, serial_port=None):
         """
         Initializes the Lidar Node
 
@@ -75,6 +87,7 @@ class Lidar(Node):
         Args:
             port: Serial Port at which lidar is connected
             angle_offset: Angle Offset (to adjust the front at zero) { 0 > angle_offset < 360 }
+            serial_port: Already opened stream to read instead of the port, like a ReplaySerial
 
         Returns:
              None
@@ -82,13 +95,64 @@ class Lidar(Node):
 
         super().__init__("lidar")   
 
-        self.ser = serial.Serial(port=port, baudrate=115200)
+        self.declare_parameter("read_timeout", 0.05)
+        self.declare_parameter("stats_period", 10.0)
+        self.declare_parameter("record_file", "")
+        self.declare_parameter("replay_file", "")
+        self.declare_parameter("replay_realtime", True)
+        self.declare_parameter("replay_loop", False)
+        self.declare_parameter("publish_per_revolution", True)
+
+        self.distance = np.zeros(360, dtype=np.int32)
+        self.confidence = np.zeros(360, dtype=np.int32)
+        self.keep_loop = True
+        self.parser = PacketParser()
+        self.stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+        self.stats_start = perf_counter()
+        self.last_angle = 0.0
+
+        read_timeout = self.get_parameter('read_timeout').get_parameter_value().double_value
+        replay_file = self.get_parameter('replay_file').get_parameter_value().string_value
+        if serial_port is not None:
+            self.ser = serial_port
+        elif replay_file:
+            self.ser = ReplaySerial(
+                replay_file,
+                realtime=self.get_parameter('replay_realtime').get_parameter_value().bool_value,
+                loop=self.get_parameter('replay_loop').get_parameter_value().bool_value,
+                timeout=read_timeout)
+            self.get_logger().info(f"Lidar: Replaying {replay_file}")
+        else:
+            self.ser = serial.Serial(port=port, baudrate=115200, timeout=read_timeout)
+
+        record_file = self.get_parameter('record_file').get_parameter_value().string_value
+        self.recorder = ScanRecorder(record_file) if record_file else None
+        if self.recorder:
+            self.get_logger().info(f"Lidar: Recording to {record_file}")
         self.angle_offset = angle_offset
         self.thread = threading.Thread(target=self.start_loop)
 
+        self.declare_parameter("stop_distance", 300)
+        self.declare_parameter("guard_half_width", 30)
+        self.declare_parameter("guard_min_confidence", 100)
+        self.guard = CollisionGuard(
+            stop_distance=self.get_parameter('stop_distance').get_parameter_value().integer_value,
+            half_width=self.get_parameter('guard_half_width').get_parameter_value().integer_value,
+            min_confidence=self.get_parameter('guard_min_confidence').get_parameter_value().integer_value,
+        )
+        self.guard_stamp = self.get_clock().now().to_msg()
+
         self.publisher_ = self.create_publisher(LidarData, 'lidar/data', 10)
-        timer_period = 1  # seconds
-        self.timer = self.create_timer(timer_period, self.publish_lidar_data)
+        self.collision_publisher = self.create_publisher(CollisionState, 'lidar/collision', 10)
+        # Scan matching needs every revolution, otherwise the scans are published once a second
+        self.publish_per_revolution = self.get_parameter(
+            'publish_per_revolution').get_parameter_value().bool_value
+        if not self.publish_per_revolution:
+            timer_period = 1  # seconds
+            self.timer = self.create_timer(timer_period, self.publish_lidar_data)
+        self.stats_timer = self.create_timer(
+            self.get_parameter('stats_period').get_parameter_value().double_value, self.log_stats)
 
         self.thread.start()
 
@@ -98,7 +162,8 @@ class Lidar(Node):
         """
         Publish lidar data
 
-        This method publishes the lidar data array distance and the length of the array to a ros2 topic
+        This method publishes the lidar data arrays distance and confidence and the length of the
+        arrays to a ros2 topic
 
         Args:
             None
@@ -107,16 +172,84 @@ class Lidar(Node):
              None
         """
         msg = LidarData()
-        msg.data = self.distance
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.header.frame_id = "lidar"
+        msg.data = self.distance.tolist()
+        msg.confidence = self.confidence.tolist()
         msg.length = len(self.distance)
         self.publisher_.publish(msg)
+        # Also repeat the guard state, so late subscribers do not miss a blocked sector
+        self.publish_collision_state()
+
+    def publish_collision_state(self):
+        """
+        Publish the state of the collision guard
+
+        This method publishes which sectors are blocked and the closest obstacles. The stamp
+        is the arrival time of the packet that caused the latest state change.
+
+        Args:
+            None
+
+        Returns:
+             None
+        """
+        msg = CollisionState()
+        msg.header.stamp = self.guard_stamp
+        msg.front_blocked = bool(self.guard.blocked[FRONT])
+        msg.back_blocked = bool(self.guard.blocked[BACK])
+        # A sector without any obstacle has an infinite distance, send the largest float32
+        sector_min = np.minimum(self.guard.sector_min, np.finfo(np.float32).max)
+        msg.front_distance = float(sector_min[FRONT])
+        msg.back_distance = float(sector_min[BACK])
+        self.collision_publisher.publish(msg)
+
+
+    @staticmethod
+    def _empty_stats():
+        """
+        Returns zeroed read statistics
+
+        Args:
+            None
+
+        Returns:
+            Dictionary of counters
+        """
+        return {"reads": 0, "bytes": 0, "max_bytes": 0, "packets": 0}
+
+    def log_stats(self):
+        """
+        Logs the read and packet rates
+
+        This method logs the reads per second, the mean and largest number of bytes per
+        read, the packets per second and the number of dropped packets since the last call
+
+        Args:
+            None
 
+        Returns:
+             None
+        """
+        with self.stats_lock:
+            stats = self.stats
+            self.stats = self._empty_stats()
+            now = perf_counter()
+            elapsed = max(now - self.stats_start, 1e-9)
+            self.stats_start = now
+
+        mean_bytes = stats["bytes"] / stats["reads"] if stats["reads"] else 0.0
+        self.get_logger().info(
+            f"Lidar: {stats['reads'] / elapsed:.1f} reads/s, {mean_bytes:.0f} bytes/read "
+            f"(max {stats['max_bytes']}), {stats['packets'] / elapsed:.1f} packets/s, "
+            f"{self.parser.bad_packets} bad packets in total")
 
     def read_serial(self):
         """
         Reads serial data
 
-        This method reads serial data (47 bytes) from port
+        This method reads every byte waiting on the port, at least one packet (47 bytes).
+        It waits at most the read timeout for data, and returns fewer bytes on timeout.
 
         Args:
             None
@@ -124,42 +257,57 @@ class Lidar(Node):
         Returns:
              serial data
         """
-        data = self.ser.read(47)
-        return data
+        return self.ser.read(max(self.ser.in_waiting, PACKET_SIZE))
 
 
-    def read_range(self, data):
+    def read_range(self, data, arrival_time=None):
         """
         Reads parameters from data
 
-        This method reads parameters from serial data (47 bytes) and stores the distance 
-        points and confidence of the lidar in arrays
+        This method splits serial data into packets, and stores the distance points and
+        confidence of the lidar in arrays. The points are also passed to the collision guard,
+        and a changed guard state is published right away. When the angles wrap around, the
+        arrays hold a complete revolution once the points before the wrap are stored,
+        which is recorded and published (with publish_per_revolution) before the points
+        after the wrap are stored.
 
         Args:
-            data: serial data
+            data: serial data, of any length
+            arrival_time: perf_counter() when the data arrived
 
         Returns:
-             None
+             Number of complete packets in the data
         """
-
-        bytes_data = list(data)
-        length = bytes_data[1]
-        speed = (bytes_data[3] << 8) | bytes_data[2]
-        start_angel = (bytes_data[5] << 8) | bytes_data[4]
-        end_angel = (bytes_data[43] << 8) | bytes_data[42]
-        time_stamp = (bytes_data[45] << 8) | bytes_data[44]
-        crc = bytes_data[1]
-        print("Hello")
-        
-        for i in range(11):       
-            distance = (bytes_data[4 + (i*3)+3] << 8) | (bytes_data[3 + (i*3)+3])
-            confidence = (bytes_data[5 + (i*3)+3]) 
-            startangle = start_angel/100
-            endangle = end_angel/100            
-            angle_offsetted = (endangle + (i*(endangle - startangle)/11)) % 360
-            self.distance[round(angle_offsetted)-1] = distance
-            self.confidence[round(angle_offsetted)-1] = confidence
-       
+        packets = self.parser.feed(data)
+        if len(packets) == 0:
+            return 0
+
+        angles, distances, confidences = decode_packets(packets, self.angle_offset)
+        indices = np.rint(angles).astype(np.int32) % 360
+        start = 0
+        # The points before a wrap still belong to the revolution that it completes
+        for wrap in np.flatnonzero(np.diff(angles, prepend=self.last_angle) < -180):
+            self.distance[indices[start:wrap]] = distances[start:wrap]
+            self.confidence[indices[start:wrap]] = confidences[start:wrap]
+            start = wrap
+            if self.recorder:
+                self.recorder.record_scan(self.distance, self.confidence, arrival_time)
+            if self.publish_per_revolution:
+                self.publish_lidar_data()
+        self.last_angle = angles[-1]
+        self.distance[indices[start:]] = distances[start:]
+        self.confidence[indices[start:]] = confidences[start:]
+
+        if self.guard.update(indices, distances, confidences, arrival_time):
+            # Stamp the state with the arrival of the packet rather than the time of the change
+            latency = Duration(nanoseconds=int(self.guard.last_change_latency * 1e9))
+            self.guard_stamp = (self.get_clock().now() - latency).to_msg()
+            self.publish_collision_state()
+            self.get_logger().info(
+                f"Lidar: Collision guard front blocked: {bool(self.guard.blocked[FRONT])}, "
+                f"back blocked: {bool(self.guard.blocked[BACK])}, "
+                f"decided {self.guard.last_change_latency * 1000:.3f} ms after packet arrival")
+        return len(packets)
 
     def start(self):
         """
@@ -193,50 +341,71 @@ class Lidar(Node):
         """
         Start the lidar loop
 
-        This method start the lidar loop (must be called in a separate thread) 
+        This method start the lidar loop (must be called in a separate thread). Every
+        wakeup drains all waiting bytes, and the loop ends within one read timeout after
+        keep_loop is cleared.
 
         Args:
             None
 
         Returns:
-             None
+            None
         """
         while self.keep_loop:
-            data = self.read_serial()
-            
-            if data[0] != 84:
-                self.ser.write(b'e')
-                self.ser.close()
-                sleep(0.1)
-                self.ser.open()
-                self.ser.write(b'b')
+            try:
+                data = self.read_serial()
+            except (serial.SerialException, TypeError, OSError) as e:
+                # The port was closed while reading
+                if self.keep_loop:
+                    self.get_logger().error(f"Lidar: Failed to read from serial port: {e}")
+                break
+            arrival_time = perf_counter()
+            if not data:
                 continue
-
-            self.read_range(data)
+            if self.recorder:
+                self.recorder.record_raw(data, arrival_time)
+
+            packets = self.read_range(data, arrival_time)
+            with self.stats_lock:
+                self.stats["reads"] += 1
+                self.stats["bytes"] += len(data)
+                self.stats["max_bytes"] = max(self.stats["max_bytes"], len(data))
+                self.stats["packets"] += packets
             
 
     def terminate(self):
         """
         Stop and erminate the process 
 
-        This method stop the lidar, close serial port, and terminate thread
+        This method stops the lidar loop, waits for the thread, stops the lidar, closes
+        the serial port and finishes the recording
         Args:
             None
 
         Returns:
              None
         """
-        self.stop()
         self.keep_loop = False
+        if self.thread.is_alive():
+            self.thread.join()
+        self.stop()
         self.ser.close()
-        self.thread.join()
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
 
 def main(args=None):
     rclpy.init(args=args)
     lidar = Lidar("/dev/ttyUSB0", angle_offset=0)
     lidar.start()
-    rclpy.spin(lidar)
-    rclpy.shutdown()
+    try:
+        rclpy.spin(lidar)
+    except KeyboardInterrupt:
+        lidar.get_logger().info('Lidar: Keyboard interrupt')
+    finally:
+        lidar.terminate()
+        lidar.destroy_node()
+        rclpy.shutdown()
 
  
 
@@ -0,0 +1,162 @@
+import numpy as np
+
+from lidar.scan_filter import SCAN_SIZE
+
+
+class OccupancyGrid:
+    """
+    A log-odds occupancy grid built from lidar scans.
+
+    The grid is square with the origin (the robot start position) in its center.
+    Rays are not traced per scan: every cell that a beam at a given angle passes on its
+    way out is computed once when the grid is created (the ray table). Integrating a scan
+    then only gathers the cells of each ray up to its measured distance and updates those
+    cells, so the cost depends on the length of the rays and not on the size of the grid.
+
+    Alongside the log-odds, a grayscale image (free is white, occupied is black and unknown
+    is gray) is kept up to date for the touched cells only, so publishing never has to
+    convert the whole grid.
+
+    Attributes:
+        log_odds: float32 array (size, size) of log-odds per cell
+        image: uint8 array (size, size) with the occupancy probability as grayscale
+        scans: Number of integrated scans
+
+    Methods:
+        __init__ : Initializes the grid and the ray table
+        clear : Resets every cell to unknown
+        integrate : Integrates a scan taken at a given pose
+        cell_of : Returns the cell of a position in millimeters
+    """
+
+    def __init__(self, size=400, resolution=50, max_range=8000,
+                 log_odds_hit=0.85, log_odds_miss=-0.4, log_odds_limit=5.0):
+        """
+        Initializes the OccupancyGrid
+
+        Args:
+            size: Width and height of the grid in cells
+            resolution: Side of a cell in millimeters
+            max_range: Distances beyond this (in millimeters) are treated as no-returns
+            log_odds_hit: Log-odds added to a cell where a beam ended
+            log_odds_miss: Log-odds added to a cell that a beam passed through
+            log_odds_limit: The log-odds of a cell are clamped to [-limit, limit]
+
+        Returns:
+            None
+        """
+        self.size = size
+        self.resolution = resolution
+        self.max_range = max_range
+        self.log_odds_hit = log_odds_hit
+        self.log_odds_miss = log_odds_miss
+        self.log_odds_limit = log_odds_limit
+
+        self.steps = int(np.ceil(max_range / resolution)) + 1
+        angles = np.radians(np.arange(SCAN_SIZE))[:, None]
+        ray_lengths = np.arange(self.steps)[None, :]
+        # Cell offsets of every step along every ray, shape (360, steps)
+        self.ray_dx = np.rint(ray_lengths * np.cos(angles)).astype(np.int32)
+        self.ray_dy = np.rint(ray_lengths * np.sin(angles)).astype(np.int32)
+        self._step_index = np.arange(self.steps, dtype=np.int32)
+
+        self.clear()
+
+    def clear(self):
+        """
+        Resets every cell to unknown
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.log_odds = np.zeros((self.size, self.size), dtype=np.float32)
+        self.image = np.full((self.size, self.size), 127, dtype=np.uint8)
+        self._free_scratch = np.zeros(self.size * self.size, dtype=bool)
+        self.scans = 0
+
+    def cell_of(self, x, y):
+        """
+        Returns the cell of a position in millimeters
+
+        The x axis points right in the grid and the y axis points up (towards row 0).
+
+        Args:
+            x: x position in millimeters relative to the origin
+            y: y position in millimeters relative to the origin
+
+        Returns:
+            Tuple of (row, column)
+        """
+        center = self.size // 2
+        return center - int(round(y / self.resolution)), center + int(round(x / self.resolution))
+
+    def integrate(self, distances, pose=(0.0, 0.0, 0.0)):
+        """
+        Integrates a scan taken at a given pose
+
+        Args:
+            distances: Sequence of 360 distances in millimeters, one per degree, 0 for no-return
+            pose: Tuple of (x, y, theta) of the robot, in millimeters and radians
+
+        Returns:
+            Number of cell updates, a cell passed by several beams is counted once per beam
+        """
+        distances = np.asarray(distances)
+        if distances.shape != (SCAN_SIZE,):
+            raise ValueError(f"Expected {SCAN_SIZE} distances, got {distances.shape}")
+
+        row, column = self.cell_of(pose[0], pose[1])
+        # The ray table has one ray per degree, so the heading is rounded to whole degrees
+        shift = int(round(np.degrees(pose[2])))
+        angles = (np.arange(SCAN_SIZE) + shift) % SCAN_SIZE
+
+        hit = (distances > 0) & (distances < self.max_range)
+        lengths = np.where(distances > 0, np.minimum(distances, self.max_range), 0)
+        cells = np.minimum((lengths / self.resolution).astype(np.int32), self.steps - 1)
+
+        # Free cells: every step before the end of each beam
+        free_mask = self._step_index[None, :] < cells[:, None]
+        free = self._flat_cells(row - self.ray_dy[angles][free_mask],
+                                column + self.ray_dx[angles][free_mask])
+
+        # Occupied cells: the last step of each beam that returned
+        beams = angles[hit]
+        occupied = self._flat_cells(row - self.ray_dy[beams, cells[hit]],
+                                    column + self.ray_dx[beams, cells[hit]])
+
+        # A cell that a beam ends in is not also cleared by a neighbouring beam
+        self._free_scratch[free] = True
+        self._free_scratch[occupied] = False
+        free = free[self._free_scratch[free]]
+        self._free_scratch[free] = False
+
+        flat_log_odds = self.log_odds.reshape(-1)
+        # Fancy index assignment updates a cell once even if several beams passed it
+        flat_log_odds[free] += self.log_odds_miss
+        flat_log_odds[occupied] += self.log_odds_hit
+
+        touched = np.concatenate((free, occupied))
+        flat_log_odds[touched] = np.clip(flat_log_odds[touched],
+                                         -self.log_odds_limit, self.log_odds_limit)
+        probability = 1.0 / (1.0 + np.exp(flat_log_odds[touched]))
+        self.image.reshape(-1)[touched] = (probability * 255).astype(np.uint8)
+
+        self.scans += 1
+        return len(touched)
+
+    def _flat_cells(self, rows, columns):
+        """
+        Returns the flat indices of the cells inside the grid
+
+        Args:
+            rows: Array of row indices
+            columns: Array of column indices
+
+        Returns:
+            Array of flat indices, cells outside the grid are left out
+        """
+        inside = (rows >= 0) & (rows < self.size) & (columns >= 0) & (columns < self.size)
+        return rows[inside] * self.size + columns[inside]
@@ -0,0 +1,145 @@
+import time
+
+import cv2
+import rclpy
+from rclpy.node import Node
+from geometry_msgs.msg import Pose2D
+from lidar_data.msg import LidarData
+from sensor_msgs.msg import CompressedImage
+
+from lidar.occupancy_grid import OccupancyGrid
+
+
+class OccupancyMapper(Node):
+    """
+    A ROS2 node for mapping the surroundings of the robot as an occupancy grid.
+
+    This node integrates every lidar scan into an OccupancyGrid and publishes the grid as
+    a PNG compressed image (free is white, occupied is black and unknown is gray) at a
+    configurable rate. The grid is only encoded and published when it has changed.
+    Scans are integrated at the latest pose from the scan odometry.
+
+    Attributes:
+        grid: The OccupancyGrid the scans are integrated into
+        pose: Tuple of (x, y, theta) of the robot in millimeters and radians
+
+    Methods:
+        __init__ : Initializes the node, its parameters, the grid, the subscriber and the publisher
+        scan_callback : Integrates a received scan into the grid
+        pose_callback : Stores the latest pose of the robot
+        publish_map : Encodes and publishes the grid
+    """
+
+    def __init__(self):
+        """
+        Initializes the OccupancyMapper node
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        super().__init__('occupancy_mapper')
+
+        self.declare_parameter("input_topic", "lidar/filtered")
+        self.declare_parameter("map_topic", "lidar/map")
+        self.declare_parameter("pose_topic", "lidar/pose")
+        self.declare_parameter("publish_period", 1.0)
+        self.declare_parameter("grid_size", 400)
+        self.declare_parameter("resolution", 50)
+        self.declare_parameter("max_range", 8000)
+
+        self.grid = OccupancyGrid(
+            size=self.get_parameter('grid_size').get_parameter_value().integer_value,
+            resolution=self.get_parameter('resolution').get_parameter_value().integer_value,
+            max_range=self.get_parameter('max_range').get_parameter_value().integer_value,
+        )
+        self.pose = (0.0, 0.0, 0.0)
+        self.changed = False
+        self.integrate_time = 0.0
+
+        self.publisher = self.create_publisher(
+            CompressedImage, self.get_parameter('map_topic').get_parameter_value().string_value, 1)
+        self.subscription = self.create_subscription(
+            LidarData, self.get_parameter('input_topic').get_parameter_value().string_value,
+            self.scan_callback, 10)
+        self.pose_subscription = self.create_subscription(
+            Pose2D, self.get_parameter('pose_topic').get_parameter_value().string_value,
+            self.pose_callback, 10)
+        self.timer = self.create_timer(
+            self.get_parameter('publish_period').get_parameter_value().double_value,
+            self.publish_map)
+
+    def scan_callback(self, msg):
+        """
+        Integrates a received scan into the grid
+
+        Args:
+            msg: lidar data as an array
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        try:
+            self.grid.integrate(msg.data, self.pose)
+        except ValueError as e:
+            self.get_logger().warn(f"Occupancy mapper: Skipping scan - {e}")
+            return
+        self.integrate_time = time.perf_counter() - start
+        self.changed = True
+
+    def pose_callback(self, msg):
+        """
+        Stores the latest pose of the robot
+
+        Args:
+            msg: Pose2D in meters and radians
+
+        Returns:
+            None
+        """
+        self.pose = (msg.x * 1000.0, msg.y * 1000.0, msg.theta)
+
+    def publish_map(self):
+        """
+        Encodes the grid as PNG and publishes it, if it changed since the last publish
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.changed:
+            return
+        self.changed = False
+
+        msg = CompressedImage()
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.header.frame_id = "map"
+        msg.format = "mono8; png compressed"
+        msg.data = cv2.imencode(".png", self.grid.image)[1].tobytes()
+        self.publisher.publish(msg)
+        self.get_logger().debug(
+            f"Occupancy mapper: Published map after {self.grid.scans} scans, "
+            f"last scan took {self.integrate_time * 1000:.2f} ms")
+
+
+def main(args=None):
+    rclpy.init(args=args)
+
+    mapper = OccupancyMapper()
+
+    try:
+        rclpy.spin(mapper)
+    except KeyboardInterrupt:
+        mapper.get_logger().info('Occupancy mapper: Keyboard interrupt')
+
+    mapper.destroy_node()
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SCAN_SIZE = 360  # One measurement per degree
+
+
+class ScanFilter:
+    """
+    Filters lidar scans represented as NumPy arrays.
+
+    A scan is an array of 360 distances in millimeters, one per degree, together with
+    the confidence reported by the sensor for each distance. Distances of 0 are no-returns.
+    Every stage works on whole arrays, and invalid points are reported as 0 in the output.
+
+    Stages (applied in this order):
+        confidence gating: drops points with a confidence below min_confidence
+        range clipping: drops points outside [min_range, max_range]
+        angular median: replaces each point by the median of the valid points in a
+            circular window of median_window degrees
+        temporal smoothing: exponential moving average across rotations with factor
+            smoothing_alpha (1.0 disables smoothing)
+
+    Methods:
+        __init__ : Initializes the filter and its configuration
+        reset : Forgets the temporal smoothing state
+        gate : Returns the mask of points that pass confidence gating and range clipping
+        median : Applies the angular median to a scan
+        smooth : Applies the temporal smoothing to a scan
+        apply : Runs all stages on a scan
+    """
+
+    def __init__(self, min_confidence=100, min_range=20, max_range=12000,
+                 median_window=3, smoothing_alpha=0.5):
+        """
+        Initializes the ScanFilter
+
+        Args:
+            min_confidence: Lowest confidence kept (0 disables gating)
+            min_range: Shortest distance kept in millimeters
+            max_range: Longest distance kept in millimeters
+            median_window: Width of the angular median in degrees, odd (1 disables the median)
+            smoothing_alpha: Weight of the newest scan in the moving average, in (0, 1]
+
+        Returns:
+            None
+        """
+        if median_window < 1 or median_window % 2 == 0:
+            raise ValueError("median_window must be a positive odd number")
+        if not 0.0 < smoothing_alpha <= 1.0:
+            raise ValueError("smoothing_alpha must be in (0, 1]")
+
+        self.min_confidence = min_confidence
+        self.min_range = min_range
+        self.max_range = max_range
+        self.median_window = median_window
+        self.smoothing_alpha = smoothing_alpha
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the temporal smoothing state
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._previous = np.zeros(SCAN_SIZE, dtype=np.float32)
+        self._previous_valid = np.zeros(SCAN_SIZE, dtype=bool)
+
+    def gate(self, distances, confidences=None):
+        """
+        Returns the mask of points that pass confidence gating and range clipping
+
+        Args:
+            distances: Array of distances in millimeters
+            confidences: Array of confidences, or None to skip confidence gating
+
+        Returns:
+            Boolean array, True for valid points
+        """
+        valid = (distances >= max(self.min_range, 1)) & (distances <= self.max_range)
+        if confidences is not None and self.min_confidence > 0:
+            valid &= confidences >= self.min_confidence
+        return valid
+
+    def median(self, distances, valid):
+        """
+        Applies the angular median to a scan
+
+        The median of each window only includes valid points. Points that are invalid
+        themselves stay invalid, so the median never invents returns.
+
+        Args:
+            distances: Array of distances in millimeters
+            valid: Boolean array of valid points
+
+        Returns:
+            Array of filtered distances as float32
+        """
+        if self.median_window == 1:
+            return distances.astype(np.float32)
+
+        half = self.median_window // 2
+        # Invalid points become +inf so that they sort after every valid point
+        values = np.where(valid, distances, np.inf).astype(np.float32)
+        padded = np.concatenate((values[-half:], values, values[:half]))
+        windows = np.sort(sliding_window_view(padded, self.median_window), axis=1)
+
+        valid_count = np.isfinite(windows).sum(axis=1)
+        middle = np.maximum(valid_count - 1, 0) // 2
+        result = np.take_along_axis(windows, middle[:, None], axis=1)[:, 0]
+        return np.where(valid, result, 0.0).astype(np.float32)
+
+    def smooth(self, distances, valid):
+        """
+        Applies the temporal smoothing to a scan
+
+        Points that were invalid in the previous rotation start over from the new value.
+
+        Args:
+            distances: Array of distances in millimeters
+            valid: Boolean array of valid points
+
+        Returns:
+            Array of smoothed distances as float32
+        """
+        both_valid = valid & self._previous_valid
+        blended = self.smoothing_alpha * distances + (1.0 - self.smoothing_alpha) * self._previous
+        result = np.where(both_valid, blended, distances)
+        result = np.where(valid, result, 0.0).astype(np.float32)
+
+        self._previous = result
+        self._previous_valid = valid
+        return result
+
+    def apply(self, distances, confidences=None):
+        """
+        Runs all stages on a scan
+
+        Args:
+            distances: Sequence of 360 distances in millimeters
+            confidences: Sequence of 360 confidences, or None to skip confidence gating
+
+        Returns:
+            Array of 360 filtered distances as int32, 0 where no valid point remains
+        """
+        distances = np.asarray(distances, dtype=np.float32)
+        if distances.shape != (SCAN_SIZE,):
+            raise ValueError(f"Expected {SCAN_SIZE} distances, got {distances.shape}")
+        if confidences is not None:
+            confidences = np.asarray(confidences)
+            if confidences.shape != (SCAN_SIZE,):
+                confidences = None
+
+        valid = self.gate(distances, confidences)
+        filtered = self.median(distances, valid)
+        filtered = self.smooth(filtered, valid)
+        return np.rint(filtered).astype(np.int32)
@@ -0,0 +1,329 @@
+import math
+
+import numpy as np
+
+from lidar.scan_filter import SCAN_SIZE
+
+_ANGLES = np.radians(np.arange(SCAN_SIZE))
+_COS = np.cos(_ANGLES).astype(np.float32)
+_SIN = np.sin(_ANGLES).astype(np.float32)
+
+
+def scan_to_points(distances, valid=None):
+    """
+    Converts a scan to points in the frame of the robot
+
+    The x axis points towards angle 0 and the y axis towards angle 90, like the
+    occupancy grid.
+
+    Args:
+        distances: Sequence of 360 distances in millimeters, 0 for no-return
+        valid: bool array of the points to keep, or None to keep every return
+
+    Returns:
+        float32 array (n, 2) of points in millimeters
+    """
+    distances = np.asarray(distances, dtype=np.float32)
+    if distances.shape != (SCAN_SIZE,):
+        raise ValueError(f"Expected {SCAN_SIZE} distances, got {distances.shape}")
+    keep = distances > 0
+    if valid is not None:
+        keep &= valid
+    return np.stack((distances[keep] * _COS[keep], distances[keep] * _SIN[keep]), axis=1)
+
+
+def compose(pose, delta):
+    """
+    Applies a motion expressed in the frame of the robot to a pose
+
+    Args:
+        pose: Tuple of (x, y, theta) in millimeters and radians
+        delta: Tuple of (x, y, theta) of the motion, relative to pose
+
+    Returns:
+        The new pose as a tuple of (x, y, theta), theta wrapped to [-pi, pi)
+    """
+    cos, sin = math.cos(pose[2]), math.sin(pose[2])
+    theta = (pose[2] + delta[2] + math.pi) % (2 * math.pi) - math.pi
+    return (pose[0] + cos * delta[0] - sin * delta[1],
+            pose[1] + sin * delta[0] + cos * delta[1],
+            theta)
+
+
+class ScanMatcher:
+    """
+    Estimates the motion between two scans with a vectorized point-to-line ICP.
+
+    The reference scan is stored in a grid hash: its points are sorted by the key of the
+    cell they fall in, so the points of any cell are a contiguous slice found with a
+    binary search. Nearest neighbours are searched in the 3 x 3 cells around each query
+    point, at most max_per_cell points per cell, all queries at once. With a cell as
+    large as the correspondence distance this finds every neighbour that can be accepted.
+
+    Each iteration minimizes the distance of the points to the lines through their
+    neighbours (the surface normal comes from the neighbouring points of the reference
+    scan), linearized around the current estimate, which is a 3 x 3 linear system. Walls
+    are matched along their normal only, so a point is free to slide along a wall and the
+    iterations converge much faster than with point-to-point distances.
+
+    Attributes:
+        iterations: Number of iterations of the last match
+        error: Root mean square point-to-line distance of the last iteration, in mm
+        matched: Number of matched points in the last iteration of the last match
+
+    Methods:
+        __init__ : Initializes the matcher and its configuration
+        set_reference : Stores the scan that later scans are matched against
+        nearest : Finds the nearest reference point of each query point
+        match : Estimates the motion from the reference to a scan
+    """
+
+    _KEY_SPAN = 1 << 20  # Cell coordinates are offset into [0, _KEY_SPAN) for the keys
+
+    def __init__(self, max_correspondence=300.0, max_iterations=20, min_points=30,
+                 max_per_cell=8, tolerance=(0.5, 1e-4)):
+        """
+        Initializes the ScanMatcher
+
+        Args:
+            max_correspondence: Points farther apart (in millimeters) are not matched, also the
+                side of the hash cells
+            max_iterations: Largest number of ICP iterations
+            min_points: Fewest matched points for a valid estimate
+            max_per_cell: Largest number of reference points considered per cell
+            tolerance: Tuple of (millimeters, radians), the iterations stop when an update is
+                smaller than both
+
+        Returns:
+            None
+        """
+        if max_correspondence <= 0:
+            raise ValueError("max_correspondence must be positive")
+        self.max_correspondence = float(max_correspondence)
+        self.max_iterations = max_iterations
+        self.min_points = min_points
+        self.max_per_cell = max_per_cell
+        self.tolerance = tolerance
+
+        neighbours = np.arange(-1, 2)
+        self._neighbour_keys = (neighbours[:, None] * self._KEY_SPAN + neighbours[None, :]).ravel()
+        self._slots = np.arange(max_per_cell, dtype=np.int32)
+
+        self.reference = np.empty((0, 2), dtype=np.float32)
+        self.normals = np.empty((0, 2), dtype=np.float32)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._reference_x = self._reference_y = np.full(1, np.inf, dtype=np.float32)
+        self.iterations = 0
+        self.error = 0.0
+        self.matched = 0
+
+    def _cell_keys(self, points):
+        """
+        Returns the hash key of the cell of each point
+
+        Args:
+            points: float array (n, 2) in millimeters
+
+        Returns:
+            int64 array of n keys
+        """
+        cells = np.floor(points / self.max_correspondence).astype(np.int64) + self._KEY_SPAN // 2
+        return cells[:, 0] * self._KEY_SPAN + cells[:, 1]
+
+    def set_reference(self, points):
+        """
+        Stores the scan that later scans are matched against
+
+        The normal of each point is perpendicular to the line through its two neighbours in
+        the scan. Points whose neighbours are farther apart than twice the correspondence
+        distance (edges, gaps) get no normal and are never matched.
+
+        Args:
+            points: float array (n, 2) of points in millimeters, in the order of their angles
+
+        Returns:
+            None
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        tangents = np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)
+        lengths = np.hypot(tangents[:, 0], tangents[:, 1])
+        usable = (lengths > 0) & (lengths < 2 * self.max_correspondence)
+        points = points[usable]
+        tangents = tangents[usable] / lengths[usable, None]
+        normals = np.stack((-tangents[:, 1], tangents[:, 0]), axis=1)
+
+        keys = self._cell_keys(points)
+        order = np.argsort(keys, kind='stable')
+        self.reference = points[order]
+        self.normals = normals[order]
+        self._keys = keys[order]
+        self._reference_x = np.append(self.reference[:, 0], np.float32(np.inf))
+        self._reference_y = np.append(self.reference[:, 1], np.float32(np.inf))
+
+    def nearest(self, points):
+        """
+        Finds the nearest reference point of each query point
+
+        Args:
+            points: float array (m, 2) of query points in millimeters
+
+        Returns:
+            Tuple of (int array of m reference indices, float32 array of m squared distances),
+            the distance is infinite where no reference point is within reach
+        """
+        if len(self.reference) == 0 or len(points) == 0:
+            return np.zeros(len(points), dtype=np.intp), np.full(len(points), np.inf, np.float32)
+
+        keys = self._cell_keys(points)[:, None] + self._neighbour_keys[None, :]
+        starts = np.searchsorted(self._keys, keys, side='left').astype(np.int32)
+        ends = np.minimum(np.searchsorted(self._keys, keys, side='right').astype(np.int32),
+                          starts + self.max_per_cell)
+
+        # Candidates (m, 9 * max_per_cell). Slots beyond the end of a cell are clamped to the
+        # end, which is another real point or the sentinel after the last reference point
+        # (infinitely far away). Either way the nearest candidate is still a true neighbour.
+        candidates = np.minimum(starts[:, :, None] + self._slots[None, None, :],
+                                ends[:, :, None]).reshape(len(points), -1)
+
+        # Gathering from 1D arrays is several times faster than from the (n, 2) array
+        offset_x = self._reference_x.take(candidates) - points[:, 0:1]
+        offset_y = self._reference_y.take(candidates) - points[:, 1:2]
+        squared = offset_x * offset_x + offset_y * offset_y
+
+        best = np.argmin(squared, axis=1)
+        rows = np.arange(len(points))
+        return candidates[rows, best], squared[rows, best]
+
+    def match(self, points, initial=(0.0, 0.0, 0.0)):
+        """
+        Estimates the motion from the reference to a scan
+
+        The result maps the points of the scan into the frame of the reference, which is the
+        motion of the robot between the two scans expressed in the frame of the reference.
+
+        Args:
+            points: float array (n, 2) of the new scan in millimeters
+            initial: Tuple of (x, y, theta) used as the first guess, e.g. the last motion
+
+        Returns:
+            Tuple of (x, y, theta) in millimeters and radians, or None if too few points matched
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        x, y, theta = initial
+        self.iterations = 0
+        limit = self.max_correspondence ** 2
+
+        for iteration in range(1, self.max_iterations + 1):
+            # Kept up to date here, since the loop also ends in the returns below
+            self.iterations = iteration
+            cos, sin = math.cos(theta), math.sin(theta)
+            moved = points @ np.array([[cos, sin], [-sin, cos]], dtype=np.float32)
+            moved += np.array([x, y], dtype=np.float32)
+
+            indices, squared = self.nearest(moved)
+            matched = squared < limit
+            self.matched = int(matched.sum())
+            if self.matched < self.min_points:
+                return None
+
+            source = moved[matched]
+            normals = self.normals[indices[matched]]
+            residuals = np.einsum('nd,nd->n', normals, source - self.reference[indices[matched]])
+            self.error = float(np.sqrt(np.mean(residuals ** 2)))
+
+            # Rows of the linearized system: a small rotation moves p by theta * (-p_y, p_x)
+            jacobian = np.empty((len(source), 3), dtype=np.float64)
+            jacobian[:, :2] = normals
+            jacobian[:, 2] = normals[:, 1] * source[:, 0] - normals[:, 0] * source[:, 1]
+            try:
+                step_x, step_y, step_theta = np.linalg.solve(jacobian.T @ jacobian,
+                                                             -jacobian.T @ residuals)
+            except np.linalg.LinAlgError:
+                # Degenerate geometry, e.g. a single wall
+                return None
+            cos_step, sin_step = math.cos(step_theta), math.sin(step_theta)
+
+            # Apply the step on top of the current estimate, both are in the reference frame
+            x, y = cos_step * x - sin_step * y + step_x, sin_step * x + cos_step * y + step_y
+            theta += step_theta
+
+            if (math.hypot(step_x, step_y) < self.tolerance[0]
+                    and abs(step_theta) < self.tolerance[1]):
+                break
+
+        theta = (theta + math.pi) % (2 * math.pi) - math.pi
+        return float(x), float(y), float(theta)
+
+
+class ScanOdometry:
+    """
+    Tracks the pose of the robot by matching every scan against the previous one.
+
+    The last motion is used as the first guess for the next match, since the robot moves
+    about the same between two rotations. When a scan cannot be matched, the pose is kept
+    and the scan becomes the new reference.
+
+    Attributes:
+        pose: Tuple of (x, y, theta) in millimeters and radians, relative to the first scan
+        failures: Number of scans that could not be matched
+
+    Methods:
+        __init__ : Initializes the odometry
+        reset : Sets the pose back to the origin and forgets the reference
+        update : Matches a scan and updates the pose
+    """
+
+    def __init__(self, matcher=None):
+        """
+        Initializes the ScanOdometry
+
+        Args:
+            matcher: ScanMatcher to use, a default one if None
+
+        Returns:
+            None
+        """
+        self.matcher = matcher if matcher is not None else ScanMatcher()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets the pose back to the origin and forgets the reference
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.pose = (0.0, 0.0, 0.0)
+        self.motion = (0.0, 0.0, 0.0)
+        self.has_reference = False
+        self.failures = 0
+
+    def update(self, distances, valid=None):
+        """
+        Matches a scan and updates the pose
+
+        Args:
+            distances: Sequence of 360 distances in millimeters, 0 for no-return
+            valid: bool array of the points to use, or None to use every return
+
+        Returns:
+            True if the scan was matched, False for the first scan or a failed match
+        """
+        points = scan_to_points(distances, valid)
+        matched = False
+        if self.has_reference:
+            motion = self.matcher.match(points, self.motion)
+            if motion is None:
+                self.failures += 1
+                self.motion = (0.0, 0.0, 0.0)
+            else:
+                self.pose = compose(self.pose, motion)
+                self.motion = motion
+                matched = True
+
+        self.matcher.set_reference(points)
+        self.has_reference = True
+        return matched
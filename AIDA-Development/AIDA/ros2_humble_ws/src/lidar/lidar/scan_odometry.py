@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+import rclpy
+from rclpy.node import Node
+from geometry_msgs.msg import Pose2D
+from lidar_data.msg import LidarData
+
+from lidar.scan_filter import ScanFilter
+from lidar.scan_matcher import ScanMatcher, ScanOdometry
+
+
+class ScanOdometryNode(Node):
+    """
+    A ROS2 node for estimating the pose of the robot from consecutive lidar scans.
+
+    This node matches every scan against the previous one with a ScanMatcher and publishes
+    the accumulated pose (x and y in meters, theta in radians, relative to where the node
+    started) once per scan. The raw scans are used, gated by confidence and range only,
+    since the temporal smoothing of the filtered scans would blur the motion.
+
+    Attributes:
+        odometry: The ScanOdometry tracking the pose
+
+    Methods:
+        __init__ : Initializes the node, its parameters, the subscriber and the publisher
+        scan_callback : Matches a received scan and publishes the pose
+    """
+
+    def __init__(self):
+        """
+        Initializes the ScanOdometryNode
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        super().__init__('scan_odometry')
+
+        self.declare_parameter("input_topic", "lidar/data")
+        self.declare_parameter("pose_topic", "lidar/pose")
+        self.declare_parameter("min_confidence", 100)
+        self.declare_parameter("min_range", 20)
+        self.declare_parameter("max_range", 12000)
+        self.declare_parameter("max_correspondence", 300.0)
+        self.declare_parameter("max_iterations", 20)
+        self.declare_parameter("time_budget", 0.02)
+
+        self.scan_filter = ScanFilter(
+            min_confidence=self.get_parameter('min_confidence').get_parameter_value().integer_value,
+            min_range=self.get_parameter('min_range').get_parameter_value().integer_value,
+            max_range=self.get_parameter('max_range').get_parameter_value().integer_value,
+        )
+        self.odometry = ScanOdometry(ScanMatcher(
+            max_correspondence=self.get_parameter(
+                'max_correspondence').get_parameter_value().double_value,
+            max_iterations=self.get_parameter(
+                'max_iterations').get_parameter_value().integer_value,
+        ))
+        self.time_budget = self.get_parameter('time_budget').get_parameter_value().double_value
+
+        self.publisher = self.create_publisher(
+            Pose2D, self.get_parameter('pose_topic').get_parameter_value().string_value, 10)
+        self.subscription = self.create_subscription(
+            LidarData, self.get_parameter('input_topic').get_parameter_value().string_value,
+            self.scan_callback, 10)
+
+    def scan_callback(self, msg):
+        """
+        Matches a received scan and publishes the pose
+
+        Args:
+            msg: lidar data as an array
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        distances = np.asarray(msg.data, dtype=np.int32)
+        confidence = None
+        if len(msg.confidence) == len(msg.data):
+            confidence = np.asarray(msg.confidence, dtype=np.int32)
+        failures = self.odometry.failures
+        try:
+            valid = self.scan_filter.gate(distances, confidence)
+            self.odometry.update(distances, valid)
+        except ValueError as e:
+            self.get_logger().warn(f"Scan odometry: Skipping scan - {e}")
+            return
+        elapsed = time.perf_counter() - start
+
+        x, y, theta = self.odometry.pose
+        pose = Pose2D()
+        pose.x = x / 1000.0
+        pose.y = y / 1000.0
+        pose.theta = theta
+        self.publisher.publish(pose)
+
+        matcher = self.odometry.matcher
+        if elapsed > self.time_budget:
+            self.get_logger().warn(
+                f"Scan odometry: Matching took {elapsed * 1000:.1f} ms "
+                f"({matcher.iterations} iterations), over the budget of "
+                f"{self.time_budget * 1000:.0f} ms")
+        if self.odometry.failures > failures:
+            self.get_logger().debug(
+                f"Scan odometry: Scan not matched ({matcher.matched} points), "
+                f"{self.odometry.failures} failures in total")
+
+
+def main(args=None):
+    rclpy.init(args=args)
+
+    odometry = ScanOdometryNode()
+
+    try:
+        rclpy.spin(odometry)
+    except KeyboardInterrupt:
+        odometry.get_logger().info('Scan odometry: Keyboard interrupt')
+
+    odometry.destroy_node()
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from lidar.scan_filter import SCAN_SIZE
+
+# A recording is one append-only file:
+#   file header: magic (8 bytes), end of the valid data (uint64)
+#   records:     type (uint16), reserved (uint16), payload length (uint32),
+#                arrival time in seconds since the start of the recording (float64),
+#                payload padded to a multiple of 8 bytes
+# RAW records hold bytes as read from the serial port, SCAN records hold one decoded
+# revolution as int32 distances followed by int32 confidences (360 each).
+# The offsets of the SCAN records are also stored in "<file>.idx" as uint64, so scans
+# can be reached without walking the records.
+MAGIC = b'AIDALDR1'
+FILE_HEADER_FORMAT = "<8sQ"
+FILE_HEADER_SIZE = struct.calcsize(FILE_HEADER_FORMAT)
+RECORD_HEADER_FORMAT = "<HHId"
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+
+RECORD_RAW = 1
+RECORD_SCAN = 2
+
+
+def _padded(length):
+    """
+    Returns the length rounded up to a multiple of 8
+
+    Args:
+        length: Length in bytes
+
+    Returns:
+        Padded length in bytes
+    """
+    return (length + 7) & ~7
+
+
+class ScanRecorder:
+    """
+    Records raw lidar bytes and decoded scans to a memory-mapped, append-only file.
+
+    The file grows in steps of grow_size, and the end of the valid data is kept in the
+    file header, so a recording that was cut short can still be read.
+
+    Attributes:
+        scan_offsets: Offsets of the SCAN records (the revolution index)
+
+    Methods:
+        __init__ : Creates the recording file
+        record_raw : Appends raw serial bytes
+        record_scan : Appends a decoded revolution
+        close : Finishes the recording and writes the revolution index
+    """
+
+    def __init__(self, path, grow_size=16 * 1024 * 1024):
+        """
+        Creates the recording file, an existing file and its index are overwritten
+
+        Args:
+            path: Path of the recording
+            grow_size: Number of bytes the file is extended by when it is full
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.grow_size = grow_size
+        self.scan_offsets = []
+        self.start_time = time.perf_counter()
+
+        # The index of an earlier recording at this path would not match the new records
+        if os.path.exists(path + '.idx'):
+            os.remove(path + '.idx')
+        self.file = open(path, 'w+b')
+        self.size = grow_size
+        self.file.truncate(self.size)
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self.end = FILE_HEADER_SIZE
+        self._write_file_header()
+
+    def _write_file_header(self):
+        """
+        Writes the magic and the end of the valid data
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        struct.pack_into(FILE_HEADER_FORMAT, self.map, 0, MAGIC, self.end)
+
+    def _append(self, record_type, arrival_time, payload):
+        """
+        Appends a record
+
+        Args:
+            record_type: RECORD_RAW or RECORD_SCAN
+            arrival_time: perf_counter() when the data arrived, or None for now
+            payload: bytes-like payload
+
+        Returns:
+            Offset of the record
+        """
+        if arrival_time is None:
+            arrival_time = time.perf_counter()
+        length = len(payload)
+        needed = self.end + RECORD_HEADER_SIZE + _padded(length)
+        if needed > self.size:
+            self.map.close()
+            self.size = needed + self.grow_size
+            self.file.truncate(self.size)
+            self.map = mmap.mmap(self.file.fileno(), self.size)
+
+        offset = self.end
+        struct.pack_into(RECORD_HEADER_FORMAT, self.map, offset, record_type, 0, length,
+                         arrival_time - self.start_time)
+        start = offset + RECORD_HEADER_SIZE
+        self.map[start:start + length] = payload
+        self.end = needed
+        self._write_file_header()
+        return offset
+
+    def record_raw(self, data, arrival_time=None):
+        """
+        Appends raw serial bytes
+
+        Args:
+            data: bytes read from the serial port
+            arrival_time: perf_counter() when the bytes arrived
+
+        Returns:
+            None
+        """
+        self._append(RECORD_RAW, arrival_time, data)
+
+    def record_scan(self, distances, confidences, arrival_time=None):
+        """
+        Appends a decoded revolution
+
+        Args:
+            distances: 360 distances in millimeters
+            confidences: 360 confidences
+            arrival_time: perf_counter() when the revolution was completed
+
+        Returns:
+            None
+        """
+        scan = np.empty((2, SCAN_SIZE), dtype='<i4')
+        scan[0] = distances
+        scan[1] = confidences
+        self.scan_offsets.append(self._append(RECORD_SCAN, arrival_time, scan.tobytes()))
+
+    def close(self):
+        """
+        Finishes the recording and writes the revolution index
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.map.flush()
+        self.map.close()
+        self.file.truncate(self.end)
+        self.file.close()
+        np.asarray(self.scan_offsets, dtype='<u8').tofile(self.path + '.idx')
+
+
+class ScanRecording:
+    """
+    Reads a recording made by ScanRecorder through a read-only memory map.
+
+    Scans are returned as views into the map, so reading a recording does not copy it.
+
+    Attributes:
+        scan_offsets: uint64 array of the offsets of the SCAN records
+
+    Methods:
+        __init__ : Opens and validates the recording
+        records : Iterates over the records
+        raw_chunks : Iterates over the raw serial bytes
+        scan : Returns a recorded revolution
+        scans : Iterates over the recorded revolutions
+        close : Closes the recording
+    """
+
+    def __init__(self, path):
+        """
+        Opens and validates the recording
+
+        Args:
+            path: Path of the recording
+
+        Returns:
+            None
+        """
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.end = struct.unpack_from(FILE_HEADER_FORMAT, self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a lidar recording")
+
+        self.scan_offsets = None
+        if os.path.exists(path + '.idx'):
+            self.scan_offsets = np.fromfile(path + '.idx', dtype='<u8')
+            # An index whose scans lie beyond the valid data belongs to another recording
+            if np.any(self.scan_offsets + RECORD_HEADER_SIZE + 2 * SCAN_SIZE * 4 > self.end):
+                self.scan_offsets = None
+        if self.scan_offsets is None:
+            # The recording was not closed, rebuild the index from the records
+            self.scan_offsets = np.array(
+                [offset for offset, record_type, _, _ in self.records()
+                 if record_type == RECORD_SCAN],
+                dtype=np.uint64)
+
+    def records(self):
+        """
+        Iterates over the records
+
+        Args:
+            None
+
+        Returns:
+            Generator of (offset, type, arrival time, payload memoryview)
+        """
+        view = memoryview(self.map)
+        offset = FILE_HEADER_SIZE
+        while offset + RECORD_HEADER_SIZE <= self.end:
+            record_type, _, length, arrival_time = struct.unpack_from(
+                RECORD_HEADER_FORMAT, self.map, offset)
+            start = offset + RECORD_HEADER_SIZE
+            yield offset, record_type, arrival_time, view[start:start + length]
+            offset = start + _padded(length)
+
+    def raw_chunks(self):
+        """
+        Iterates over the raw serial bytes
+
+        Args:
+            None
+
+        Returns:
+            Generator of (arrival time, payload memoryview)
+        """
+        for _, record_type, arrival_time, payload in self.records():
+            if record_type == RECORD_RAW:
+                yield arrival_time, payload
+
+    def scan(self, index):
+        """
+        Returns a recorded revolution
+
+        Args:
+            index: Index of the revolution
+
+        Returns:
+            Tuple of (arrival time, distances, confidences), the arrays are read-only views
+        """
+        offset = int(self.scan_offsets[index])
+        _, _, _, arrival_time = struct.unpack_from(RECORD_HEADER_FORMAT, self.map, offset)
+        scan = np.frombuffer(self.map, dtype='<i4', count=2 * SCAN_SIZE,
+                             offset=offset + RECORD_HEADER_SIZE).reshape(2, SCAN_SIZE)
+        return arrival_time, scan[0], scan[1]
+
+    def scans(self):
+        """
+        Iterates over the recorded revolutions
+
+        Args:
+            None
+
+        Returns:
+            Generator of (arrival time, distances, confidences)
+        """
+        for index in range(len(self.scan_offsets)):
+            yield self.scan(index)
+
+    def close(self):
+        """
+        Closes the recording
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        try:
+            self.map.close()
+        except BufferError:
+            # Views into the map are still alive, the map is closed when they are released
+            pass
+        self.file.close()
+
+
+class ReplaySerial:
+    """
+    Replays the raw bytes of a recording like a serial port.
+
+    It provides the parts of serial.Serial that the Lidar node uses, so it can replace
+    the port to run the whole node without the sensor. With realtime set, the bytes
+    become available at the recorded pace, otherwise as fast as they are read.
+
+    Methods:
+        __init__ : Opens the recording
+        read : Reads bytes, waiting at most the timeout for them
+        in_waiting : Number of bytes that can be read without waiting
+        write : Ignores commands to the sensor
+        open : Does nothing, the recording is always open
+        close : Closes the recording
+    """
+
+    def __init__(self, path, realtime=True, loop=False, timeout=None):
+        """
+        Opens the recording
+
+        Args:
+            path: Path of the recording
+            realtime: Whether to reproduce the recorded timing
+            loop: Whether to start over at the end of the recording
+            timeout: Longest wait for data in read(), None waits until data is due
+
+        Returns:
+            None
+        """
+        self.recording = ScanRecording(path)
+        self.realtime = realtime
+        self.loop = loop
+        self.timeout = timeout
+        self.is_open = True
+        self._restart()
+
+    def _restart(self):
+        """
+        Starts the replay from the beginning of the recording
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.pending = b''
+        self._restart_chunks()
+
+    def _release_due(self):
+        """
+        Moves the chunks that are due to the pending bytes
+
+        Args:
+            None
+
+        Returns:
+            Seconds until the next chunk is due, or None at the end of the recording
+        """
+        while self.next_chunk is not None:
+            arrival_time, payload = self.next_chunk
+            wait = 0.0
+            if self.realtime:
+                wait = arrival_time - (time.perf_counter() - self.replay_start)
+            if wait > 0:
+                return wait
+            self.pending += bytes(payload)
+            self.next_chunk = next(self.chunks, None)
+            if self.next_chunk is None and self.loop:
+                self._restart_chunks()
+        return None
+
+    def _restart_chunks(self):
+        """
+        Starts over at the first chunk, keeping the pending bytes
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.chunks = self.recording.raw_chunks()
+        self.next_chunk = next(self.chunks, None)
+        self.replay_start = time.perf_counter()
+
+    @property
+    def in_waiting(self):
+        """
+        Number of bytes that can be read without waiting
+
+        Args:
+            None
+
+        Returns:
+            Number of bytes
+        """
+        self._release_due()
+        return len(self.pending)
+
+    def read(self, size=1):
+        """
+        Reads bytes, waiting at most the timeout for them
+
+        Args:
+            size: Largest number of bytes to return
+
+        Returns:
+            bytes, fewer than size on timeout or at the end of the recording
+        """
+        if not self.is_open:
+            raise OSError("Replay is closed")
+        deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+        while len(self.pending) < size:
+            wait = self._release_due()
+            if len(self.pending) >= size:
+                break
+            if wait is None:
+                # The recording is over, a quiet port still blocks for the timeout
+                if not self.pending and deadline is not None:
+                    time.sleep(max(deadline - time.perf_counter(), 0.0))
+                break
+            if deadline is not None:
+                wait = min(wait, deadline - time.perf_counter())
+                if wait <= 0:
+                    break
+            time.sleep(wait)
+
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def write(self, data):
+        """
+        Ignores commands to the sensor
+
+        Args:
+            data: Command bytes
+
+        Returns:
+            Number of bytes "written"
+        """
+        return len(data)
+
+    def open(self):
+        """
+        Does nothing, the recording is always open
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+
+    def close(self):
+        """
+        Closes the recording
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.is_open:
+            self.is_open = False
+            self.chunks = None
+            self.next_chunk = None
+            self.recording.close()
@@ -22,6 +22,10 @@ setup(
         'console_scripts': [
             'lidar_reader = lidar.lidar_reader:main',
             'lidar_to_image = lidar.lidar_to_image:main',
+            'lidar_filter = lidar.lidar_filter:main',
+            'occupancy_mapper = lidar.occupancy_mapper:main',
+            'scan_odometry = lidar.scan_odometry:main',
+            'lidar_benchmark = lidar.benchmark:main',
         ],
     },
 )
@@ -0,0 +1,69 @@
+from lidar.collision_guard import BACK, FRONT, CollisionGuard
+import numpy as np
+import pytest
+import time
+
+
+@pytest.fixture
+def guard():
+    return CollisionGuard(stop_distance=300, half_width=30, min_confidence=100)
+
+
+def test_guard_starts_free(guard):
+    """
+    Tests that nothing is blocked before any packet arrived.
+    """
+    assert not guard.blocked.any()
+
+
+def test_obstacle_in_front_blocks_forward(guard):
+    """
+    Tests that a single packet with a close obstacle blocks the front but not the back.
+    """
+    changed = guard.update(np.array([358, 359, 0, 1]), np.array([1000, 250, 1000, 1000]),
+                           np.array([200, 200, 200, 200]))
+
+    assert changed
+    assert guard.blocked[FRONT]
+    assert not guard.blocked[BACK]
+    assert guard.sector_min[FRONT] == 250
+
+
+def test_obstacle_outside_sectors_is_ignored(guard):
+    """
+    Tests that obstacles to the side do not block anything.
+    """
+    changed = guard.update(np.array([90, 270]), np.array([100, 100]))
+
+    assert not changed
+    assert not guard.blocked.any()
+
+
+def test_obstacle_leaving_unblocks(guard):
+    """
+    Tests that a sector is free again once the obstacle has moved away.
+    """
+    guard.update(np.array([180]), np.array([100]))
+    assert guard.blocked[BACK]
+
+    changed = guard.update(np.array([180]), np.array([2000]))
+    assert changed
+    assert not guard.blocked[BACK]
+
+
+def test_low_confidence_and_no_returns_are_ignored(guard):
+    """
+    Tests that unreliable points and no-returns do not block a sector.
+    """
+    guard.update(np.array([0, 1]), np.array([100, 0]), np.array([20, 200]))
+
+    assert not guard.blocked[FRONT]
+
+
+def test_latency_is_recorded(guard):
+    """
+    Tests that the latency of a state change is recorded.
+    """
+    guard.update(np.array([0]), np.array([100]), arrival_time=time.perf_counter())
+
+    assert 0.0 <= guard.last_change_latency < 1.0
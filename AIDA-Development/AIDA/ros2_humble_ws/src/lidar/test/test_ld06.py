@@ -0,0 +1,72 @@
+from lidar.ld06 import PACKET_SIZE, PacketParser, build_packet, crc8, decode_packets
+import numpy as np
+
+
+def packet(start_angle=10.0, distance=1000, confidence=200):
+    return build_packet(start_angle, start_angle + 11 * 0.8,
+                        [distance] * 12, [confidence] * 12)
+
+
+def test_crc_matches_packet():
+    """
+    Tests that the CRC of a built packet is stored in its last byte.
+    """
+    data = np.frombuffer(packet(), dtype=np.uint8)[None, :]
+
+    assert crc8(data)[0] == data[0, -1]
+
+
+def test_parser_returns_complete_packets():
+    """
+    Tests that several packets in one read are all returned.
+    """
+    parser = PacketParser()
+    packets = parser.feed(packet(0) + packet(10) + packet(20))
+
+    assert packets.shape == (3, PACKET_SIZE)
+    assert parser.bad_packets == 0
+
+
+def test_parser_keeps_partial_packets():
+    """
+    Tests that a packet split over two reads is returned once it is complete.
+    """
+    parser = PacketParser()
+    data = packet(0) + packet(10)
+
+    assert len(parser.feed(data[:60])) == 1
+    assert len(parser.feed(data[60:])) == 1
+
+
+def test_parser_resynchronizes():
+    """
+    Tests that garbage and corrupted packets are skipped.
+    """
+    parser = PacketParser()
+    corrupted = bytearray(packet(10))
+    corrupted[20] ^= 0xFF
+
+    packets = parser.feed(b'\x00\x54\x01' + packet(0) + bytes(corrupted) + packet(20))
+
+    assert len(packets) == 2
+    assert parser.bad_packets == 1
+    angles, _, _ = decode_packets(packets)
+    assert angles[0] == 0.0
+    assert angles[12] == 20.0
+
+
+def test_decode_packets():
+    """
+    Tests the angles, distances and confidences of a decoded packet.
+    """
+    distances = np.arange(1000, 1012)
+    confidences = np.arange(100, 112)
+    data = build_packet(355.0, 355.0 + 11 * 1.0, distances, confidences)
+
+    angles, decoded_distances, decoded_confidences = decode_packets(
+        PacketParser().feed(data), angle_offset=5.0)
+
+    # The angles wrap past 360 and the offset is subtracted
+    assert np.allclose(angles, (np.arange(12) + 350.0) % 360.0)
+    assert np.array_equal(decoded_distances, distances)
+    assert np.array_equal(decoded_confidences, confidences)
@@ -0,0 +1,83 @@
+from lidar.occupancy_grid import OccupancyGrid
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def grid():
+    return OccupancyGrid(size=100, resolution=50, max_range=2000)
+
+
+def test_grid_starts_unknown(grid):
+    """
+    Tests that a new grid is unknown everywhere.
+    """
+    assert np.all(grid.log_odds == 0)
+    assert np.all(grid.image == 127)
+
+
+def test_integrate_marks_free_and_occupied(grid):
+    """
+    Tests that a wall at 1 meter is occupied and the cells before it are free.
+    """
+    distances = np.zeros(360)
+    distances[0] = 1000  # Straight to the right
+
+    grid.integrate(distances)
+
+    row, column = grid.cell_of(1000, 0)
+    assert grid.log_odds[row, column] > 0
+    assert grid.image[row, column] < 127
+    assert np.all(grid.log_odds[row, grid.size // 2:column] < 0)
+    assert np.all(grid.image[row, grid.size // 2:column] > 127)
+    # Nothing behind the wall is touched
+    assert grid.log_odds[row, column + 2] == 0
+
+
+def test_integrate_only_touches_rays(grid):
+    """
+    Tests that no-returns leave the grid untouched.
+    """
+    grid.integrate(np.zeros(360))
+
+    assert np.all(grid.log_odds == 0)
+    assert grid.scans == 1
+
+
+def test_out_of_range_clears_without_hit(grid):
+    """
+    Tests that a beam beyond the maximum range only clears cells.
+    """
+    distances = np.zeros(360)
+    distances[90] = 5000  # Straight up, beyond max_range
+
+    grid.integrate(distances)
+
+    assert grid.log_odds.max() == 0
+    assert grid.log_odds.min() < 0
+
+
+def test_log_odds_are_clamped(grid):
+    """
+    Tests that repeated hits saturate at the log-odds limit.
+    """
+    distances = np.zeros(360)
+    distances[0] = 1000
+    for _ in range(50):
+        grid.integrate(distances)
+
+    row, column = grid.cell_of(1000, 0)
+    assert grid.log_odds[row, column] == pytest.approx(grid.log_odds_limit)
+
+
+def test_integrate_with_pose(grid):
+    """
+    Tests that a scan is placed according to the pose of the robot.
+    """
+    distances = np.zeros(360)
+    distances[0] = 500
+
+    grid.integrate(distances, pose=(0.0, 500.0, np.pi / 2))
+
+    row, column = grid.cell_of(0, 1000)
+    assert grid.log_odds[row, column] > 0
@@ -0,0 +1,92 @@
+from lidar.scan_filter import ScanFilter
+import numpy as np
+import pytest
+
+
+def test_gate_removes_no_returns_and_low_confidence():
+    """
+    Tests that no-returns, low confidence points and out of range points are invalid.
+    """
+    scan_filter = ScanFilter(min_confidence=100, min_range=20, max_range=5000,
+                             median_window=1, smoothing_alpha=1.0)
+    distances = np.full(360, 1000)
+    confidences = np.full(360, 200)
+    distances[0] = 0
+    confidences[1] = 50
+    distances[2] = 6000
+    distances[3] = 10
+
+    result = scan_filter.apply(distances, confidences)
+
+    assert list(result[:4]) == [0, 0, 0, 0]
+    assert np.all(result[4:] == 1000)
+
+
+def test_median_removes_outlier():
+    """
+    Tests that the angular median removes a single spike and wraps around 0 degrees.
+    """
+    scan_filter = ScanFilter(min_confidence=0, median_window=3, smoothing_alpha=1.0)
+    distances = np.full(360, 1000)
+    distances[0] = 4000
+    distances[180] = 3000
+
+    result = scan_filter.apply(distances)
+
+    assert result[0] == 1000
+    assert result[180] == 1000
+
+
+def test_median_ignores_invalid_neighbours():
+    """
+    Tests that invalid points neither count in the median nor become valid.
+    """
+    scan_filter = ScanFilter(min_confidence=0, median_window=5, smoothing_alpha=1.0)
+    distances = np.full(360, 1000)
+    distances[10:12] = 0
+    distances[12] = 1200
+
+    result = scan_filter.apply(distances)
+
+    assert result[10] == 0
+    assert result[11] == 0
+    assert result[12] == 1000
+
+
+def test_temporal_smoothing():
+    """
+    Tests the exponential smoothing across rotations.
+    """
+    scan_filter = ScanFilter(min_confidence=0, median_window=1, smoothing_alpha=0.5)
+    first = np.full(360, 1000)
+    second = np.full(360, 2000)
+    second[5] = 0
+
+    scan_filter.apply(first)
+    result = scan_filter.apply(second)
+
+    assert result[0] == 1500
+    assert result[5] == 0
+
+    # A point that was invalid starts over from the new value
+    third = np.full(360, 2000)
+    result = scan_filter.apply(third)
+    assert result[5] == 2000
+
+
+def test_invalid_configuration():
+    """
+    Tests that invalid configurations are rejected.
+    """
+    with pytest.raises(ValueError):
+        ScanFilter(median_window=4)
+    with pytest.raises(ValueError):
+        ScanFilter(smoothing_alpha=0.0)
+
+
+def test_wrong_scan_length():
+    """
+    Tests that scans of the wrong length are rejected.
+    """
+    with pytest.raises(ValueError):
+        ScanFilter().apply(np.zeros(100))
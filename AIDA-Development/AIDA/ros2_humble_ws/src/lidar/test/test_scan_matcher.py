@@ -0,0 +1,95 @@
+import math
+
+from lidar.scan_matcher import ScanMatcher, ScanOdometry, compose, scan_to_points
+import numpy as np
+
+
+def room_scan(x, y, theta, rng=None):
+    """Scan of a 6 x 4 meter room taken at a pose, with 10 mm noise if rng is given."""
+    angles = np.radians(np.arange(360)) + theta
+    cos, sin = np.cos(angles), np.sin(angles)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_x = np.abs(np.where(cos > 0, 3000 - x, -3000 - x) / cos)
+        to_y = np.abs(np.where(sin > 0, 2000 - y, -2000 - y) / sin)
+    distances = np.minimum(to_x, to_y)
+    if rng is not None:
+        distances += rng.normal(0, 10, 360)
+    return distances.astype(np.int32)
+
+
+def test_scan_to_points_axes():
+    """
+    Tests that angle 0 is on the x axis and angle 90 on the y axis.
+    """
+    distances = np.zeros(360)
+    distances[0] = 1000
+    distances[90] = 2000
+
+    points = scan_to_points(distances)
+
+    assert np.allclose(points, [[1000, 0], [0, 2000]], atol=1e-3)
+
+
+def test_nearest_matches_brute_force():
+    """
+    Tests that the grid hash finds the same neighbours as a brute force search.
+    """
+    rng = np.random.default_rng(0)
+    matcher = ScanMatcher(max_per_cell=64)
+    matcher.set_reference(scan_to_points(room_scan(0, 0, 0)))
+    queries = rng.uniform(-3000, 3000, (200, 2)).astype(np.float32)
+
+    _, squared = matcher.nearest(queries)
+
+    brute = ((queries[:, None, :] - matcher.reference[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+    reachable = brute < matcher.max_correspondence ** 2
+    assert np.allclose(squared[reachable], brute[reachable], rtol=1e-4)
+
+
+def test_match_recovers_motion():
+    """
+    Tests that the motion between two noisy scans is recovered.
+    """
+    rng = np.random.default_rng(1)
+    matcher = ScanMatcher()
+    matcher.set_reference(scan_to_points(room_scan(0, 0, 0, rng)))
+
+    x, y, theta = matcher.match(scan_to_points(room_scan(80, -40, 0.05, rng)))
+
+    assert abs(x - 80) < 10 and abs(y + 40) < 10
+    assert abs(theta - 0.05) < 0.005
+
+
+def test_match_fails_without_overlap():
+    """
+    Tests that scans too far apart are reported as not matched.
+    """
+    matcher = ScanMatcher(max_correspondence=50)
+    matcher.set_reference(scan_to_points(room_scan(0, 0, 0)))
+
+    assert matcher.match(scan_to_points(room_scan(0, 0, 0)) + 1000) is None
+
+
+def test_odometry_tracks_pose():
+    """
+    Tests that the pose accumulates the motions of consecutive scans.
+    """
+    rng = np.random.default_rng(2)
+    odometry = ScanOdometry()
+    for step in range(10):
+        odometry.update(room_scan(30 * step, 10 * step, 0.01 * step, rng))
+
+    x, y, theta = odometry.pose
+    assert odometry.failures == 0
+    assert abs(x - 270) < 30 and abs(y - 90) < 30
+    assert abs(theta - 0.09) < 0.01
+
+
+def test_compose_rotated_motion():
+    """
+    Tests that a motion is applied in the frame of the robot.
+    """
+    x, y, theta = compose((1000, 0, math.pi / 2), (100, 0, 0))
+
+    assert math.isclose(x, 1000, abs_tol=1e-9) and math.isclose(y, 100)
+    assert math.isclose(theta, math.pi / 2)
@@ -0,0 +1,143 @@
+from lidar.benchmark import load_recording, main
+from lidar.ld06 import PacketParser, build_packet
+from lidar.scan_recorder import ReplaySerial, ScanRecorder, ScanRecording
+import numpy as np
+import pytest
+
+
+def record(path, chunks, scans=(), times=None):
+    recorder = ScanRecorder(str(path), grow_size=256)
+    for index, chunk in enumerate(chunks):
+        recorder.record_raw(chunk, None if times is None else recorder.start_time + times[index])
+    for distances, confidences in scans:
+        recorder.record_scan(distances, confidences)
+    recorder.close()
+    return str(path)
+
+
+def test_recording_round_trip(tmp_path):
+    """
+    Tests that raw reads and scans are read back unchanged, across file growth.
+    """
+    chunks = [bytes([value]) * (value + 1) for value in range(100)]
+    distances = np.arange(360, dtype=np.int32)
+    confidences = np.full(360, 200, dtype=np.int32)
+    path = record(tmp_path / "scan.rec", chunks, [(distances, confidences)] * 3)
+
+    recording = ScanRecording(path)
+    assert [bytes(payload) for _, payload in recording.raw_chunks()] == chunks
+    assert len(recording.scan_offsets) == 3
+    _, recorded_distances, recorded_confidences = recording.scan(2)
+    assert np.array_equal(recorded_distances, distances)
+    assert np.array_equal(recorded_confidences, confidences)
+
+
+def test_unclosed_recording_rebuilds_index(tmp_path):
+    """
+    Tests that a recording that was not closed can still be read.
+    """
+    path = str(tmp_path / "scan.rec")
+    recorder = ScanRecorder(path)
+    recorder.record_raw(b'abc')
+    recorder.record_scan(np.ones(360), np.ones(360))
+    recorder.map.flush()
+
+    recording = ScanRecording(path)
+    assert len(recording.scan_offsets) == 1
+    assert [bytes(payload) for _, payload in recording.raw_chunks()] == [b'abc']
+    recording.close()
+    recorder.close()
+
+
+def test_stale_index_is_not_used(tmp_path):
+    """
+    Tests that the index of an earlier recording at the same path is not used.
+    """
+    path = record(tmp_path / "scan.rec", [b'abc'], [(np.ones(360), np.ones(360))] * 5)
+    recorder = ScanRecorder(path)
+    recorder.record_scan(np.full(360, 7), np.ones(360))
+    recorder.map.flush()
+
+    recording = ScanRecording(path)
+    assert len(recording.scan_offsets) == 1
+    assert recording.scan(0)[1][0] == 7
+    recording.close()
+    recorder.close()
+
+
+def test_index_beyond_the_data_is_rebuilt(tmp_path):
+    """
+    Tests that an index pointing past the valid data is rebuilt from the records.
+    """
+    path = record(tmp_path / "scan.rec", [b'abc'], [(np.ones(360), np.ones(360))])
+    np.array([0, 1 << 20], dtype='<u8').tofile(path + '.idx')
+
+    recording = ScanRecording(path)
+    assert len(recording.scan_offsets) == 1
+    recording.close()
+
+
+def test_rejects_other_files(tmp_path):
+    """
+    Tests that a file that is not a recording is refused.
+    """
+    path = tmp_path / "other.bin"
+    path.write_bytes(b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        ScanRecording(str(path))
+
+
+def test_replay_as_fast_as_possible(tmp_path):
+    """
+    Tests that a replay returns the recorded stream, which parses into the recorded packets.
+    """
+    packets = [build_packet(angle, angle + 11, [1000] * 12, [200] * 12)
+               for angle in range(0, 360, 12)]
+    stream = b''.join(packets)
+    path = record(tmp_path / "scan.rec", [stream[i:i + 100] for i in range(0, len(stream), 100)])
+
+    replay = ReplaySerial(path, realtime=False, timeout=0.01)
+    parser = PacketParser()
+    data = b''
+    while True:
+        chunk = replay.read(max(replay.in_waiting, 47))
+        if not chunk:
+            break
+        data += chunk
+    replay.close()
+
+    assert data == stream
+    assert len(parser.feed(data)) == len(packets)
+
+
+def test_replay_keeps_timing(tmp_path):
+    """
+    Tests that a realtime replay holds back bytes until their recorded arrival time.
+    """
+    path = record(tmp_path / "scan.rec", [b'a', b'b'], times=[0.0, 0.2])
+
+    replay = ReplaySerial(path, realtime=True, timeout=0.05)
+    assert replay.read(2) == b'a'
+    assert replay.read(2) == b''
+    replay.timeout = None
+    assert replay.read(1) == b'b'
+    replay.close()
+
+
+def test_benchmark_runs_on_recording(tmp_path, capsys):
+    """
+    Tests that the benchmark measures every stage on a recording.
+    """
+    packets = [build_packet(angle, angle + 11, [1000] * 12, [200] * 12)
+               for angle in range(0, 360, 12)]
+    scan = (np.full(360, 1000, dtype=np.int32), np.full(360, 200, dtype=np.int32))
+    path = record(tmp_path / "scan.rec", [b''.join(packets)], [scan])
+
+    reads, scans = load_recording(path)
+    assert len(reads) == 1 and len(scans) == 1
+
+    main(["--recording", path, "--repeats", "2"])
+    output = capsys.readouterr().out
+    assert "decoder.read" in output
+    assert "render.640x640" in output
@@ -0,0 +1,70 @@
+from lidar.scan_renderer import ScanRenderer
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def renderer():
+    return ScanRenderer(width=100, height=100, max_distance=1000, point_size=0)
+
+
+def test_render_empty_scan(renderer):
+    """
+    Tests that a scan of no-returns gives a blank canvas.
+    """
+    canvas = renderer.render(np.zeros(360))
+
+    assert canvas.shape == (100, 100, 3)
+    assert np.all(canvas == 255)
+
+
+def test_render_points(renderer):
+    """
+    Tests that points are drawn at their angle and distance from the center.
+    """
+    distances = np.zeros(360)
+    distances[0] = 500  # Right
+    distances[90] = 500  # Up
+
+    canvas = renderer.render(distances)
+
+    assert np.all(canvas[50, 75] == 0)
+    assert np.all(canvas[25, 50] == 0)
+    assert np.count_nonzero(np.all(canvas == 0, axis=2)) == 2
+
+
+def test_render_reuses_and_clears_canvas(renderer):
+    """
+    Tests that the same canvas is reused and cleared between scans.
+    """
+    distances = np.zeros(360)
+    distances[0] = 500
+    first = renderer.render(distances)
+    second = renderer.render(np.zeros(360))
+
+    assert first is second
+    assert np.all(second == 255)
+
+
+def test_render_clips_points_outside_canvas(renderer):
+    """
+    Tests that points beyond the edge of the canvas are left out.
+    """
+    distances = np.full(360, 5000)
+
+    canvas = renderer.render(distances)
+
+    assert np.all(canvas == 255)
+
+
+def test_point_size():
+    """
+    Tests that points are drawn as filled discs.
+    """
+    renderer = ScanRenderer(width=100, height=100, max_distance=1000, point_size=1)
+    distances = np.zeros(360)
+    distances[0] = 500
+
+    canvas = renderer.render(distances)
+
+    assert np.count_nonzero(np.all(canvas == 0, axis=2)) == 5
@@ -10,6 +10,8 @@ setup(
         ('share/ament_index/resource_index/packages',
             ['resource/' + package_name]),
         ('share/' + package_name, ['package.xml']),
+        ('share/' + package_name + '/fixtures',
+            ['test/test_resource/jfk.wav', 'test/test_resource/jfk.txt']),
     ],
     install_requires=['setuptools'],
     zip_safe=True,
@@ -22,6 +24,7 @@ setup(
         'console_scripts': [
             'faster_whisper_node = speech_to_text.faster_whisper_node:main',
             'receive_str_result = speech_to_text.receive_str_result:main',
+            'stt_benchmark = speech_to_text.benchmark:main',
         ],
     },
 )
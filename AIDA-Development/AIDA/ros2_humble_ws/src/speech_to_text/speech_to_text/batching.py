@@ -0,0 +1,57 @@
+import numpy as np
+
+from speech_to_text.streaming_transcriber import join_words
+
+
+def concatenate_utterances(utterances, sample_rate=16000, gap=1.0):
+    """
+    Joins utterances into one audio with silence between them
+
+    The silence makes Whisper end a sentence between two utterances, so its words do not
+    run across them and the text can be split again by the word timestamps.
+
+    Args:
+        utterances: List of float32 arrays of mono samples
+        sample_rate: Sample rate of the audio
+        gap: Seconds of silence between two utterances
+
+    Returns:
+        Tuple of (float32 array, list of (start, end) of each utterance in seconds)
+    """
+    silence = np.zeros(int(gap * sample_rate), dtype=np.float32)
+    parts = []
+    spans = []
+    position = 0
+    for index, utterance in enumerate(utterances):
+        if index:
+            parts.append(silence)
+            position += len(silence)
+        parts.append(np.asarray(utterance, dtype=np.float32))
+        spans.append((position / sample_rate, (position + len(utterance)) / sample_rate))
+        position += len(utterance)
+    audio = np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+    return audio, spans
+
+
+def split_words(words, spans):
+    """
+    Splits the words of a concatenated transcription by utterance
+
+    A word belongs to the utterance its middle is closest to, so words whose timestamps
+    reach a little into the silence are still kept with their utterance.
+
+    Args:
+        words: List of (start, end, text), times in seconds of the concatenated audio
+        spans: List of (start, end) of each utterance from concatenate_utterances
+
+    Returns:
+        List with the text of each utterance, empty for an utterance without words
+    """
+    if not spans:
+        return []
+    # Utterance i ends where the gap after it is cut in half
+    bounds = np.array([(spans[i][1] + spans[i + 1][0]) / 2 for i in range(len(spans) - 1)])
+    grouped = [[] for _ in spans]
+    for word in words:
+        grouped[int(np.searchsorted(bounds, (word[0] + word[1]) / 2))].append(word)
+    return [join_words(group) for group in grouped]
@@ -0,0 +1,257 @@
+import argparse
+import itertools
+import json
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from speech_to_text.decoding_policy import DECODING_GREEDY, DECODINGS, DecodingPolicy
+from speech_to_text.streaming_transcriber import normalize_word
+from speech_to_text.whisper_runtime import WhisperRuntime, resolve_whisper_model
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def default_fixtures():
+    """
+    Finds the directory of the fixtures shipped with the package
+
+    In order: the fixtures directory in the share directory of the installed
+    speech_to_text package, then the test resources next to the package sources.
+
+    Args:
+        None
+
+    Returns:
+        Path of the directory, it may not exist
+    """
+    try:
+        from ament_index_python.packages import get_package_share_directory
+        return Path(get_package_share_directory("speech_to_text")) / "fixtures"
+    except (ImportError, LookupError):
+        return Path(__file__).resolve().parent.parent / "test" / "test_resource"
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Computes the word error rate of a transcription
+
+    The words are compared in lower case without punctuation, the errors are the
+    substitutions, deletions and insertions of the word level edit distance.
+
+    Args:
+        reference: The text that was spoken
+        hypothesis: The transcribed text
+
+    Returns:
+        Tuple of (errors, number of reference words)
+    """
+    reference = [word for word in map(normalize_word, reference.split()) if word]
+    hypothesis = [word for word in map(normalize_word, hypothesis.split()) if word]
+    # One row of the edit distance matrix at a time
+    previous = list(range(len(hypothesis) + 1))
+    for row, reference_word in enumerate(reference, 1):
+        current = [row]
+        for column, hypothesis_word in enumerate(hypothesis, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (reference_word != hypothesis_word)))
+        previous = current
+    return previous[-1], len(reference)
+
+
+def load_fixtures(directory):
+    """
+    Loads the WAV fixtures of a directory, resampled to 16 kHz mono
+
+    A fixture name.wav may come with its reference transcription in name.txt, fixtures
+    without one are timed but left out of the word error rate.
+
+    Args:
+        directory: Path of the directory
+
+    Returns:
+        List of (name, float32 samples, reference text or None), sorted by name
+    """
+    import librosa
+    fixtures = []
+    for path in sorted(Path(directory).glob("*.wav")):
+        audio, _ = librosa.load(path, sr=WHISPER_SAMPLE_RATE, mono=True)
+        reference = path.with_suffix(".txt")
+        text = reference.read_text().strip() if reference.is_file() else None
+        fixtures.append((path.stem, audio.astype(np.float32), text))
+    if not fixtures:
+        raise ValueError(f"No WAV fixtures in {directory}")
+    return fixtures
+
+
+def configurations(models, compute_types, decodings, beam_sizes, threads):
+    """
+    Builds the matrix of configurations to benchmark
+
+    Greedy decoding does not use the beam size, so it is run once per combination of the
+    other settings.
+
+    Args:
+        models: Model sizes or paths
+        compute_types: CTranslate2 compute types
+        decodings: Strategies of the DecodingPolicy
+        beam_sizes: Numbers of beams
+        threads: Numbers of CPU threads, 0 lets CTranslate2 choose
+
+    Returns:
+        List of dictionaries with model, compute_type, decoding, beam_size and cpu_threads
+    """
+    matrix = []
+    for model, compute_type, decoding, beam_size, cpu_threads in itertools.product(
+            models, compute_types, decodings, beam_sizes, threads):
+        configuration = {"model": model, "compute_type": compute_type, "decoding": decoding,
+                         "beam_size": 1 if decoding == DECODING_GREEDY else beam_size,
+                         "cpu_threads": cpu_threads}
+        if configuration not in matrix:
+            matrix.append(configuration)
+    return matrix
+
+
+def summarize(latencies, audio_seconds, errors, words):
+    """
+    Summarizes the measurements of one configuration
+
+    Args:
+        latencies: Seconds each fixture took to transcribe
+        audio_seconds: Seconds of audio of each fixture
+        errors: Word errors over the fixtures with a reference
+        words: Reference words over the fixtures with a reference
+
+    Returns:
+        Dictionary with the real time factor, the latency percentiles and the word error rate
+    """
+    latencies = np.asarray(latencies)
+    return {
+        "real_time_factor": float(latencies.sum() / np.sum(audio_seconds)),
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "latency_max": float(latencies.max()),
+        "word_error_rate": errors / words if words else None,
+    }
+
+
+def run_configuration(configuration, fixtures, repeats=1):
+    """
+    Benchmarks one configuration in this process
+
+    The model is loaded and warmed up like in the node, and every fixture goes through
+    the DecodingPolicy the node's translate uses.
+
+    Args:
+        configuration: Dictionary from configurations
+        fixtures: List from load_fixtures
+        repeats: Number of times every fixture is transcribed
+
+    Returns:
+        Dictionary of the configuration and its results, peak_rss_mb is the peak resident
+        memory of this process
+    """
+    runtime = WhisperRuntime(resolve_whisper_model(configuration["model"]),
+                             compute_type=configuration["compute_type"],
+                             cpu_threads=configuration["cpu_threads"])
+    runtime.load()
+    policy = DecodingPolicy(configuration["decoding"], beam_size=configuration["beam_size"])
+
+    latencies, audio_seconds, transcripts = [], [], {}
+    errors = words = fallbacks = 0
+    for _ in range(repeats):
+        for name, audio, reference in fixtures:
+            start = perf_counter()
+            decoding = policy.decode(runtime.model, audio)
+            latencies.append(perf_counter() - start)
+            audio_seconds.append(len(audio) / WHISPER_SAMPLE_RATE)
+            fallbacks += decoding.greedy_time > 0 and decoding.beam_time > 0
+            transcripts[name] = decoding.text()
+    for name, _, reference in fixtures:
+        if reference is not None:
+            fixture_errors, fixture_words = word_error_rate(reference, transcripts[name])
+            errors += fixture_errors
+            words += fixture_words
+
+    result = dict(configuration)
+    result.update(summarize(latencies, audio_seconds, errors, words))
+    result.update({
+        "beam_fallbacks": int(fallbacks),
+        "load_time": runtime.load_time,
+        "warmup_time": runtime.warmup_time,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "transcripts": transcripts,
+    })
+    return result
+
+
+def run_in_subprocess(configuration, fixtures_directory, repeats):
+    """
+    Benchmarks one configuration in a fresh Python process
+
+    The peak memory of a process never goes down, so every configuration runs alone to
+    measure its own peak.
+
+    Args:
+        configuration: Dictionary from configurations
+        fixtures_directory: Directory of the fixtures
+        repeats: Number of times every fixture is transcribed
+
+    Returns:
+        Dictionary of the configuration and its results, with an error entry if it failed
+    """
+    process = subprocess.run(
+        [sys.executable, "-m", "speech_to_text.benchmark", "--fixtures", str(fixtures_directory),
+         "--repeats", str(repeats), "--single", json.dumps(configuration)],
+        capture_output=True, text=True)
+    if process.returncode != 0:
+        return dict(configuration, error=process.stderr.strip().splitlines()[-1:])
+    return json.loads(process.stdout)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the speech to text settings on WAV fixtures.")
+    parser.add_argument("--fixtures", default=str(default_fixtures()),
+                        help="directory of WAV files, with reference transcriptions in .txt files")
+    parser.add_argument("--models", nargs="+", default=["tiny.en"], help="model sizes or paths")
+    parser.add_argument("--compute-types", nargs="+", default=["int8"], help="CTranslate2 compute types")
+    parser.add_argument("--decodings", nargs="+", default=["greedy", "beam", "adaptive"],
+                        choices=DECODINGS, help="decoding strategies")
+    parser.add_argument("--beam-sizes", nargs="+", type=int, default=[5], help="beams of beam search")
+    parser.add_argument("--threads", nargs="+", type=int, default=[0], help="CPU threads per inference")
+    parser.add_argument("--repeats", type=int, default=3, help="transcriptions per fixture")
+    parser.add_argument("--output", help="file to write the JSON report to, stdout by default")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    options = parser.parse_args(args)
+
+    if options.single:
+        # Child process of run_in_subprocess
+        result = run_configuration(json.loads(options.single), load_fixtures(options.fixtures),
+                                   options.repeats)
+        print(json.dumps(result))
+        return
+
+    matrix = configurations(options.models, options.compute_types, options.decodings,
+                            options.beam_sizes, options.threads)
+    results = []
+    for configuration in matrix:
+        print(f"Benchmarking {configuration}", file=sys.stderr)
+        results.append(run_in_subprocess(configuration, options.fixtures, options.repeats))
+
+    report = json.dumps({"fixtures": options.fixtures, "repeats": options.repeats,
+                         "results": results}, indent=2)
+    if options.output:
+        Path(options.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
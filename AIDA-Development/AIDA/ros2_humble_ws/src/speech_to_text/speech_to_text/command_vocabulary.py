@@ -0,0 +1,168 @@
+from speech_to_text.streaming_transcriber import normalize_word
+
+# Phrases the robot reacts to, and the command each one stands for
+DEFAULT_COMMANDS = {
+    "forward": "forward",
+    "go forward": "forward",
+    "drive forward": "forward",
+    "backward": "backward",
+    "backwards": "backward",
+    "go back": "backward",
+    "reverse": "backward",
+    "turn left": "left",
+    "left": "left",
+    "turn right": "right",
+    "right": "right",
+    "stop": "stop",
+    "halt": "stop",
+}
+
+
+def command_prompt(commands=DEFAULT_COMMANDS):
+    """
+    Builds the initial prompt that biases Whisper towards the vocabulary
+
+    Args:
+        commands: Dictionary of phrase to command
+
+    Returns:
+        The phrases as a comma separated sentence, e.g. "Forward, go forward, stop."
+    """
+    return ", ".join(commands).capitalize() + "."
+
+
+class PhraseTrie:
+    """
+    A trie of the words of the command phrases.
+
+    Every node keeps the set of commands of the phrases below it, so walking the words of a
+    hypothesis tells as soon as only one command is left, often before the phrase is
+    complete ("turn" is still left or right, "turn left" is left).
+
+    Attributes:
+        root: The root node, a tuple of (children by word, commands below)
+
+    Methods:
+        __init__ : Compiles the phrases
+        insert : Adds a phrase
+        match : Matches the words at the start of a hypothesis
+    """
+
+    def __init__(self, commands=DEFAULT_COMMANDS):
+        """
+        Compiles the phrases
+
+        Args:
+            commands: Dictionary of phrase to command
+
+        Returns:
+            None
+        """
+        self.root = ({}, set())
+        for phrase, command in commands.items():
+            self.insert(phrase, command)
+
+    def insert(self, phrase, command):
+        """
+        Adds a phrase
+
+        Args:
+            phrase: Words of the phrase separated by spaces
+            command: The command the phrase stands for
+
+        Returns:
+            None
+        """
+        node = self.root
+        node[1].add(command)
+        for word in phrase.split():
+            node = node[0].setdefault(normalize_word(word), ({}, set()))
+            node[1].add(command)
+
+    def match(self, words):
+        """
+        Matches the words at the start of a hypothesis
+
+        Args:
+            words: List of words, normalized with normalize_word
+
+        Returns:
+            Tuple of (command, number of words matched) once a single command is left,
+            (None, 0) when the words match no phrase or more words are needed
+        """
+        node = self.root
+        for count, word in enumerate(words, 1):
+            node = node[0].get(word)
+            if node is None:
+                return None, 0
+            if len(node[1]) == 1:
+                return next(iter(node[1])), count
+        return None, 0
+
+
+class CommandRecognizer:
+    """
+    Finds commands in the growing hypotheses of an utterance.
+
+    Each hypothesis is searched from every word that starts after the last command found,
+    so a command is reported once, as soon as it is unique, and an utterance can hold
+    several commands ("forward, stop").
+
+    Attributes:
+        trie: The PhraseTrie of the vocabulary
+        consumed_time: End of the last word of the last command found, in seconds
+
+    Methods:
+        __init__ : Initializes the recognizer
+        feed : Searches a hypothesis for new commands
+        reset : Starts a new utterance
+    """
+
+    def __init__(self, trie=None):
+        """
+        Initializes the recognizer
+
+        Args:
+            trie: PhraseTrie of the vocabulary, None uses DEFAULT_COMMANDS
+
+        Returns:
+            None
+        """
+        self.trie = trie if trie is not None else PhraseTrie()
+        self.reset()
+
+    def reset(self):
+        """
+        Starts a new utterance
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.consumed_time = -1.0
+
+    def feed(self, words):
+        """
+        Searches a hypothesis for new commands
+
+        Args:
+            words: List of (start, end, text) of the hypothesis, times in seconds
+
+        Returns:
+            List of the commands found, in the order they were spoken
+        """
+        words = [word for word in words if word[0] > self.consumed_time]
+        normalized = [normalize_word(word[2]) for word in words]
+        commands = []
+        index = 0
+        while index < len(words):
+            command, count = self.trie.match(normalized[index:])
+            if command is None:
+                index += 1
+                continue
+            commands.append(command)
+            index += count
+            self.consumed_time = words[index - 1][1]
+        return commands
@@ -0,0 +1,155 @@
+from time import perf_counter
+
+# Decoding strategies of the policy
+DECODING_ADAPTIVE = "adaptive"
+DECODING_GREEDY = "greedy"
+DECODING_BEAM = "beam"
+DECODINGS = (DECODING_ADAPTIVE, DECODING_GREEDY, DECODING_BEAM)
+
+
+class Decoding:
+    """
+    The outcome of decoding one utterance
+
+    Methods:
+        text : Text of the accepted transcription
+
+    Attributes:
+        segments: The segments of the accepted transcription
+        strategy: greedy, or beam when the greedy transcription was rejected or skipped
+        greedy_time: Seconds the greedy decoding took, 0 when it was skipped
+        beam_time: Seconds the beam search took, 0 when it was not needed
+        avg_logprob: Duration weighted average log probability of the greedy transcription
+        compression_ratio: Highest compression ratio of the greedy segments
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.strategy = DECODING_GREEDY
+        self.greedy_time = 0.0
+        self.beam_time = 0.0
+        self.avg_logprob = 0.0
+        self.compression_ratio = 0.0
+
+    def text(self):
+        """
+        Text of the accepted transcription
+
+        Args:
+            None
+
+        Returns:
+            The texts of the segments joined, longer audio is transcribed in several segments
+        """
+        return " ".join(segment.text.strip() for segment in self.segments).strip()
+
+
+def confidence(segments):
+    """
+    Measures how confident the model was in a transcription
+
+    Args:
+        segments: Segments with start, end, avg_logprob and compression_ratio
+
+    Returns:
+        Tuple of (duration weighted average log probability, highest compression ratio),
+        (0, 0) without segments
+    """
+    if not segments:
+        return 0.0, 0.0
+    weights = [max(segment.end - segment.start, 1e-3) for segment in segments]
+    avg_logprob = sum(weight * segment.avg_logprob
+                      for weight, segment in zip(weights, segments)) / sum(weights)
+    return avg_logprob, max(segment.compression_ratio for segment in segments)
+
+
+class DecodingPolicy:
+    """
+    Decodes greedily first and falls back to beam search on low confidence.
+
+    Beam search with 5 beams costs several times as much as greedy decoding on a CPU, and
+    short, clear commands come out the same either way. So every utterance is decoded
+    greedily, and only decoded again with beam search when the greedy transcription has a
+    low average log probability (the model was unsure) or a high compression ratio (the
+    text repeats itself, the usual Whisper failure). Whisper's own temperature fallback is
+    disabled in the greedy pass, since it would sample again before the beam search.
+
+    Attributes:
+        strategy: adaptive, greedy (never fall back) or beam (always beam search)
+        beam_size: Number of beams of the fallback
+        logprob_threshold: Greedy transcriptions with a lower average log probability are
+            decoded again
+        compression_ratio_threshold: Greedy transcriptions with a higher compression ratio
+            are decoded again
+
+    Methods:
+        __init__ : Stores the configuration
+        decode : Decodes an utterance with the policy
+        accepts : Whether a greedy transcription is confident enough
+    """
+
+    def __init__(self, strategy=DECODING_ADAPTIVE, beam_size=5, logprob_threshold=-1.0,
+                 compression_ratio_threshold=2.4):
+        """
+        Stores the configuration
+
+        Args:
+            strategy: One of DECODINGS
+            beam_size: Number of beams of the fallback
+            logprob_threshold: Lowest accepted average log probability
+            compression_ratio_threshold: Highest accepted compression ratio
+
+        Returns:
+            None
+        """
+        if strategy not in DECODINGS:
+            raise ValueError(f"Unknown decoding {strategy}, expected one of {DECODINGS}")
+        self.strategy = strategy
+        self.beam_size = beam_size
+        self.logprob_threshold = logprob_threshold
+        self.compression_ratio_threshold = compression_ratio_threshold
+
+    def accepts(self, avg_logprob, compression_ratio):
+        """
+        Whether a greedy transcription is confident enough
+
+        Args:
+            avg_logprob: Average log probability of the transcription
+            compression_ratio: Compression ratio of the transcription
+
+        Returns:
+            True to keep the greedy transcription
+        """
+        return (avg_logprob >= self.logprob_threshold
+                and compression_ratio <= self.compression_ratio_threshold)
+
+    def decode(self, model, audio, **options):
+        """
+        Decodes an utterance with the policy
+
+        Args:
+            model: Whisper model with a faster_whisper style transcribe method
+            audio: float32 array of mono samples at 16 kHz
+            options: Further options of transcribe, e.g. word_timestamps
+
+        Returns:
+            Decoding
+        """
+        decoding = Decoding()
+        if self.strategy != DECODING_BEAM:
+            start = perf_counter()
+            segments, _ = model.transcribe(audio, beam_size=1, temperature=0.0, **options)
+            # The transcription runs lazily while the segments are consumed
+            decoding.segments = list(segments)
+            decoding.greedy_time = perf_counter() - start
+            decoding.avg_logprob, decoding.compression_ratio = confidence(decoding.segments)
+            if (self.strategy == DECODING_GREEDY
+                    or self.accepts(decoding.avg_logprob, decoding.compression_ratio)):
+                return decoding
+
+        start = perf_counter()
+        segments, _ = model.transcribe(audio, beam_size=self.beam_size, **options)
+        decoding.segments = list(segments)
+        decoding.beam_time = perf_counter() - start
+        decoding.strategy = DECODING_BEAM
+        return decoding
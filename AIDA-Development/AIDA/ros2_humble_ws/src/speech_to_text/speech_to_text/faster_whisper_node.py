@@ -1,10 +1,25 @@
+import threading
+from time import monotonic, perf_counter
+
 import numpy as np
 import rclpy
 from rclpy.node import Node
 from audio_data.msg import AudioData
-from aida_interfaces.srv import SetState
+from aida_interfaces.srv import SetModel, SetState
 from std_msgs.msg import String
-from faster_whisper import WhisperModel
+
+from audio.resampler import resample
+from audio.voice_activity import VoiceActivityDetector
+from speech_to_text.batching import concatenate_utterances, split_words
+from speech_to_text.command_vocabulary import CommandRecognizer, command_prompt
+from speech_to_text.decoding_policy import DecodingPolicy
+from speech_to_text.model_pool import ModelPool
+from speech_to_text.streaming_transcriber import StreamingTranscriber
+from speech_to_text.transcription_queue import POLICY_MERGE, TranscriptionQueue
+from speech_to_text.whisper_runtime import WhisperRuntime, resolve_whisper_model
+
+# Whisper models expect 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
 
 
 
@@ -12,21 +27,43 @@ class STTNode(Node):
     """
     This class represents an node that subscribes to audio data topic and converts 
     the audio to text. Thereafter it published the finished result as string to 
-    stt_result topic.
+    stt_result topic. The transcription runs in a worker thread fed by a bounded queue,
+    with the model taken from the aida_models store. The modes and parameters are
+    described in the README of the AIDA folder.
 
     Attributes:
         subscription: The subscription object for receiving audio data.
+        model_pool : The ModelPool of the resident models
+        stt_model : The active Whisper model, None until it is loaded
+        model_condition : Notified when a model was loaded or failed to load, guards stt_model
         publisher : The publisher object for sending the finished STT result
+        partial_publisher : The publisher object for sending partial results in streaming mode
+        command_publisher : The publisher object for sending recognized commands in command mode
+        transcription_queue : Audio waiting for the worker
+        stats : Counters and latencies since the last statistics log
     Methods:
         __init__: Initializes the STTNode object.
         listener_callback: The callback function for processing the received audio data.
         init_services : Initializes the services for the node for turning on and of the transcription
         set_state_of_node : Sets the desired state for the node when request is recieved
+        transcription_worker : Transcribes the queued audio, runs in its own thread
+        streaming_worker : Transcribes the queued audio while it is spoken, runs in its own thread
+        log_stats : Logs the queue depth and the transcription latencies
+        init_model : Loads the Whisper model, in the background if configured
+        _record_decoding : Logs how an utterance was decoded and counts it in the statistics
+        wait_for_model : Waits until a model is active, called by the workers
+        create_runtime : Builds the WhisperRuntime of a model
+        model_ready : Swaps in a model once it is loaded
+        set_model : Switches the model when a request is recieved
         
         translate: Translates audio from numpy data to text
+        translate_batch : Translates several utterances with one model call
+        transcribe_words : Transcribes audio to words with timestamps
         _message_to_numpy_array : Translates the message from topic to numpy array
         destroy_node : Destructs the STTNode object.
         publish_result : Publishes the inputed string to stt_result topic
+        publish_partial : Publishes the inputed string to stt/partial topic
+        publish_command : Publishes the inputed command to stt/command topic
     """
 
     def __init__(self, model_size: str = "tiny.en"):
@@ -34,7 +71,7 @@ class STTNode(Node):
         Initializes the STTNode object.
 
         Args:
-            None
+            model_size: Default of the model parameter
 
         Returns:
             None
@@ -45,22 +82,64 @@ class STTNode(Node):
         # need to be the same to work properly
         super().__init__('audio_receiver_node')
 
+        self.declare_parameter("model", model_size)
+        self.declare_parameter("audio_topic", "mic/mic_audio")
+        self.declare_parameter("device", "cpu")
+        self.declare_parameter("compute_type", "int8")
+        self.declare_parameter("cpu_threads", 0)
+        self.declare_parameter("num_workers", 1)
+        self.declare_parameter("background_load", False)
+        self.declare_parameter("warmup", True)
+        self.declare_parameter("model_pool_size", 2)
+        self.declare_parameter("queue_size", 2)
+        self.declare_parameter("queue_policy", "drop_oldest")
+        self.declare_parameter("max_merge_duration", 15.0)
+        self.declare_parameter("max_queue_age", 10.0)
+        self.declare_parameter("stats_period", 10.0)
+        self.declare_parameter("max_batch", 4)
+        self.declare_parameter("max_batch_duration", 28.0)
+        self.declare_parameter("batch_gap", 1.0)
+        self.declare_parameter("decoding", "adaptive")
+        self.declare_parameter("beam_size", 5)
+        self.declare_parameter("logprob_threshold", -1.0)
+        self.declare_parameter("compression_ratio_threshold", 2.4)
+        self.declare_parameter("streaming", False)
+        self.declare_parameter("stream_interval", 1.0)
+        self.declare_parameter("stream_max_buffer", 15.0)
+        self.declare_parameter("utterance_silence", 0.8)
+        self.declare_parameter("command_mode", False)
+        self.declare_parameter("command_interval", 0.3)
+        self.command_mode = self.get_parameter('command_mode').get_parameter_value().bool_value
+        # Commands are found in the partial hypotheses, so command mode streams
+        self.streaming = self.get_parameter('streaming').get_parameter_value().bool_value or self.command_mode
+        self.max_batch = max(self.get_parameter('max_batch').get_parameter_value().integer_value, 1)
+        self.max_batch_duration = self.get_parameter('max_batch_duration').get_parameter_value().double_value
+        self.batch_gap = self.get_parameter('batch_gap').get_parameter_value().double_value
+        self.decoding_policy = DecodingPolicy(
+            strategy=self.get_parameter('decoding').get_parameter_value().string_value,
+            beam_size=self.get_parameter('beam_size').get_parameter_value().integer_value,
+            logprob_threshold=self.get_parameter('logprob_threshold').get_parameter_value().double_value,
+            compression_ratio_threshold=self.get_parameter(
+                'compression_ratio_threshold').get_parameter_value().double_value)
+
         # Init publisher of finished result
         # Publish the data to the topic called STT_result
         self.publisher = self.create_publisher(String, 'stt/stt_result', 10)
+        self.partial_publisher = self.create_publisher(String, 'stt/partial', 10)
+        self.command_publisher = self.create_publisher(String, 'stt/command', 10)
 
 
         # Init subscriber to mic data
-        # Subscribes to the topic called mic_audio
+        # Subscribes to the topic called mic_audio, or to wake/mic_audio behind the wake word gate
         self.subscription = self.create_subscription(
             AudioData,
-            'mic/mic_audio',
+            self.get_parameter('audio_topic').get_parameter_value().string_value,
             self.listener_callback,
             10)
         self.subscription # prevent unused variable warning
         
         # Init the STT model
-        self.stt_model = WhisperModel(model_size)
+        self.init_model()
 
         # Init the services for the node
         self.init_services()
@@ -69,6 +148,106 @@ class STTNode(Node):
         # Trancsription is done when the node is active
         self.active = True
 
+        # Streaming needs every chunk, so they are merged while the worker is busy
+        self.transcription_queue = TranscriptionQueue(
+            maxsize=1 if self.streaming else self.get_parameter('queue_size').get_parameter_value().integer_value,
+            policy=POLICY_MERGE if self.streaming else self.get_parameter('queue_policy').get_parameter_value().string_value,
+            max_merge=int(WHISPER_SAMPLE_RATE * self.get_parameter('max_merge_duration').get_parameter_value().double_value),
+            max_age=self.get_parameter('max_queue_age').get_parameter_value().double_value)
+        self.stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+        self.stats_timer = self.create_timer(
+            self.get_parameter('stats_period').get_parameter_value().double_value, self.log_stats)
+        # A daemon thread, so a transcription that is still running does not keep the process alive
+        worker = self.streaming_worker if self.streaming else self.transcription_worker
+        self.worker_thread = threading.Thread(target=worker, name="transcription_worker", daemon=True)
+        self.worker_thread.start()
+
+    def init_model(self):
+        """
+        Loads the Whisper model, in the background if configured.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.stt_model = None
+        self.model_condition = threading.Condition()
+        self.model_pool = ModelPool(
+            self.create_runtime, self.get_parameter('model_pool_size').get_parameter_value().integer_value)
+        background = self.get_parameter('background_load').get_parameter_value().bool_value
+        # Without background loading, model_ready has run when select returns
+        self.model_pool.select(
+            self.get_parameter('model').get_parameter_value().string_value, background, self.model_ready)
+
+    def create_runtime(self, model):
+        """
+        Builds the WhisperRuntime of a model, with the runtime parameters of the node.
+
+        Args:
+            model: Model size or path
+
+        Returns:
+            WhisperRuntime, not started
+
+        Raises:
+            ModelError when the model is not in the model store
+        """
+        runtime = WhisperRuntime(
+            model=resolve_whisper_model(model),
+            device=self.get_parameter('device').get_parameter_value().string_value,
+            compute_type=self.get_parameter('compute_type').get_parameter_value().string_value,
+            cpu_threads=self.get_parameter('cpu_threads').get_parameter_value().integer_value,
+            num_workers=self.get_parameter('num_workers').get_parameter_value().integer_value,
+            warmup=self.get_parameter('warmup').get_parameter_value().bool_value)
+        self.get_logger().info(f"STT node: Loading model {model} ({runtime.compute_type}, "
+                               f"{runtime.cpu_threads or 'default'} threads)")
+        return runtime
+
+    def model_ready(self, model, runtime):
+        """
+        Swaps in a model once it is loaded, called by the ModelPool.
+
+        The swap is a single assignment, a transcription that is running finishes on the
+        model it started with. The workers waiting for a model are woken up, also when the
+        model failed to load.
+
+        Args:
+            model: Model size or path
+            runtime: The WhisperRuntime of the model
+
+        Returns:
+            None
+        """
+        with self.model_condition:
+            if runtime.model is not None:
+                self.stt_model = runtime.model
+            self.model_condition.notify_all()
+        if runtime.model is None:
+            self.get_logger().error(f"STT node: Could not load model {model} - {runtime.error}")
+            return
+        self.get_logger().info(f"STT node: Model {model} is active, loaded in {runtime.load_time:.2f} s, "
+                               f"warmup took {runtime.warmup_time:.2f} s")
+
+    def wait_for_model(self):
+        """
+        Waits until a model is active, called by the workers.
+
+        A model that failed to load is not waited for any more, the workers keep waiting
+        for one selected through SetModel.
+
+        Args:
+            None
+
+        Returns:
+            True once a model is active, False if the node is shut down before
+        """
+        with self.model_condition:
+            self.model_condition.wait_for(
+                lambda: self.stt_model is not None or self.transcription_queue.closed)
+            return self.stt_model is not None
 
     def listener_callback(self, msg):
         """
@@ -82,21 +261,231 @@ class STTNode(Node):
         """
 
         if self.active:
-            self.get_logger().info("STT node: Receiving audio data from topic")
+            self.get_logger().debug("STT node: Receiving audio data from topic")
             audio_data = self._message_to_numpy_array(msg)
-            self.get_logger().info("STT node: Applying STT model to audio data")
-            #translation = self.stt_model.transcribe_audio(audio_data)
-            translation = self.translate(audio_data)
-            #for segment in translation:
-                # The segment is the result of the transcription, strip of trailing and leading whitespaces
-            #    result = segment.text.strip() 
-            #    self.get_logger().info("STT node: Transcription contains segment: " + result)
-            #    self.publish_result(result)
-            self.publish_result(translation)
-            self.get_logger().info("STT node: The current transcription is finished")
+            if not self.transcription_queue.put(audio_data):
+                self.get_logger().debug("STT node: Transcription queue is full, dropping the audio")
         else:
             self.get_logger().info("STT node: Node is idle, no transcription is done")
 
+    def transcription_worker(self):
+        """
+        Transcribes the queued audio, runs in its own thread.
+
+        The audio queued behind the oldest utterance is taken along in a batch, so the
+        batch size follows the queue depth. The results are published unless the node went
+        idle during the transcription.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.wait_for_model():
+            return
+        max_samples = int(self.max_batch_duration * WHISPER_SAMPLE_RATE)
+        # The silence between the utterances is part of the audio Whisper sees
+        gap = int(self.batch_gap * WHISPER_SAMPLE_RATE)
+        while True:
+            batch = self.transcription_queue.get_batch(self.max_batch, max_samples, gap=gap)
+            if not batch:
+                break
+            if not self.active:
+                continue
+            utterances = [audio_data for _, audio_data in batch]
+            samples = sum(len(audio_data) for audio_data in utterances)
+            self.get_logger().info(f"STT node: Applying STT model to {len(batch)} utterance(s)")
+            start = perf_counter()
+            if len(utterances) == 1:
+                translations = [self.translate(utterances[0])]
+            else:
+                translations = self.translate_batch(utterances)
+            duration = perf_counter() - start
+            now = monotonic()
+            for index, (queued_time, audio_data) in enumerate(batch):
+                # The time of the call is shared by the utterances in proportion to their length
+                self._record_stats(len(audio_data), duration * len(audio_data) / samples, now - queued_time,
+                                   calls=int(index == 0))
+            if self.transcription_queue.closed:
+                break
+            if not self.active:
+                self.get_logger().info("STT node: Node went idle, dropping the transcription")
+                continue
+            for translation in translations:
+                # An utterance without words would overwrite the last result of the listeners
+                if translation:
+                    self.publish_result(translation)
+            self.get_logger().info(f"STT node: The current transcription is finished, "
+                                   f"{duration:.2f} s for {samples / WHISPER_SAMPLE_RATE:.1f} s of audio")
+
+    def streaming_worker(self):
+        """
+        Transcribes the queued audio while it is spoken, runs in its own thread.
+
+        Silence before an utterance is not transcribed, except for a short pre-roll so the
+        first word is not clipped. Going idle drops the open utterance. In command mode the
+        hypotheses are searched for commands.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.wait_for_model():
+            return
+        interval = self.get_parameter('stream_interval').get_parameter_value().double_value
+        utterance_silence = self.get_parameter('utterance_silence').get_parameter_value().double_value
+        transcribe = self.transcribe_words
+        recognizer = CommandRecognizer()
+        if self.command_mode:
+            interval = self.get_parameter('command_interval').get_parameter_value().double_value
+            vocabulary = command_prompt()
+
+            def transcribe(audio_data, prompt):
+                # The vocabulary comes first, the text spoken before goes last as the closer context
+                return self.transcribe_words(audio_data, f"{vocabulary} {prompt}".strip())
+        transcriber = StreamingTranscriber(
+            transcribe, WHISPER_SAMPLE_RATE,
+            max_buffer=self.get_parameter('stream_max_buffer').get_parameter_value().double_value)
+        detector = VoiceActivityDetector(WHISPER_SAMPLE_RATE)
+        frame_duration = detector.frame_length / WHISPER_SAMPLE_RATE
+        pre_roll = np.empty(0, dtype=np.float32)
+        in_utterance = False
+        silence = 0.0
+        queued_time = monotonic()
+
+        while True:
+            wait_start = monotonic()
+            item = self.transcription_queue.get(timeout=interval)
+            if self.transcription_queue.closed:
+                break
+            if not self.active:
+                transcriber.reset()
+                recognizer.reset()
+                in_utterance = False
+                continue
+            if item is not None:
+                queued_time, audio_data = item
+                speech = detector.is_speech(audio_data)
+                if speech.any():
+                    silence = (len(speech) - 1 - np.flatnonzero(speech)[-1]) * frame_duration
+                    if not in_utterance:
+                        in_utterance = True
+                        transcriber.add(pre_roll)
+                else:
+                    silence += len(audio_data) / WHISPER_SAMPLE_RATE
+                if in_utterance:
+                    transcriber.add(audio_data)
+                else:
+                    pre_roll = audio_data[-int(0.3 * WHISPER_SAMPLE_RATE):]
+            else:
+                # No audio arrives once the wake node ends its segment, the wait counts as silence
+                silence += monotonic() - wait_start
+            if not in_utterance:
+                continue
+
+            start = perf_counter()
+            if silence >= utterance_silence:
+                audio_length = transcriber.pending() * WHISPER_SAMPLE_RATE
+                if self.command_mode and transcriber.pending() > 0:
+                    transcriber.process()
+                    self.find_commands(recognizer, transcriber)
+                result = transcriber.finish()
+                self._record_stats(audio_length, perf_counter() - start, monotonic() - queued_time)
+                recognizer.reset()
+                in_utterance = False
+                pre_roll = np.empty(0, dtype=np.float32)
+                if result:
+                    self.publish_result(result)
+            elif transcriber.pending() >= interval:
+                audio_length = transcriber.pending() * WHISPER_SAMPLE_RATE
+                transcriber.process()
+                if self.command_mode:
+                    self.find_commands(recognizer, transcriber)
+                self._record_stats(audio_length, perf_counter() - start, monotonic() - queued_time)
+                self.publish_partial(transcriber.partial_text())
+
+    def find_commands(self, recognizer, transcriber):
+        """
+        Publishes the commands in the latest hypothesis of the utterance
+
+        Args:
+            recognizer: The CommandRecognizer of the utterance
+            transcriber: The StreamingTranscriber of the utterance
+
+        Returns:
+            None
+        """
+        agreement = transcriber.agreement
+        for command in recognizer.feed(agreement.committed + agreement.tentative):
+            self.get_logger().info(f"STT node: Recognized command '{command}'")
+            self.publish_command(command)
+
+    def _record_stats(self, samples, duration, latency, calls=1):
+        """
+        Adds a transcription to the statistics
+
+        Args:
+            samples: Number of new samples transcribed
+            duration: Seconds the transcription took
+            latency: Seconds from the arrival of the audio to the result
+            calls: Number of model calls it took, 0 for the later utterances of a batch
+
+        Returns:
+            None
+        """
+        with self.stats_lock:
+            self.stats["transcriptions"] += 1
+            self.stats["calls"] += calls
+            self.stats["audio"] += samples / WHISPER_SAMPLE_RATE
+            self.stats["transcribe_time"] += duration
+            self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+            self.stats["latency"] += latency
+
+    @staticmethod
+    def _empty_stats():
+        """
+        Returns zeroed transcription statistics
+
+        Args:
+            None
+
+        Returns:
+            Dictionary of counters
+        """
+        return {"transcriptions": 0, "calls": 0, "audio": 0.0, "transcribe_time": 0.0, "latency": 0.0,
+                "max_latency": 0.0, "beam_fallbacks": 0, "greedy_time": 0.0, "beam_time": 0.0}
+
+    def log_stats(self):
+        """
+        Logs the queue depth and the transcription latencies
+
+        The latency runs from the arrival of the audio to the result. Dropped, merged and
+        expired audio is counted since the start.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self.stats_lock:
+            stats = self.stats
+            self.stats = self._empty_stats()
+        queue = self.transcription_queue
+        count = stats["transcriptions"]
+        mean_latency = stats["latency"] / count if count else 0.0
+        real_time_factor = stats["transcribe_time"] / stats["audio"] if stats["audio"] else 0.0
+        self.get_logger().info(
+            f"STT node: queue depth {queue.depth()}, {count} transcriptions in {stats['calls']} model calls, "
+            f"latency mean {mean_latency:.2f} s "
+            f"max {stats['max_latency']:.2f} s, real time factor {real_time_factor:.2f}, "
+            f"{stats['beam_fallbacks']} beam fallbacks, greedy {stats['greedy_time']:.2f} s beam "
+            f"{stats['beam_time']:.2f} s, "
+            f"{queue.dropped} dropped, {queue.merged} merged, {queue.expired} expired in total")
+
     def _message_to_numpy_array(self, msg) -> np.ndarray:
         """ 
         Converts an ros message from topic to an np array for use
@@ -105,13 +494,28 @@ class STTNode(Node):
         Args:
             msg: An AudioData object representing the received audio data
         
+        The samples are viewed in place with np.frombuffer. float32 samples are returned
+        without a copy, int16 samples are scaled to float32 in a single pass. Several
+        channels are mixed down to mono, and audio at another rate than the 16 kHz of the
+        model is resampled (a sample_rate of 0 is taken as 16 kHz).
+
         Returns: 
             Float32 numpy array in the range [-1, 1]
         """
         if msg.samples == 0:
             raise ValueError("No audio data in message")
-        #TODO : Add error handling
-        return np.frombuffer(msg.data, dtype=np.float32)
+        if msg.sample_format == AudioData.FORMAT_INT16:
+            audio = np.frombuffer(msg.data, dtype=np.int16).astype(np.float32)
+            audio *= np.float32(1.0 / 32768.0)
+        elif msg.sample_format == AudioData.FORMAT_FLOAT32:
+            audio = np.frombuffer(msg.data, dtype=np.float32)
+        else:
+            raise ValueError(f"Unknown sample format {msg.sample_format}")
+        if msg.channels > 1:
+            audio = audio.reshape(-1, msg.channels).mean(axis=1, dtype=np.float32)
+        if msg.sample_rate and msg.sample_rate != WHISPER_SAMPLE_RATE:
+            audio = resample(audio, msg.sample_rate, WHISPER_SAMPLE_RATE)
+        return audio
     
 
     def translate(self, audio_data: np.ndarray) -> str:
@@ -124,9 +528,60 @@ class STTNode(Node):
         Returns:
             A string containing the translated text
         """
-        segments, _ = self.stt_model.transcribe(audio_data, beam_size=5)
-        list_of_segments = list(segments)
-        return list_of_segments[0].text.strip()
+        decoding = self.decoding_policy.decode(self.stt_model, audio_data)
+        self._record_decoding(decoding, len(audio_data))
+        return decoding.text()
+
+    def translate_batch(self, utterances: list) -> list:
+        """
+        Translates several utterances with one model call
+
+        Args:
+            utterances: List of numpy arrays containing the audio of each utterance
+
+        Returns:
+            A list with the translated text of each utterance, in order
+        """
+        audio_data, spans = concatenate_utterances(utterances, WHISPER_SAMPLE_RATE, self.batch_gap)
+        return split_words(self.transcribe_words(audio_data), spans)
+
+    def transcribe_words(self, audio_data: np.ndarray, prompt: str = "") -> list:
+        """
+        Transcribes audio to words with timestamps
+
+        Args:
+            audio_data: A numpy array containing the audio data to be transcribed
+            prompt: Text spoken before the audio, passed to the model as context
+
+        Returns:
+            A list of (start, end, text) of the words, times in seconds from the start of the audio
+        """
+        decoding = self.decoding_policy.decode(
+            self.stt_model, audio_data, word_timestamps=True, initial_prompt=prompt or None,
+            condition_on_previous_text=False)
+        self._record_decoding(decoding, len(audio_data))
+        return [(word.start, word.end, word.word) for segment in decoding.segments for word in segment.words or []]
+
+    def _record_decoding(self, decoding, samples):
+        """
+        Logs how an utterance was decoded and counts it in the statistics
+
+        Args:
+            decoding: The Decoding returned by the policy
+            samples: Number of samples decoded
+
+        Returns:
+            None
+        """
+        self.get_logger().debug(
+            f"STT node: {decoding.strategy} decoding of {samples / WHISPER_SAMPLE_RATE:.1f} s, greedy "
+            f"{decoding.greedy_time:.2f} s, beam {decoding.beam_time:.2f} s, avg logprob "
+            f"{decoding.avg_logprob:.2f}, compression ratio {decoding.compression_ratio:.2f}")
+        with self.stats_lock:
+            self.stats["greedy_time"] += decoding.greedy_time
+            self.stats["beam_time"] += decoding.beam_time
+            if decoding.greedy_time and decoding.beam_time:
+                self.stats["beam_fallbacks"] += 1
 
     def destroy_node(self):
         """
@@ -139,16 +594,24 @@ class STTNode(Node):
             None
         """
     
+        self.transcription_queue.close()
+        with self.model_condition:
+            # Wakes up a worker still waiting for the first model
+            self.model_condition.notify_all()
         self.subscription.destroy()
         self.publisher.destroy()
+        self.partial_publisher.destroy()
+        self.command_publisher.destroy()
         self.srv.destroy()
+        self.model_srv.destroy()
         self.stt_model = None
         super().destroy_node()
     
     def init_services(self) -> None:
         """
         Initialzes the services for the node.
-        Uses the SetState service to start and stop the recording.
+        Uses the SetState service to start and stop the recording, and the SetModel
+        service to switch the model.
 
         Args:
             None
@@ -157,6 +620,7 @@ class STTNode(Node):
             None
         """
         self.srv = self.create_service(SetState, 'stt/SetState', self.set_state_of_node)
+        self.model_srv = self.create_service(SetModel, 'stt/SetModel', self.set_model)
     
     def set_state_of_node(self, request: SetState.Request, response: SetState.Response) -> SetState.Response:
         """
@@ -171,7 +635,8 @@ class STTNode(Node):
                 self.get_logger().info("STT node: Transcription node is active.")
             elif request.desired_state == "idle":
                 self.active = False
-                self.get_logger().info("STT node: Transcription node is idle.")
+                dropped = self.transcription_queue.clear()
+                self.get_logger().info(f"STT node: Transcription node is idle, dropped {dropped} queued recordings.")
             response.message = f"Successfully set state to: {request.desired_state}"
             response.success = True
         except Exception as e:
@@ -180,6 +645,33 @@ class STTNode(Node):
         return response
     
 
+    def set_model(self, request: SetModel.Request, response: SetModel.Response) -> SetModel.Response:
+        """
+        Switches the model when a request is recieved.
+
+        Answers at once: a resident model is active when the response is sent, any other
+        model loads in the background and is swapped in once it is ready.
+
+        Args:
+            request: The SetModel request with the model size or path
+            response: The SetModel response
+
+        Returns:
+            The response
+        """
+        try:
+            self.model_pool.select(request.model, background=True, on_ready=self.model_ready)
+        except Exception as e:
+            response.message = f"Error setting model: {request.model} - {e}"
+            response.success = False
+            return response
+        if self.model_pool.active == request.model:
+            response.message = f"Switched to model: {request.model}"
+        else:
+            response.message = f"Loading model: {request.model}, the current model stays active until it is ready"
+        response.success = True
+        return response
+
     def publish_result(self, result : str):
         """'
         Publishes the speech to text result to topic
@@ -194,7 +686,36 @@ class STTNode(Node):
         msg.data = result
         self.get_logger().info('STT node: Publishing result to stt_result topic')
         self.publisher.publish(msg)
-        self.get_logger().info('STT node: Finished publishing result to stt_result topic')    
+        self.get_logger().info('STT node: Finished publishing result to stt_result topic')
+
+    def publish_command(self, command : str):
+        """
+        Publishes the inputed command to stt/command topic
+
+        Args:
+            command: The command, e.g. stop or left
+
+        Returns:
+            None
+        """
+        msg = String()
+        msg.data = command
+        self.command_publisher.publish(msg)
+
+    def publish_partial(self, result : str):
+        """
+        Publishes the partial speech to text result of an utterance to topic
+
+        Args:
+            result: A string containing the text of the utterance so far
+
+        Returns:
+            None
+        """
+        msg = String()
+        msg.data = result
+        self.get_logger().debug('STT node: Publishing partial result to stt/partial topic')
+        self.partial_publisher.publish(msg)    
 
 def main(args=None):
     rclpy.init(args=args)
@@ -0,0 +1,169 @@
+import threading
+from collections import OrderedDict
+
+
+class ModelPool:
+    """
+    Keeps up to capacity Whisper models resident and switches between them.
+
+    Selecting a resident model switches at once. Any other model is loaded and warmed up
+    by its own WhisperRuntime in the background while the active model keeps
+    transcribing, and becomes active once it is ready, unless another model was selected
+    meanwhile. The least recently used models beyond capacity are dropped from the pool,
+    their memory is freed once a transcription still running on them returns.
+
+    Attributes:
+        capacity: Largest number of resident models
+        runtimes: WhisperRuntime per model name, the least recently used first
+        active: Name of the active model, None until one is ready
+        requested: Name of the model selected last
+
+    Methods:
+        __init__ : Initializes an empty pool
+        select : Makes a model the active one, loading it if needed
+        model : The active model
+        names : Names of the resident and loading models
+    """
+
+    def __init__(self, factory, capacity=2):
+        """
+        Initializes the ModelPool
+
+        Args:
+            factory: Function building a WhisperRuntime for a model name, it may raise
+                when the model cannot be found
+            capacity: Largest number of resident models, at least one
+
+        Returns:
+            None
+        """
+        self.factory = factory
+        self.capacity = max(capacity, 1)
+        self.runtimes = OrderedDict()
+        self.active = None
+        self.requested = None
+        self.lock = threading.Lock()
+
+    def select(self, name, background=True, on_ready=None):
+        """
+        Makes a model the active one, loading it if needed
+
+        Args:
+            name: Model size or path
+            background: Whether to load in a background thread or before returning
+            on_ready: Function (name, runtime) called once the model is active, or failed to
+                load (runtime.model is None then)
+
+        Returns:
+            The WhisperRuntime of the model
+        """
+        with self.lock:
+            runtime = self.runtimes.get(name)
+            if runtime is None:
+                # Raises for an unknown model, before the selection changes
+                runtime = self.factory(name)
+                self.runtimes[name] = runtime
+                start = True
+            else:
+                self.runtimes.move_to_end(name)
+                start = False
+            self.requested = name
+            self._evict()
+
+        if start:
+            try:
+                runtime.start(background=background)
+            except Exception:
+                # Kept in runtime.error, reported through on_ready
+                pass
+        if runtime.ready.is_set():
+            self._activate(name, runtime, on_ready)
+        else:
+            threading.Thread(target=self._activate_when_ready, args=(name, runtime, on_ready),
+                             name="model_swap", daemon=True).start()
+        return runtime
+
+    def _activate_when_ready(self, name, runtime, on_ready):
+        """
+        Waits for a model to load and activates it, runs in its own thread
+
+        Args:
+            name: Model name
+            runtime: Its WhisperRuntime
+            on_ready: As in select
+
+        Returns:
+            None
+        """
+        runtime.wait()
+        self._activate(name, runtime, on_ready)
+
+    def _activate(self, name, runtime, on_ready):
+        """
+        Makes a loaded model active, or drops it if it failed to load
+
+        Args:
+            name: Model name
+            runtime: Its WhisperRuntime
+            on_ready: As in select
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if runtime.model is None:
+                if self.runtimes.get(name) is runtime:
+                    del self.runtimes[name]
+            elif self.requested == name and self.runtimes.get(name) is runtime:
+                self.active = name
+                self._evict()
+            else:
+                # Another model was selected while this one loaded
+                return
+        if on_ready is not None:
+            on_ready(name, runtime)
+
+    def _evict(self):
+        """
+        Drops the least recently used models beyond capacity, the lock must be held
+
+        The active and the requested model are kept.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for name in list(self.runtimes):
+            if len(self.runtimes) <= self.capacity:
+                break
+            if name not in (self.active, self.requested):
+                del self.runtimes[name]
+
+    def model(self):
+        """
+        The active model
+
+        Args:
+            None
+
+        Returns:
+            The model, None until one is ready
+        """
+        with self.lock:
+            runtime = self.runtimes.get(self.active)
+            return runtime.model if runtime is not None else None
+
+    def names(self):
+        """
+        Names of the resident and loading models
+
+        Args:
+            None
+
+        Returns:
+            List of names, the least recently used first
+        """
+        with self.lock:
+            return list(self.runtimes)
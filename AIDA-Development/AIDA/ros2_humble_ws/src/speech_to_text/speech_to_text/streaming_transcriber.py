@@ -0,0 +1,271 @@
+import numpy as np
+
+
+def normalize_word(text):
+    """
+    Normalizes a word for comparison between hypotheses
+
+    Args:
+        text: Word as returned by Whisper, with leading space and punctuation
+
+    Returns:
+        The word in lower case without surrounding whitespace and punctuation
+    """
+    return text.strip().strip(".,!?;:\"'").lower()
+
+
+def join_words(words):
+    """
+    Joins words into text
+
+    Args:
+        words: List of (start, end, text) tuples, the texts carry their leading spaces
+
+    Returns:
+        The text without surrounding whitespace
+    """
+    return "".join(word[2] for word in words).strip()
+
+
+class LocalAgreement:
+    """
+    Commits the words two consecutive hypotheses agree on.
+
+    Every new hypothesis of the rolling window is compared word by word with the previous
+    one, and the longest common prefix is committed: a word that came out the same from two
+    transcriptions of growing windows is unlikely to change any more. The rest stays
+    tentative until the next hypothesis.
+
+    Attributes:
+        committed: Committed words as (start, end, text), times in seconds of the stream
+        committed_time: End of the last committed word
+        tentative: Words of the last hypothesis that are not committed yet
+
+    Methods:
+        __init__ : Initializes an empty agreement
+        insert : Compares a new hypothesis and commits the agreed words
+        finish : Commits the tentative words
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty agreement
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.committed = []
+        self.committed_time = 0.0
+        self.tentative = []
+
+    def insert(self, words):
+        """
+        Compares a new hypothesis and commits the agreed words
+
+        Words that start before the end of the last committed word are dropped, as are
+        words at the start of the hypothesis repeating the last committed words (up to
+        five), since the window still holds audio that was committed.
+
+        Args:
+            words: List of (start, end, text) of the hypothesis, times in seconds of the stream
+
+        Returns:
+            List of the newly committed words
+        """
+        words = [word for word in words if word[0] > self.committed_time - 0.1]
+        if words and self.committed and abs(words[0][0] - self.committed_time) < 1.0:
+            for count in range(min(len(self.committed), len(words), 5), 0, -1):
+                tail = [normalize_word(word[2]) for word in self.committed[-count:]]
+                if tail == [normalize_word(word[2]) for word in words[:count]]:
+                    words = words[count:]
+                    break
+
+        agreed = []
+        for new, old in zip(words, self.tentative):
+            if normalize_word(new[2]) != normalize_word(old[2]):
+                break
+            agreed.append(new)
+        self.committed.extend(agreed)
+        if agreed:
+            self.committed_time = agreed[-1][1]
+        self.tentative = words[len(agreed):]
+        return agreed
+
+    def finish(self):
+        """
+        Commits the tentative words, at the end of an utterance
+
+        Args:
+            None
+
+        Returns:
+            List of the newly committed words
+        """
+        words = self.tentative
+        self.committed.extend(words)
+        if words:
+            self.committed_time = words[-1][1]
+        self.tentative = []
+        return words
+
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance while it is spoken.
+
+    Audio is appended to a rolling buffer, and every process call transcribes the whole
+    buffer again. A LocalAgreement commits the words that stay the same between calls, so
+    the committed text grows while the speaker talks and the tentative tail shows the
+    latest guess. Once the buffer is longer than max_buffer it is cut at the end of the
+    last committed word, and the committed text before the cut is passed as the prompt, so
+    the cost of a call stays bounded and the context is kept.
+
+    Attributes:
+        agreement: The LocalAgreement of the utterance
+        buffer_start: Time of the first sample of the buffer in seconds of the stream
+
+    Methods:
+        __init__ : Initializes the transcriber and its configuration
+        add : Appends audio to the buffer
+        pending : Seconds of audio added since the last process call
+        process : Transcribes the buffer and commits the agreed words
+        partial_text : Text of the committed and the tentative words
+        finish : Ends the utterance and returns its text
+        reset : Drops the utterance
+    """
+
+    def __init__(self, transcribe, sample_rate=16000, max_buffer=15.0, prompt_length=200):
+        """
+        Initializes the StreamingTranscriber
+
+        Args:
+            transcribe: Function (audio, prompt) returning a list of (start, end, text) of
+                the words, times in seconds from the start of the audio
+            sample_rate: Sample rate of the audio
+            max_buffer: Seconds of audio after which the buffer is cut
+            prompt_length: Largest number of characters of the prompt
+
+        Returns:
+            None
+        """
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.max_buffer = max_buffer
+        self.prompt_length = prompt_length
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the utterance, the next audio starts a new one
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.agreement = LocalAgreement()
+        self.buffer = np.empty(0, dtype=np.float32)
+        self.buffer_start = 0.0
+        self.processed = 0
+
+    def add(self, samples):
+        """
+        Appends audio to the buffer
+
+        Args:
+            samples: float32 array of mono samples
+
+        Returns:
+            None
+        """
+        self.buffer = np.concatenate((self.buffer, np.asarray(samples, dtype=np.float32)))
+
+    def pending(self):
+        """
+        Seconds of audio added since the last process call
+
+        Args:
+            None
+
+        Returns:
+            Seconds of audio
+        """
+        return (len(self.buffer) - self.processed) / self.sample_rate
+
+    def process(self):
+        """
+        Transcribes the buffer and commits the agreed words
+
+        Args:
+            None
+
+        Returns:
+            List of the newly committed words
+        """
+        if not len(self.buffer):
+            return []
+        committed = self.agreement.committed
+        prompt = join_words([word for word in committed if word[1] <= self.buffer_start])
+        words = self.transcribe(self.buffer, prompt[-self.prompt_length:])
+        words = [(start + self.buffer_start, end + self.buffer_start, text)
+                 for start, end, text in words]
+        agreed = self.agreement.insert(words)
+        self.processed = len(self.buffer)
+
+        if len(self.buffer) > self.max_buffer * self.sample_rate:
+            if self.agreement.committed_time <= self.buffer_start:
+                # Nothing was agreed on for a whole buffer, take the last hypothesis as it is
+                agreed = agreed + self.agreement.finish()
+            self._cut(self.agreement.committed_time)
+        return agreed
+
+    def _cut(self, time):
+        """
+        Drops the audio before a time from the buffer
+
+        Args:
+            time: Time in seconds of the stream
+
+        Returns:
+            None
+        """
+        cut = min(int((time - self.buffer_start) * self.sample_rate), len(self.buffer))
+        self.buffer = self.buffer[cut:]
+        self.buffer_start += cut / self.sample_rate
+        self.processed = max(self.processed - cut, 0)
+
+    def partial_text(self):
+        """
+        Text of the committed and the tentative words
+
+        Args:
+            None
+
+        Returns:
+            The text of the utterance so far
+        """
+        return join_words(self.agreement.committed + self.agreement.tentative)
+
+    def finish(self):
+        """
+        Ends the utterance and returns its text
+
+        Audio that was not processed yet is transcribed first, then the tentative words
+        are committed.
+
+        Args:
+            None
+
+        Returns:
+            The text of the utterance
+        """
+        if self.pending() > 0:
+            self.process()
+        self.agreement.finish()
+        text = join_words(self.agreement.committed)
+        self.reset()
+        return text
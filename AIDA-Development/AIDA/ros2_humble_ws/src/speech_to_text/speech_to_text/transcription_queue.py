@@ -0,0 +1,215 @@
+import threading
+from time import monotonic
+
+import numpy as np
+
+# What happens to audio that arrives while the queue is full
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+POLICY_MERGE = "merge"
+POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_MERGE)
+
+
+class TranscriptionQueue:
+    """
+    A bounded queue of audio waiting for transcription, shared by the subscription
+    callback and the transcription worker.
+
+    put never blocks, so the callback returns at once. When the queue is full the policy
+    decides what is lost:
+        drop_oldest: the oldest audio is dropped, the transcription follows the speaker
+        drop_newest: the new audio is dropped, what is queued is transcribed first
+        merge: the new audio is appended to the newest queued audio, up to max_merge
+            samples, after that the oldest audio is dropped
+
+    Every item keeps the time it was queued (the oldest part for merged items), so the
+    worker can skip audio that waited longer than max_age and measure the latency.
+
+    Attributes:
+        dropped: Number of items dropped because the queue was full
+        merged: Number of items appended to a queued item
+        expired: Number of items skipped because they waited longer than max_age
+
+    Methods:
+        __init__ : Initializes the queue and its configuration
+        put : Queues audio, called by the subscription callback
+        get : Waits for the oldest audio that is not too old, called by the worker
+        get_batch : Waits for the oldest audio and takes the queued audio behind it along
+        clear : Drops all queued audio
+        depth : Number of queued items
+        close : Wakes up and stops the worker
+    """
+
+    def __init__(self, maxsize=2, policy=POLICY_DROP_OLDEST, max_merge=16000 * 15,
+                 max_age=0.0, clock=monotonic):
+        """
+        Initializes the TranscriptionQueue
+
+        Args:
+            maxsize: Number of items the queue holds
+            policy: One of POLICIES
+            max_merge: Largest number of samples of a merged item
+            max_age: Items that waited longer than this many seconds are skipped, 0 keeps all
+            clock: Function returning the time in seconds
+
+        Returns:
+            None
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least one")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy {policy}, expected one of {POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_merge = max_merge
+        self.max_age = max_age
+        self.clock = clock
+        self.items = []
+        self.closed = False
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.merged = 0
+        self.expired = 0
+
+    def put(self, audio):
+        """
+        Queues audio, called by the subscription callback
+
+        Args:
+            audio: float32 numpy array of mono samples
+
+        Returns:
+            True if the audio was queued or merged, False if it was dropped
+        """
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                newest_time, newest = self.items[-1]
+                if self.policy == POLICY_MERGE and len(newest) + len(audio) <= self.max_merge:
+                    self.items[-1] = (newest_time, np.concatenate((newest, audio)))
+                    self.merged += 1
+                    self.condition.notify()
+                    return True
+                self.dropped += 1
+                if self.policy == POLICY_DROP_NEWEST:
+                    return False
+                self.items.pop(0)
+            self.items.append((self.clock(), audio))
+            self.condition.notify()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Waits for the oldest audio that is not too old, called by the worker
+
+        Args:
+            timeout: Seconds to wait, None waits until audio arrives or the queue is closed
+
+        Returns:
+            Tuple of (time the audio was queued, audio), or None on timeout or when closed
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        with self.condition:
+            while not self.closed:
+                item = self._pop_fresh()
+                if item is not None:
+                    return item
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+            return None
+
+    def get_batch(self, max_items, max_samples=0, timeout=None, gap=0):
+        """
+        Waits for the oldest audio, and takes the audio queued behind it along
+
+        The batch grows with the queue: an empty queue gives a batch of one as soon as
+        audio arrives, a backlog gives up to max_items without waiting for more.
+
+        Args:
+            max_items: Largest number of items in the batch
+            max_samples: Largest number of samples in the batch, the first item is always
+                taken, 0 does not limit it
+            timeout: Seconds to wait for the first item, as in get
+            gap: Samples of silence put between two items, counted in max_samples
+
+        Returns:
+            List of (time the audio was queued, audio) in queue order, empty on timeout or
+            when closed
+        """
+        first = self.get(timeout)
+        if first is None:
+            return []
+        batch = [first]
+        samples = len(first[1])
+        with self.condition:
+            while len(batch) < max_items and self.items:
+                queued_time, audio = self.items[0]
+                if self.max_age > 0 and self.clock() - queued_time > self.max_age:
+                    self.items.pop(0)
+                    self.expired += 1
+                    continue
+                if max_samples and samples + gap + len(audio) > max_samples:
+                    break
+                batch.append(self.items.pop(0))
+                samples += gap + len(audio)
+        return batch
+
+    def _pop_fresh(self):
+        """
+        Removes the oldest item that is not too old, the lock must be held
+
+        Args:
+            None
+
+        Returns:
+            Tuple of (time the audio was queued, audio), or None when the queue is empty
+        """
+        while self.items:
+            queued_time, audio = self.items.pop(0)
+            if self.max_age <= 0 or self.clock() - queued_time <= self.max_age:
+                return queued_time, audio
+            self.expired += 1
+        return None
+
+    def clear(self):
+        """
+        Drops all queued audio
+
+        Args:
+            None
+
+        Returns:
+            Number of items dropped
+        """
+        with self.condition:
+            count = len(self.items)
+            self.items.clear()
+            return count
+
+    def depth(self):
+        """
+        Number of queued items
+
+        Args:
+            None
+
+        Returns:
+            Number of items
+        """
+        with self.condition:
+            return len(self.items)
+
+    def close(self):
+        """
+        Wakes up and stops the worker, get returns None from now on
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
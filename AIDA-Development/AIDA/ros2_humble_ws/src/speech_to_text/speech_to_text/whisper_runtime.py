@@ -0,0 +1,176 @@
+import os
+import threading
+from time import perf_counter
+
+import numpy as np
+
+
+def resolve_whisper_model(model):
+    """
+    Finds the files of a Whisper model in the installed model store
+
+    Args:
+        model: Model size such as tiny.en, or a path to a converted model
+
+    Returns:
+        Path of the model directory, a path is returned as it is
+
+    Raises:
+        ModelError right away when the model was not fetched or is corrupt, instead of a
+        download when the model is loaded
+    """
+    if os.path.isdir(model):
+        return model
+    from aida_models.registry import resolve_model
+    return str(resolve_model(f"whisper-{model}"))
+
+
+def load_whisper_model(model, device, compute_type, cpu_threads, num_workers):
+    """
+    Builds a faster_whisper model
+
+    faster_whisper is imported here, so the runtime can be used and tested without it.
+
+    Args:
+        model: Model size such as tiny.en, or a path to a converted model
+        device: cpu, cuda or auto
+        compute_type: CTranslate2 compute type such as int8, int8_float32 or default
+        cpu_threads: Number of threads per inference, 0 lets CTranslate2 choose
+        num_workers: Number of inferences that can run in parallel
+
+    Returns:
+        WhisperModel
+    """
+    from faster_whisper import WhisperModel
+    return WhisperModel(model, device=device, compute_type=compute_type,
+                        cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+class WhisperRuntime:
+    """
+    Loads a Whisper model, in the background if wanted, and warms it up.
+
+    The first inference of a CTranslate2 model allocates its buffers and is several times
+    slower than the following ones, so a warmup transcribes a second of silence before
+    the model is marked ready. The load and warmup times are kept for the logs.
+
+    Attributes:
+        model: The loaded model, None until it is ready
+        ready: Event set once the model is loaded and warmed up, or failed to
+        error: The exception raised while loading, or None
+        load_time: Seconds it took to load the model
+        warmup_time: Seconds the warmup inference took
+
+    Methods:
+        __init__ : Stores the configuration
+        start : Loads the model, in a background thread or right away
+        load : Loads and warms up the model
+        wait : Waits until the model is ready
+    """
+
+    def __init__(self, model="tiny.en", device="cpu", compute_type="int8", cpu_threads=0,
+                 num_workers=1, warmup=True, loader=load_whisper_model):
+        """
+        Stores the configuration
+
+        Args:
+            model: Model size such as tiny.en, or a path to a converted model
+            device: cpu, cuda or auto
+            compute_type: CTranslate2 compute type
+            cpu_threads: Number of threads per inference, 0 lets CTranslate2 choose
+            num_workers: Number of inferences that can run in parallel
+            warmup: Whether to run a warmup inference after loading
+            loader: Function building the model from the arguments above
+
+        Returns:
+            None
+        """
+        self.model_name = model
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.warmup = warmup
+        self.loader = loader
+        self.model = None
+        self.error = None
+        self.load_time = 0.0
+        self.warmup_time = 0.0
+        self.ready = threading.Event()
+
+    def start(self, background=False):
+        """
+        Loads the model, in a background thread or right away
+
+        Args:
+            background: Whether to return at once and load in a daemon thread
+
+        Returns:
+            None
+        """
+        if background:
+            threading.Thread(target=self._load_in_background, name="whisper_loader",
+                             daemon=True).start()
+        else:
+            self.load()
+
+    def load(self):
+        """
+        Loads and warms up the model
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            Whatever the loader raises, e.g. when the model cannot be found. ready is set
+            in any case.
+        """
+        try:
+            start = perf_counter()
+            model = self.loader(self.model_name, self.device, self.compute_type,
+                                self.cpu_threads, self.num_workers)
+            self.load_time = perf_counter() - start
+            if self.warmup:
+                start = perf_counter()
+                segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1)
+                # The transcription runs lazily while the segments are consumed
+                list(segments)
+                self.warmup_time = perf_counter() - start
+            self.model = model
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            self.ready.set()
+
+    def _load_in_background(self):
+        """
+        Loads the model in the background thread, the error is kept in error
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        try:
+            self.load()
+        except Exception:
+            # Kept in self.error, the node reports it
+            pass
+
+    def wait(self, timeout=None):
+        """
+        Waits until the model is ready
+
+        Args:
+            timeout: Seconds to wait, None waits as long as it takes
+
+        Returns:
+            The model, or None if it is not ready yet or failed to load
+        """
+        self.ready.wait(timeout)
+        return self.model
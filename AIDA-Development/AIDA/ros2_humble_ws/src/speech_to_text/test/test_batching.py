@@ -0,0 +1,25 @@
+from speech_to_text.batching import concatenate_utterances, split_words
+import numpy as np
+
+
+def test_concatenate_utterances_inserts_silence():
+    """
+    Tests that utterances are joined with silence and their spans are returned.
+    """
+    utterances = [np.ones(8000, dtype=np.float32), np.full(4000, 0.5, dtype=np.float32)]
+    audio, spans = concatenate_utterances(utterances, sample_rate=16000, gap=1.0)
+
+    assert len(audio) == 8000 + 16000 + 4000
+    assert not audio[8000:24000].any()
+    assert spans == [(0.0, 0.5), (1.5, 1.75)]
+
+
+def test_split_words_by_utterance():
+    """
+    Tests that the words are given to the utterance they are closest to, in order.
+    """
+    spans = [(0.0, 1.0), (2.0, 3.0), (4.0, 5.0)]
+    words = [(0.1, 0.4, " Turn"), (0.5, 1.2, " left."), (2.1, 2.5, " Stop.")]
+
+    assert split_words(words, spans) == ["Turn left.", "Stop.", ""]
+    assert split_words([], []) == []
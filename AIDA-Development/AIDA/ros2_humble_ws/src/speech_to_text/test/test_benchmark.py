@@ -0,0 +1,42 @@
+from speech_to_text.benchmark import configurations, default_fixtures, summarize, word_error_rate
+import pytest
+
+
+def test_word_error_rate():
+    """
+    Tests the word error rate ignoring case and punctuation.
+    """
+    assert word_error_rate("Turn left, then stop.", "turn left then stop") == (0, 4)
+    assert word_error_rate("turn left then stop", "turn right stop now") == (3, 4)
+    assert word_error_rate("stop", "") == (1, 1)
+
+
+def test_configurations_skip_beam_sizes_for_greedy():
+    """
+    Tests that greedy decoding is run once whatever the beam sizes.
+    """
+    matrix = configurations(["tiny.en"], ["int8"], ["greedy", "beam"], [2, 5], [4])
+
+    assert [(entry["decoding"], entry["beam_size"]) for entry in matrix] == [
+        ("greedy", 1), ("beam", 2), ("beam", 5)]
+    assert all(entry["cpu_threads"] == 4 for entry in matrix)
+
+
+def test_summarize():
+    """
+    Tests the real time factor and the latency percentiles.
+    """
+    summary = summarize([0.5, 1.0, 1.5], [2.0, 2.0, 2.0], 1, 10)
+
+    assert summary["real_time_factor"] == pytest.approx(0.5)
+    assert summary["latency_p50"] == pytest.approx(1.0)
+    assert summary["latency_max"] == pytest.approx(1.5)
+    assert summary["word_error_rate"] == pytest.approx(0.1)
+    assert summarize([1.0], [1.0], 0, 0)["word_error_rate"] is None
+
+
+def test_default_fixtures_exist():
+    """
+    Tests that the default fixtures directory holds the shipped WAV fixture.
+    """
+    assert (default_fixtures() / "jfk.wav").is_file()
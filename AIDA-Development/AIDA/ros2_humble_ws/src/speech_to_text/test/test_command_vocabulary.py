@@ -0,0 +1,40 @@
+from speech_to_text.command_vocabulary import CommandRecognizer, PhraseTrie, command_prompt
+
+
+def words(*texts):
+    return [(index * 0.5, index * 0.5 + 0.4, " " + text) for index, text in enumerate(texts)]
+
+
+def test_trie_matches_as_soon_as_unique():
+    """
+    Tests that a phrase matches once a single command is left.
+    """
+    trie = PhraseTrie({"turn left": "left", "turn right": "right", "stop": "stop", "go forward": "forward"})
+
+    assert trie.match(["stop"]) == ("stop", 1)
+    assert trie.match(["turn"]) == (None, 0)
+    assert trie.match(["turn", "left"]) == ("left", 2)
+    assert trie.match(["go"]) == ("forward", 1)
+    assert trie.match(["hello"]) == (None, 0)
+
+
+def test_recognizer_reports_each_command_once():
+    """
+    Tests that growing hypotheses report a command once, and later commands too.
+    """
+    recognizer = CommandRecognizer()
+
+    assert recognizer.feed(words("Please", "turn")) == []
+    assert recognizer.feed(words("Please", "turn", "left,")) == ["left"]
+    assert recognizer.feed(words("Please", "turn", "left,")) == []
+    assert recognizer.feed(words("Please", "turn", "left,", "then", "Stop.")) == ["stop"]
+
+    recognizer.reset()
+    assert recognizer.feed(words("Stop!")) == ["stop"]
+
+
+def test_command_prompt_lists_phrases():
+    """
+    Tests that the prompt lists the phrases of the vocabulary.
+    """
+    assert command_prompt({"forward": "forward", "stop": "stop"}) == "Forward, stop."
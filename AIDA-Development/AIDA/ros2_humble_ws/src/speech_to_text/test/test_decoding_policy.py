@@ -0,0 +1,76 @@
+from speech_to_text.decoding_policy import DecodingPolicy, confidence
+import numpy as np
+import pytest
+
+
+class FakeSegment:
+    def __init__(self, text, avg_logprob, compression_ratio=1.2, start=0.0, end=1.0):
+        self.text = text
+        self.avg_logprob = avg_logprob
+        self.compression_ratio = compression_ratio
+        self.start = start
+        self.end = end
+
+
+class FakeModel:
+    def __init__(self, greedy, beam):
+        self.greedy = greedy
+        self.beam = beam
+        self.calls = []
+
+    def transcribe(self, audio, beam_size=5, **options):
+        self.calls.append((beam_size, options))
+        return iter(self.greedy if beam_size == 1 else self.beam), None
+
+
+AUDIO = np.zeros(16000, dtype=np.float32)
+
+
+def test_confident_greedy_is_kept():
+    """
+    Tests that a confident greedy transcription is not decoded again.
+    """
+    model = FakeModel([FakeSegment(" Turn left.", -0.2)], [FakeSegment(" Turn left", -0.1)])
+    decoding = DecodingPolicy().decode(model, AUDIO, word_timestamps=True)
+
+    assert decoding.strategy == "greedy"
+    assert decoding.segments[0].text == " Turn left."
+    assert decoding.beam_time == 0.0
+    assert model.calls == [(1, {"temperature": 0.0, "word_timestamps": True})]
+
+
+@pytest.mark.parametrize("segment", [FakeSegment(" Tern lift", -1.5),
+                                     FakeSegment(" left left left left", -0.2, compression_ratio=3.0)])
+def test_unsure_greedy_falls_back_to_beam(segment):
+    """
+    Tests that a low log probability or a high compression ratio triggers beam search.
+    """
+    model = FakeModel([segment], [FakeSegment(" Turn left.", -0.3)])
+    decoding = DecodingPolicy(beam_size=4).decode(model, AUDIO)
+
+    assert decoding.strategy == "beam"
+    assert decoding.segments[0].text == " Turn left."
+    assert [call[0] for call in model.calls] == [1, 4]
+    assert decoding.avg_logprob == segment.avg_logprob
+
+
+def test_forced_strategies():
+    """
+    Tests that the greedy and beam strategies never fall back and never decode greedily.
+    """
+    model = FakeModel([FakeSegment(" Tern lift", -1.5)], [FakeSegment(" Turn left.", -0.3)])
+    assert DecodingPolicy("greedy").decode(model, AUDIO).strategy == "greedy"
+    assert DecodingPolicy("beam").decode(model, AUDIO).greedy_time == 0.0
+    assert [call[0] for call in model.calls] == [1, 5]
+    with pytest.raises(ValueError):
+        DecodingPolicy("sampling")
+
+
+def test_confidence_weights_by_duration():
+    """
+    Tests that the average log probability is weighted by the segment durations.
+    """
+    segments = [FakeSegment("a", -1.0, 1.5, 0.0, 3.0), FakeSegment("b", -2.0, 2.0, 3.0, 4.0)]
+
+    assert confidence(segments) == (-1.25, 2.0)
+    assert confidence([]) == (0.0, 0.0)
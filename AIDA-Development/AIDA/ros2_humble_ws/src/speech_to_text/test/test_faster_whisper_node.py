@@ -1,4 +1,5 @@
 from speech_to_text.faster_whisper_node import STTNode
+from speech_to_text.transcription_queue import TranscriptionQueue
 from audio_data.msg import AudioData
 from aida_interfaces.srv import SetState
 import numpy as np
@@ -7,6 +8,7 @@ import pytest
 import librosa
 from pathlib import Path
 import os
+from types import SimpleNamespace
 
 
 @pytest.fixture
@@ -71,6 +73,51 @@ def test_message_to_numpy_array_empty(node):
         result = node._message_to_numpy_array(msg)
     assert exec_info.type == ValueError
 
+def test_message_to_numpy_array_int16(node):
+    """
+    Tests the message_to_numpy_array method in the FasterWhisperLogic class.
+    Tests that int16 samples are scaled to float32 in [-1, 1].
+    """
+    data = np.array([16384, -8192, 32767, -32768], dtype=np.int16)
+    msg = AudioData()
+    msg.data = data.tobytes()
+    msg.sample_format = AudioData.FORMAT_INT16
+    msg.samples = len(data)
+
+    result = node._message_to_numpy_array(msg)
+
+    assert result.dtype == np.float32
+    assert np.allclose(result, [0.5, -0.25, 32767 / 32768, -1.0])
+
+def test_message_to_numpy_array_resamples(node):
+    """
+    Tests the message_to_numpy_array method in the FasterWhisperLogic class.
+    Tests that 48 kHz audio is resampled to the 16 kHz of the model.
+    """
+    data = np.zeros(4800, dtype=np.int16)
+    msg = AudioData()
+    msg.data = data.tobytes()
+    msg.sample_format = AudioData.FORMAT_INT16
+    msg.sample_rate = 48000
+    msg.samples = len(data)
+
+    result = node._message_to_numpy_array(msg)
+
+    assert len(result) == 1600
+
+def test_message_to_numpy_array_unknown_format(node):
+    """
+    Tests the message_to_numpy_array method in the FasterWhisperLogic class.
+    Tests that an unknown sample format is refused.
+    """
+    msg = AudioData()
+    msg.data = np.zeros(4, dtype=np.int16).tobytes()
+    msg.sample_format = 7
+    msg.samples = 4
+
+    with pytest.raises(ValueError):
+        node._message_to_numpy_array(msg)
+
 def test_transcribe_audio(node):
     """
     Tests the translate method for the Node.
@@ -102,6 +149,23 @@ def test_set_state_of_node_idle(node):
     # Reset back to default state 
     node.active = True
 
+def test_set_state_of_node_idle_drops_queue(node):
+    """
+    Tests the set_state_of_node method in the Node.
+    Tests that going idle drops the audio waiting for transcription.
+    """
+    # Stop the worker, so the queued audio stays in the queue
+    node.transcription_queue.close()
+    node.worker_thread.join(timeout=1.0)
+    node.transcription_queue = TranscriptionQueue()
+    node.transcription_queue.put(np.zeros(16000, dtype=np.float32))
+    request = SetState.Request()
+    request.desired_state = "idle"
+    node.set_state_of_node(request, SetState.Response())
+
+    assert node.transcription_queue.depth() == 0
+    node.active = True
+
 def test_set_state_of_node_active(node):
     """
     Tests the set_state_of_node method in the Node.
@@ -118,3 +182,14 @@ def test_set_state_of_node_active(node):
     assert response.message == "Successfully set state to: active"
     # Reset back to default state
     node.active = True
+
+def test_failed_model_load_keeps_active_model(node):
+    """
+    Tests that a model failing to load leaves the active model in place for the workers.
+    """
+    assert node.wait_for_model()
+    model = node.stt_model
+    node.model_ready("missing", SimpleNamespace(model=None, error=FileNotFoundError("missing")))
+
+    assert node.stt_model is model
+    assert node.wait_for_model()
@@ -0,0 +1,122 @@
+import threading
+
+from speech_to_text.model_pool import ModelPool
+from speech_to_text.whisper_runtime import WhisperRuntime
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def transcribe(self, audio, beam_size=5):
+        return iter([]), None
+
+
+class Factory:
+    def __init__(self):
+        self.created = []
+        self.gates = {}
+
+    def __call__(self, name):
+        self.created.append(name)
+        gate = self.gates.setdefault(name, threading.Event())
+
+        def loader(*args):
+            gate.wait(5.0)
+            if name == "broken":
+                raise FileNotFoundError(name)
+            return FakeModel(name)
+
+        return WhisperRuntime(name, warmup=False, loader=loader)
+
+    def release(self, name):
+        self.gates.setdefault(name, threading.Event()).set()
+
+
+def test_swap_after_background_load():
+    """
+    Tests that the active model keeps serving until the new one is loaded.
+    """
+    factory = Factory()
+    ready = []
+    pool = ModelPool(factory, capacity=2)
+    factory.release("tiny.en")
+    pool.select("tiny.en", background=False, on_ready=lambda name, runtime: ready.append(name))
+    assert pool.model().name == "tiny.en"
+
+    runtime = pool.select("base.en", on_ready=lambda name, runtime: ready.append(name))
+    assert pool.model().name == "tiny.en"
+    factory.release("base.en")
+    runtime.wait(5.0)
+    for _ in range(100):
+        if pool.active == "base.en":
+            break
+        threading.Event().wait(0.01)
+
+    assert pool.model().name == "base.en"
+    assert ready == ["tiny.en", "base.en"]
+
+
+def test_resident_model_switches_at_once_and_lru_is_evicted():
+    """
+    Tests that a resident model is not loaded again and the least recently used is dropped.
+    """
+    factory = Factory()
+    for name in ("tiny.en", "base.en", "small.en"):
+        factory.release(name)
+    pool = ModelPool(factory, capacity=2)
+    pool.select("tiny.en", background=False)
+    pool.select("base.en", background=False)
+    pool.select("tiny.en", background=False)
+
+    assert pool.active == "tiny.en"
+    assert factory.created == ["tiny.en", "base.en"]
+
+    pool.select("small.en", background=False)
+    assert pool.names() == ["tiny.en", "small.en"]
+
+
+def test_failed_load_keeps_active_model():
+    """
+    Tests that a model that fails to load is dropped and the active model stays.
+    """
+    factory = Factory()
+    factory.release("tiny.en")
+    factory.release("broken")
+    failed = []
+    pool = ModelPool(factory)
+    pool.select("tiny.en", background=False)
+    pool.select("broken", background=False, on_ready=lambda name, runtime: failed.append(runtime.error))
+
+    assert pool.active == "tiny.en"
+    assert pool.names() == ["tiny.en"]
+    assert isinstance(failed[0], FileNotFoundError)
+
+
+def test_unknown_model_keeps_selection():
+    """
+    Tests that a model the factory rejects does not block a model that is still loading.
+    """
+    factory = Factory()
+    factory.release("tiny.en")
+    pool = ModelPool(factory)
+    pool.select("tiny.en", background=False)
+    runtime = pool.select("base.en")
+
+    def reject(name):
+        raise ValueError(name)
+
+    pool.factory = reject
+    try:
+        pool.select("unknown")
+    except ValueError:
+        pass
+
+    assert pool.requested == "base.en"
+    factory.release("base.en")
+    runtime.wait(5.0)
+    for _ in range(100):
+        if pool.active == "base.en":
+            break
+        threading.Event().wait(0.01)
+    assert pool.active == "base.en"
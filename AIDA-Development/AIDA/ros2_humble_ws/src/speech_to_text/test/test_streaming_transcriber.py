@@ -0,0 +1,105 @@
+from speech_to_text.streaming_transcriber import LocalAgreement, StreamingTranscriber, join_words
+import numpy as np
+
+SENTENCE = "and so my fellow americans ask not what your country can do for you".split()
+
+
+class FakeModel:
+    """
+    Transcribes the sentence spoken at one word per 0.4 seconds. Only words that are
+    complete in the audio are returned, and the last of them is still misheard.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self.prompts = []
+
+    def __call__(self, audio, prompt):
+        self.prompts.append(prompt)
+        duration = len(audio) / 16000
+        words = []
+        for index, word in enumerate(SENTENCE):
+            start = 0.4 * index - self.offset
+            if start >= 0 and start + 0.3 <= duration:
+                words.append((start, start + 0.3, " " + word))
+        if words:
+            start, end, word = words[-1]
+            words[-1] = (start, end, " " + word.strip()[::-1])
+        return words
+
+
+def test_agreement_commits_common_prefix():
+    """
+    Tests that only the words two hypotheses agree on are committed.
+    """
+    agreement = LocalAgreement()
+    assert agreement.insert([(0.0, 0.3, " Hello"), (0.4, 0.7, " word")]) == []
+
+    agreed = agreement.insert([(0.0, 0.3, " hello,"), (0.4, 0.7, " world"), (0.8, 1.0, " again")])
+
+    assert [word[2] for word in agreed] == [" hello,"]
+    assert [word[2] for word in agreement.tentative] == [" world", " again"]
+    assert agreement.committed_time == 0.3
+
+
+def test_agreement_skips_repeated_words():
+    """
+    Tests that committed words repeated at the start of a hypothesis are not committed twice.
+    """
+    agreement = LocalAgreement()
+    agreement.insert([(0.0, 0.3, " stop"), (0.4, 0.7, " now")])
+    agreement.insert([(0.0, 0.3, " stop"), (0.4, 0.7, " now")])
+
+    # The timestamps of the words drift between windows
+    agreement.insert([(0.3, 0.6, " now"), (0.8, 1.0, " please")])
+    agreement.insert([(0.3, 0.6, " now"), (0.8, 1.0, " please")])
+
+    assert join_words(agreement.committed) == "stop now please"
+
+
+def test_streaming_grows_partial_and_finishes():
+    """
+    Tests that the committed text grows with the audio, and finish returns the whole sentence.
+    """
+    model = FakeModel()
+    transcriber = StreamingTranscriber(model, max_buffer=2.0)
+    committed = []
+    for _ in range(12):
+        transcriber.add(np.zeros(8000, dtype=np.float32))
+        model.offset = transcriber.buffer_start
+        committed.append(len(transcriber.agreement.committed))
+        transcriber.process()
+
+    assert committed == sorted(committed) and committed[-1] > 8
+    assert transcriber.partial_text().startswith("and so my fellow americans ask not")
+    assert transcriber.finish() == " ".join(SENTENCE[:-1] + ["uoy"])
+
+
+def test_buffer_is_cut_and_prompted():
+    """
+    Tests that the buffer is cut at the committed words and the cut text becomes the prompt.
+    """
+    model = FakeModel()
+    transcriber = StreamingTranscriber(model, max_buffer=2.0)
+    for _ in range(8):
+        transcriber.add(np.zeros(8000, dtype=np.float32))
+        model.offset = transcriber.buffer_start
+        transcriber.process()
+
+    assert transcriber.buffer_start > 0
+    assert len(transcriber.buffer) <= 3 * 16000
+    assert model.prompts[-1].startswith("and so my")
+
+
+def test_reset_drops_utterance():
+    """
+    Tests that reset forgets the audio and the words.
+    """
+    transcriber = StreamingTranscriber(FakeModel())
+    transcriber.add(np.zeros(16000, dtype=np.float32))
+    transcriber.process()
+
+    transcriber.reset()
+
+    assert transcriber.pending() == 0
+    assert transcriber.finish() == ""
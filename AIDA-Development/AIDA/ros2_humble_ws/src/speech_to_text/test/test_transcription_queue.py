@@ -0,0 +1,124 @@
+import threading
+
+from speech_to_text.transcription_queue import TranscriptionQueue
+import numpy as np
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def audio(value, length=4):
+    return np.full(length, value, dtype=np.float32)
+
+
+def test_drop_oldest_keeps_newest():
+    """
+    Tests that a full queue drops its oldest audio for new audio.
+    """
+    transcription_queue = TranscriptionQueue(maxsize=2)
+    for value in range(3):
+        assert transcription_queue.put(audio(value))
+
+    assert transcription_queue.dropped == 1
+    assert transcription_queue.get(timeout=0)[1][0] == 1
+    assert transcription_queue.get(timeout=0)[1][0] == 2
+
+
+def test_drop_newest_keeps_queued():
+    """
+    Tests that a full queue refuses new audio with the drop_newest policy.
+    """
+    transcription_queue = TranscriptionQueue(maxsize=1, policy="drop_newest")
+    transcription_queue.put(audio(0))
+
+    assert not transcription_queue.put(audio(1))
+    assert transcription_queue.get(timeout=0)[1][0] == 0
+
+
+def test_merge_appends_to_newest():
+    """
+    Tests that the merge policy appends to the newest audio until max_merge is reached.
+    """
+    clock = FakeClock()
+    transcription_queue = TranscriptionQueue(maxsize=1, policy="merge", max_merge=8, clock=clock)
+    transcription_queue.put(audio(0))
+    clock.time = 1.0
+    transcription_queue.put(audio(1))
+    transcription_queue.put(audio(2))
+
+    queued_time, merged = transcription_queue.get(timeout=0)
+    assert transcription_queue.merged == 1 and transcription_queue.dropped == 1
+    # The merged audio was full, so it was dropped for the third chunk
+    assert queued_time == 1.0 and np.array_equal(merged, audio(2))
+
+
+def test_expired_audio_is_skipped():
+    """
+    Tests that audio older than max_age is skipped by get.
+    """
+    clock = FakeClock()
+    transcription_queue = TranscriptionQueue(maxsize=3, max_age=5.0, clock=clock)
+    transcription_queue.put(audio(0))
+    clock.time = 4.0
+    transcription_queue.put(audio(1))
+    clock.time = 6.0
+
+    assert transcription_queue.get(timeout=0)[1][0] == 1
+    assert transcription_queue.expired == 1
+
+
+def test_close_wakes_waiting_worker():
+    """
+    Tests that close makes a waiting get return None.
+    """
+    transcription_queue = TranscriptionQueue()
+    results = []
+    worker = threading.Thread(target=lambda: results.append(transcription_queue.get()))
+    worker.start()
+
+    transcription_queue.close()
+    worker.join(timeout=1.0)
+
+    assert results == [None]
+
+
+def test_unknown_policy():
+    """
+    Tests that an unknown policy is refused.
+    """
+    with pytest.raises(ValueError):
+        TranscriptionQueue(policy="lifo")
+
+
+def test_get_batch_follows_queue_depth():
+    """
+    Tests that a batch takes the queued audio along, up to the item and sample limits.
+    """
+    transcription_queue = TranscriptionQueue(maxsize=5)
+    transcription_queue.put(audio(0))
+    assert [item[1][0] for item in transcription_queue.get_batch(3, timeout=0)] == [0]
+
+    for value in range(1, 6):
+        transcription_queue.put(audio(value))
+    assert [item[1][0] for item in transcription_queue.get_batch(3, timeout=0)] == [1, 2, 3]
+    assert [item[1][0] for item in transcription_queue.get_batch(3, max_samples=6, timeout=0)] == [4]
+    assert [item[1][0] for item in transcription_queue.get_batch(3, timeout=0)] == [5]
+    assert transcription_queue.get_batch(3, timeout=0) == []
+
+
+def test_get_batch_counts_gaps():
+    """
+    Tests that the silence between the items of a batch counts towards the sample limit.
+    """
+    transcription_queue = TranscriptionQueue(maxsize=5)
+    for value in range(3):
+        transcription_queue.put(audio(value))
+
+    batch = transcription_queue.get_batch(3, max_samples=12, timeout=0, gap=1)
+    assert [item[1][0] for item in batch] == [0, 1]
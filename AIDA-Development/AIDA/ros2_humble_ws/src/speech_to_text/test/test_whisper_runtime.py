@@ -0,0 +1,80 @@
+from speech_to_text.whisper_runtime import WhisperRuntime
+import pytest
+
+
+class FakeModel:
+    def __init__(self):
+        self.transcriptions = []
+
+    def transcribe(self, audio, beam_size=5):
+        self.transcriptions.append(len(audio))
+        return iter([]), None
+
+
+def test_load_passes_runtime_options():
+    """
+    Tests that the model is built with the configured runtime options and warmed up.
+    """
+    calls = []
+    model = FakeModel()
+
+    def loader(*args):
+        calls.append(args)
+        return model
+
+    runtime = WhisperRuntime("base.en", compute_type="int8_float32", cpu_threads=4,
+                             num_workers=2, loader=loader)
+    runtime.start()
+
+    assert calls == [("base.en", "cpu", "int8_float32", 4, 2)]
+    assert runtime.wait(0) is model
+    assert model.transcriptions == [16000]
+    assert runtime.load_time >= 0 and runtime.warmup_time >= 0
+
+
+def test_warmup_can_be_disabled():
+    """
+    Tests that no inference runs when the warmup is disabled.
+    """
+    model = FakeModel()
+    runtime = WhisperRuntime(warmup=False, loader=lambda *args: model)
+    runtime.start()
+
+    assert model.transcriptions == []
+
+
+def test_background_load():
+    """
+    Tests that a background load sets ready once the model is loaded.
+    """
+    model = FakeModel()
+    runtime = WhisperRuntime(loader=lambda *args: model)
+    runtime.start(background=True)
+
+    assert runtime.wait(5.0) is model
+    assert runtime.ready.is_set()
+
+
+def test_background_load_error():
+    """
+    Tests that a failed background load is kept in error and still sets ready.
+    """
+    def loader(*args):
+        raise RuntimeError("model not found")
+
+    runtime = WhisperRuntime(loader=loader)
+    runtime.start(background=True)
+
+    assert runtime.wait(5.0) is None
+    assert isinstance(runtime.error, RuntimeError)
+
+
+def test_load_error_is_raised():
+    """
+    Tests that a failed load in the foreground raises.
+    """
+    def loader(*args):
+        raise RuntimeError("model not found")
+
+    with pytest.raises(RuntimeError):
+        WhisperRuntime(loader=loader).start()